@@ -0,0 +1,66 @@
+"""The tool modules import each other as siblings, as they do under orchestrate tools import -p ."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "wxo_assets", "tools"))
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class LocalServer:
+    """
+    Loopback HTTP server answering from a path -> (status, headers, body, delay) table.
+    Every request is recorded as (method, path, headers), and the client address it
+    came from in clients.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.clients = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, so connection reuse can be observed
+
+            def log_message(self, *args):
+                pass
+
+            def _answer(self):
+                server.requests.append((self.command, self.path, dict(self.headers)))
+                server.clients.append(self.client_address)
+                route = server.routes.get(self.path, (404, {}, b"", 0))
+                status, headers, body, delay = route(self) if callable(route) else route
+                time.sleep(delay)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            do_GET = do_HEAD = do_POST = _answer
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def url(self, path: str = "/") -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}{path}"
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def http_server():
+    server = LocalServer()
+    yield server
+    server.close()
@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+import diagnose_incident_tool
+from diagnose_incident_tool import classify_logs, diagnose_incident_log_file, diagnose_log_file
+
+LINES = [
+    "Fiber cut detected between R03 and R04 at site S005",
+    "UPS battery low at site S002, generator failed to start",
+    "BGP neighbor 10.0.0.{n} down after config push",
+    "Ping to site S008 timed out",
+]
+
+
+def write_log(path, count, blank_every=0):
+    with open(path, "w", encoding="utf-8") as log_file:
+        for i in range(count):
+            log_file.write(LINES[i % len(LINES)].format(n=i) + "\n")
+            if blank_every and i % blank_every == 0:
+                log_file.write("\n")
+    return [LINES[i % len(LINES)].format(n=i) for i in range(count)]
+
+
+def read_labels(path):
+    with open(path, encoding="utf-8") as labels:
+        return [line.rstrip("\n").split("\t") for line in labels]
+
+
+def test_single_batch_counts_and_labels(tmp_path):
+    lines = write_log(tmp_path / "incidents.log", 8, blank_every=3)
+    result = diagnose_log_file(str(tmp_path / "incidents.log"), str(tmp_path / "labels.tsv"))
+    assert result["lines"] == 8
+    assert result["counts"] == {"Backhaul Failure": 2, "Power Outage": 2, "Configuration Error": 2, "Unknown": 2}
+    assert read_labels(tmp_path / "labels.tsv") == [[r["root_cause"], line] for r, line in zip(classify_logs(lines), lines)]
+
+
+def test_worker_pool_keeps_line_order_across_batches_and_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(diagnose_incident_tool, "BULK_BATCH_LINES", 37)
+    monkeypatch.setattr(diagnose_incident_tool, "BULK_CHUNK_BYTES", 100)
+    lines = write_log(tmp_path / "incidents.log", 500)
+    result = diagnose_log_file(str(tmp_path / "incidents.log"), str(tmp_path / "labels.tsv"), workers=2)
+    assert result["lines"] == 500 and sum(result["counts"].values()) == 500
+    assert [line for _, line in read_labels(tmp_path / "labels.tsv")] == lines
+    assert [label for label, _ in read_labels(tmp_path / "labels.tsv")] == [r["root_cause"] for r in classify_logs(lines)]
+
+
+def test_empty_file(tmp_path):
+    (tmp_path / "empty.log").write_text("")
+    assert diagnose_log_file(str(tmp_path / "empty.log"))["lines"] == 0
+
+
+@pytest.fixture
+def log_directory(tmp_path, monkeypatch):
+    directory = tmp_path / "incident_logs"
+    directory.mkdir()
+    write_log(directory / "incidents.log", 4)
+    monkeypatch.setattr(diagnose_incident_tool, "INCIDENT_LOG_DIRECTORY", str(directory))
+    return directory
+
+
+def test_tool_reads_and_writes_inside_the_log_directory(log_directory):
+    result = json.loads(diagnose_incident_log_file.fn("incidents.log", "labels.tsv"))
+    assert result["lines"] == 4 and result["file_path"] == os.path.realpath(log_directory / "incidents.log")
+    assert len(read_labels(log_directory / "labels.tsv")) == 4
+    assert json.loads(diagnose_incident_log_file.fn(str(log_directory / "incidents.log")))["lines"] == 4
+
+
+@pytest.mark.parametrize("file_path, output_path, rejected", [
+    ("../outside.log", None, "file_path"),
+    ("/etc/passwd", None, "file_path"),
+    ("escape.log", None, "file_path"),
+    (".", None, "file_path"),
+    ("incidents.log", "../labels.tsv", "output_path"),
+    ("incidents.log", "/tmp/labels.tsv", "output_path"),
+])
+def test_tool_rejects_paths_outside_the_log_directory(log_directory, file_path, output_path, rejected):
+    (log_directory.parent / "outside.log").write_text("power failure\n")
+    os.symlink(log_directory.parent / "outside.log", log_directory / "escape.log")
+    result = json.loads(diagnose_incident_log_file.fn(file_path, output_path))
+    assert result["error"].startswith(f"{rejected} must be inside the incident log directory")
+    assert "lines" not in result
+
+
+def test_tool_reports_a_missing_file(log_directory):
+    assert json.loads(diagnose_incident_log_file.fn("missing.log"))["error"].startswith("Cannot read or write log file")
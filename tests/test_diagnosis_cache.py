@@ -0,0 +1,50 @@
+import pytest
+
+import diagnose_incident_tool
+from diagnose_incident_tool import _DiagnosisCache, classify_logs, fingerprint_log
+
+
+@pytest.mark.parametrize("log_message, fingerprint", [
+    ("2024-05-01T10:00:00Z BGP down on R03 10.0.0.1 site S005 port 4", "<ts> bgp down on <router> <ip> site <site> port <n>"),
+    ("May  1 10:00:01 UPS failed at S002 mac 00:1a:2b:3c:4d:5e id 0xdeadbeef", "<ts> ups failed at <site> mac <mac> id <hex>"),
+    ("fe80::1 link down at 12:30", "<ip> link down at <ts>"),
+    ("Fiber   cut\tbetween R03 and R04", "fiber cut between <router> and <router>"),
+])
+def test_fingerprint_masks_variable_parts(log_message, fingerprint):
+    assert fingerprint_log(log_message) == fingerprint
+
+
+def test_fingerprint_keeps_words_containing_digits_or_ids():
+    assert fingerprint_log("router3 s5g ipv4") == "router3 s5g ipv4"
+    assert fingerprint_log("UPS failed at S002") == fingerprint_log("ups failed at s017")
+
+
+def test_cache_counts_hits_misses_and_evicts_least_recently_used():
+    cache = _DiagnosisCache(2)
+    assert cache.get("a") is None
+    cache.set("a", {"root_cause": "Power Outage"})
+    cache.set("b", {"root_cause": "Backhaul Failure"})
+    assert cache.get("a") == {"root_cause": "Power Outage"}   # "b" is now least recently used
+    cache.set("c", {"root_cause": "Configuration Error"})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats() == {
+        "entries": 2, "max_entries": 2, "hits": 3, "misses": 2, "evictions": 1, "hit_rate": 0.6
+    }
+
+
+def test_classify_logs_diagnoses_each_pattern_once(monkeypatch):
+    monkeypatch.setattr(diagnose_incident_tool, "_diagnosis_cache", _DiagnosisCache(100))
+    diagnosed = []
+    uncached = diagnose_incident_tool._diagnose_uncached
+    monkeypatch.setattr(diagnose_incident_tool, "_diagnose_uncached", lambda logs: diagnosed.extend(logs) or uncached(logs))
+
+    logs = [f"UPS failed at S{site:03d} at 10:0{site}:00" for site in range(5)] + ["BGP neighbor down on R03"]
+    results = classify_logs(logs)
+    assert [result["root_cause"] for result in results] == ["Power Outage"] * 5 + ["Configuration Error"]
+    assert diagnosed == [logs[0], logs[5]]
+
+    classify_logs(["UPS failed at S099 at 11:00:00"])
+    assert len(diagnosed) == 2
+    stats = diagnose_incident_tool.get_diagnosis_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (5, 2, 2)
@@ -0,0 +1,79 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import diagnose_incident_tool
+from diagnose_incident_tool import HashedNgramClassifier, _DiagnosisCache, _train_from_file, classify_logs
+
+TRAINING = [
+    ("Backhaul Failure", "microwave link fade on hop to site S005"),
+    ("Backhaul Failure", "microwave link fade between S002 and hub"),
+    ("Power Outage", "commercial mains lost at site S003"),
+    ("Power Outage", "commercial mains lost, site on battery"),
+    ("Configuration Error", "route map typo after change window"),
+    ("Configuration Error", "route map typo rejected prefixes"),
+]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return HashedNgramClassifier.train([text for _, text in TRAINING], [label for label, _ in TRAINING], hash_bits=12)
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(diagnose_incident_tool, "_diagnosis_cache", _DiagnosisCache(100))
+
+
+def test_learns_labels_the_keyword_rules_miss(model):
+    probabilities = model.predict_proba(["microwave link fade at S009", "commercial mains lost again", "route map typo"])
+    assert probabilities.shape == (3, 3)
+    assert np.allclose(probabilities.sum(axis=1), 1.0)
+    assert [model.classes[i] for i in probabilities.argmax(axis=1)] == ["Backhaul Failure", "Power Outage", "Configuration Error"]
+
+
+def test_save_and_load_round_trip(model, tmp_path):
+    model.save(str(tmp_path / "model.npz"))
+    loaded = HashedNgramClassifier.load(str(tmp_path / "model.npz"))
+    assert (loaded.classes, loaded.hash_bits) == (model.classes, 12)
+    texts = ["microwave link fade", "something else entirely"]
+    assert np.allclose(loaded.predict_proba(texts), model.predict_proba(texts), atol=1e-6)
+
+
+def test_classify_logs_uses_confident_classifier_and_falls_back_to_keywords(model, fresh_cache, monkeypatch):
+    monkeypatch.setattr(diagnose_incident_tool, "_classifier", model)
+    monkeypatch.setattr(diagnose_incident_tool, "CLASSIFIER_MIN_CONFIDENCE", 0.5)
+    confident, unsure = classify_logs(["microwave link fade on hop to site S007", "UPS battery low"])
+    assert (confident["root_cause"], confident["method"]) == ("Backhaul Failure", "classifier")
+    assert confident["confidence"] >= 0.5 and set(confident["probabilities"]) == set(model.classes)
+    assert (unsure["root_cause"], unsure["method"]) == ("Power Outage", "keywords")
+
+
+def test_classify_logs_uses_keywords_without_a_model(fresh_cache, monkeypatch):
+    monkeypatch.setattr(diagnose_incident_tool, "_classifier", None)
+    [result] = classify_logs(["microwave link fade on hop to site S007"])
+    assert (result["root_cause"], result["method"]) == ("Unknown", "keywords")
+
+
+class RecordingLog:
+    def __init__(self):
+        self.events = []
+
+    def __getattr__(self, level):
+        return lambda event, **fields: self.events.append((level, event, fields))
+
+
+@pytest.mark.parametrize("training, warned", [
+    (TRAINING, False),
+    ([("Power Outage", "UPS failed at S002"), ("Backhaul Failure", "fiber cut on R03")], True),
+])
+def test_training_file_warns_when_labels_only_repeat_the_keyword_rules(tmp_path, monkeypatch, training, warned):
+    recorder = RecordingLog()
+    monkeypatch.setattr(diagnose_incident_tool, "log", recorder)
+    (tmp_path / "labelled.tsv").write_text("".join(f"{label}\t{text}\n" for label, text in training) + "no tab here\n")
+    _train_from_file(str(tmp_path / "labelled.tsv"), str(tmp_path / "model.npz"))
+
+    events = [event for _, event, _ in recorder.events]
+    assert ("diagnosis.train.keyword_labels" in events) is warned
+    assert events[-1] == "diagnosis.train.saved" and recorder.events[-1][2]["logs"] == len(training)
+    assert HashedNgramClassifier.load(str(tmp_path / "model.npz")).classes == sorted({label for label, _ in training})
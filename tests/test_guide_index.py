@@ -0,0 +1,55 @@
+import pytest
+
+import resolution_guide_tool
+from resolution_guide_tool import GuideIndex, build_guide_index
+
+GUIDES = {
+    "backhaul_failure_guide.txt": "Fiber cut on the backhaul link. Check the carrier circuit and restore the transport path.",
+    "power_outage_guide.txt": "Power outage at the site. Check the UPS battery and start the generator. Restore rectifier power.",
+}
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    for name, text in GUIDES.items():
+        (tmp_path / name).write_text(text, encoding="utf-8")
+    monkeypatch.setattr(resolution_guide_tool, "GUIDE_DIRECTORY", str(tmp_path))
+    index_path = str(tmp_path / "guides.idx")
+    summary = build_guide_index(index_path)
+    assert sorted(summary["guides"]) == sorted(GUIDES)
+    guide_index = GuideIndex(index_path)
+    yield guide_index
+    guide_index.close()
+
+
+def test_search_ranks_the_matching_guide_first(index):
+    passages = index.search("generator battery restore", top_k=2)
+    assert passages[0]["guide"] == "power_outage_guide.txt"
+    assert [passage["score"] for passage in passages] == sorted((passage["score"] for passage in passages), reverse=True)
+
+
+def test_search_is_limited_to_the_cause_guide(index):
+    passages = index.search("restore check", root_cause="Backhaul Failure", top_k=5)
+    assert passages and {passage["guide"] for passage in passages} == {"backhaul_failure_guide.txt"}
+
+
+def test_search_falls_back_to_all_guides_without_a_cause_guide(index):
+    assert index.has_guide("Power Outage")
+    assert not index.has_guide("Configuration Error")
+    passages = index.search("restore check", root_cause="Configuration Error", top_k=5)
+    assert {passage["guide"] for passage in passages} == set(GUIDES)
+
+
+def test_search_returns_passage_text_and_nothing_for_unknown_terms(index):
+    passage = index.search("fiber", top_k=1)[0]
+    assert "Fiber cut" in passage["text"]
+    assert index.search("nonexistentterm") == []
+
+
+def test_shipped_guides_cover_every_cause(tmp_path):
+    summary = build_guide_index(str(tmp_path / "guides.idx"))
+    index = GuideIndex(summary["index_path"])
+    try:
+        assert all(index.has_guide(cause) for cause in resolution_guide_tool.GUIDE_FILES)
+    finally:
+        index.close()
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+import check_server_status_tool
+from check_server_status_tool import (
+    MONITOR_MAX_INTERVAL, MONITOR_MIN_INTERVAL, HealthMonitor, _empty_result, _MonitoredTarget, get_server_status
+)
+
+URL = "https://noc.example.com"
+
+
+def probe_result(url, mode, up=True, latency=10):
+    result = _empty_result(url, mode)
+    result.update(state="UP" if up else "DOWN", status_code=200 if up else 503, latency_ms=latency)
+    return result
+
+
+@pytest.fixture
+def monitor():
+    """A monitor whose targets are sampled by the test, without the scheduler thread."""
+    monitor = HealthMonitor()
+    monitor._targets[URL] = _MonitoredTarget(URL, "headers")
+    return monitor
+
+
+def sample(monitor, monkeypatch, *states, latency=10):
+    for up in states:
+        monkeypatch.setattr(check_server_status_tool, "_probe", lambda url, mode: probe_result(url, mode, up, latency))
+        monitor._sample(monitor._targets[URL])
+
+
+def test_interval_backs_off_while_stable_and_resets_on_a_state_change(monitor, monkeypatch):
+    sample(monitor, monkeypatch, True)
+    assert monitor._targets[URL].interval == 2 * MONITOR_MIN_INTERVAL
+    sample(monitor, monkeypatch, *[True] * 5)
+    assert monitor._targets[URL].interval == MONITOR_MAX_INTERVAL
+    sample(monitor, monkeypatch, False)
+    assert monitor._targets[URL].interval == MONITOR_MIN_INTERVAL
+
+
+def test_latest_answers_only_for_the_same_mode_and_a_young_sample(monitor, monkeypatch):
+    sample(monitor, monkeypatch, True)
+    assert monitor.latest("noc.example.com", 60, "headers")["state"] == "UP"
+    assert monitor.latest(URL, 60, "get") is None
+    monitor._targets[URL].last_sampled -= 120
+    assert monitor.latest(URL, 60, "headers") is None
+
+
+def test_report_computes_uptime_and_latency_percentiles(monitor, monkeypatch):
+    for latency in range(10, 110, 10):
+        sample(monitor, monkeypatch, True, latency=latency)
+    sample(monitor, monkeypatch, False, False)
+    report = monitor.report(URL, 15)
+    assert report["samples"] == 12 and report["state"] == "DOWN"
+    assert report["uptime_pct"] == round(100 * 10 / 12, 1)
+    assert (report["p50_ms"], report["p95_ms"]) == (50, 100)
+
+    monitor._targets[URL].history.appendleft((time.monotonic() - 3600, True, 5))
+    assert monitor.report(URL, 15)["samples"] == 12
+
+
+def test_history_is_a_bounded_ring(monitor, monkeypatch):
+    monkeypatch.setattr(check_server_status_tool, "_probe", lambda url, mode: probe_result(url, mode))
+    target = monitor._targets[URL]
+    for _ in range(target.history.maxlen + 5):
+        monitor._sample(target)
+    assert len(target.history) == target.history.maxlen
+
+
+def test_registration_is_capped(monkeypatch):
+    monkeypatch.setattr(check_server_status_tool, "MONITOR_MAX_TARGETS", 1)
+    monitor = HealthMonitor()
+    monkeypatch.setattr(monitor, "_ensure_running", lambda: None)
+    assert monitor.register("a.example.com")
+    assert monitor.register("https://a.example.com")
+    assert not monitor.register("b.example.com")
+    assert monitor.targets() == ["https://a.example.com"]
+
+
+def test_check_answers_from_the_monitor(monitor, monkeypatch):
+    sample(monitor, monkeypatch, True)
+    monkeypatch.setattr(check_server_status_tool, "_monitor", monitor)
+    monkeypatch.setattr(check_server_status_tool, "_probe", lambda url, mode: pytest.fail("probed live"))
+    assert "age_s" in get_server_status(URL, "headers")
+    assert "monitored 0s ago" in check_server_status_tool.check_server_status.fn(URL, mode="headers")
+
+
+def test_scheduler_probes_registered_targets(http_server):
+    http_server.routes = {"/health": (200, {}, b"", 0)}
+    monitor = HealthMonitor()
+    url = http_server.url("/health")
+    assert monitor.register(url)
+    deadline = time.monotonic() + 5
+    while monitor.latest(url, 60, "headers") is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert monitor.latest(url, 60, "headers")["status_code"] == 200
+    assert monitor.unregister(url) and monitor.targets() == []
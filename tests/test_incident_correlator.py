@@ -0,0 +1,89 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import diagnose_incident_tool
+from diagnose_incident_tool import IncidentCorrelator, _DiagnosisCache, correlate_incident_logs, parse_log_timestamp
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(diagnose_incident_tool, "_diagnosis_cache", _DiagnosisCache(100))
+
+
+def by_key(incidents) -> dict:
+    return {incident["incident_key"]: incident for incident in incidents}
+
+
+def test_parses_iso_and_syslog_timestamps():
+    assert parse_log_timestamp("2024-05-01T10:00:00 UPS failed") == datetime(2024, 5, 1, 10, 0, 0).timestamp()
+    assert parse_log_timestamp("2024-05-01 10:00:05 UPS failed") == datetime(2024, 5, 1, 10, 0, 5).timestamp()
+    assert datetime.fromtimestamp(parse_log_timestamp("May  1 10:00:01 host UPS failed")).strftime("%m-%d %H:%M:%S") == "05-01 10:00:01"
+    assert parse_log_timestamp("UPS failed at S002") is None
+
+
+def test_groups_by_site_within_the_window():
+    correlator = IncidentCorrelator(window_seconds=60)
+    closed = correlator.add(
+        ["UPS failed at S002", "Generator down at S002", "Fiber cut at S005", "Battery low at S002"],
+        timestamps=[0, 30, 40, 85]
+    )
+    assert closed == []
+    incidents = by_key(correlator.flush())
+    assert incidents["S002"]["event_count"] == 3 and incidents["S002"]["root_cause"] == "Power Outage"
+    assert incidents["S005"]["event_count"] == 1 and incidents["S005"]["root_cause"] == "Backhaul Failure"
+    assert correlator.flush() == []
+
+
+def test_emits_an_incident_once_the_clock_passes_its_window():
+    correlator = IncidentCorrelator(window_seconds=60)
+    assert correlator.add(["UPS failed at S002"], timestamps=[0]) == []
+    [closed] = correlator.add(["UPS failed at S002 again"], timestamps=[61])
+    assert (closed["incident_key"], closed["event_count"]) == ("S002", 1)
+    [reopened] = correlator.flush()
+    assert reopened["event_count"] == 1 and reopened["first_seen"] == datetime.fromtimestamp(61).isoformat()
+
+
+def test_router_link_joins_the_site_incident_it_was_seen_with():
+    correlator = IncidentCorrelator(window_seconds=60)
+    correlator.add(
+        ["Fiber cut between R04 and R03 at site S005", "LOS alarm on R03 R04", "Interface flap on R07 R08", "Ping timed out"],
+        timestamps=[0, 10, 20, 30]
+    )
+    incidents = by_key(correlator.flush())
+    assert set(incidents) == {"S005", "R07-R08", "unlocated"}
+    assert incidents["S005"]["event_count"] == 2 and incidents["S005"]["routers"] == ["R03", "R04"]
+    assert incidents["R07-R08"]["site"] is None
+
+
+def test_short_timestamp_list_falls_back_to_log_then_previous_time():
+    correlator = IncidentCorrelator(window_seconds=60)
+    start = datetime(2024, 5, 1, 10, 0, 0).timestamp()
+    correlator.add(["UPS failed at S002", "2024-05-01T10:00:30 battery low at S002", "generator down at S002"], timestamps=[start])
+    [incident] = correlator.flush()
+    assert incident["event_count"] == 3
+    assert (incident["first_seen"], incident["last_seen"]) == ("2024-05-01T10:00:00", "2024-05-01T10:00:30")
+
+
+def test_open_incidents_are_capped_by_closing_the_least_recently_updated():
+    correlator = IncidentCorrelator(window_seconds=3600, max_open_groups=2)
+    closed = correlator.add(["UPS failed at S001", "UPS failed at S002", "UPS failed at S001", "UPS failed at S003"], timestamps=[0, 1, 2, 3])
+    assert [incident["incident_key"] for incident in closed] == ["S002"]
+    assert sorted(incident["incident_key"] for incident in correlator.flush()) == ["S001", "S003"]
+
+
+def test_tool_returns_incidents_most_events_first():
+    logs = [
+        "2024-05-01T10:00:00 Fiber cut at S005",
+        "2024-05-01T10:00:00 UPS failed at S002",
+        "2024-05-01T10:00:10 battery low at S002",
+        "2024-05-01T10:20:00 generator down at S002",
+    ]
+    result = json.loads(correlate_incident_logs.fn(logs, window_seconds=300))
+    assert (result["log_count"], result["incident_count"]) == (4, 3)
+    assert [(i["incident_key"], i["event_count"]) for i in result["incidents"]] == [("S002", 2), ("S005", 1), ("S002", 1)]
+
+    terse = json.loads(correlate_incident_logs.fn(logs, window_seconds=3600, response_format="terse"))
+    assert terse["incident_count"] == 2 and "log_count" not in terse
+    assert set(terse["incidents"][0]) == {"incident_key", "site", "root_cause", "event_count", "first_seen", "last_seen"}
@@ -0,0 +1,137 @@
+import json
+import time
+
+import pytest
+
+import diagnose_incident_tool
+import incident_snapshot_tool
+from diagnose_incident_tool import _DiagnosisCache
+from incident_snapshot_tool import get_incident_snapshot
+from network_data_tool import NetworkDataset
+from network_topology_tool import TopologyGraph
+
+DATASET = {
+    "sites": [
+        {"site_id": "S002", "region": "East", "status": "down", "management_url": "https://s002.noc.example"},
+        {"site_id": "S005", "region": "West", "status": "active"},
+    ]
+}
+LOGS = [
+    "2024-05-01T10:00:00 Fiber cut between R03 and R04 at site S005",
+    "2024-05-01T10:00:05 UPS failed at S002",
+    "2024-05-01T10:00:09 battery low at S002",
+]
+
+
+def topology() -> TopologyGraph:
+    return TopologyGraph(
+        ["R01", "R03", "R04", "S002", "S005", "S006"],
+        [("R01", "R03"), ("R03", "R04"), ("R04", "S005"), ("R04", "S006"), ("R01", "S002")],
+        roots=["R01"],
+        sites={"S002", "S005", "S006"}
+    )
+
+
+@pytest.fixture
+def parts(monkeypatch):
+    """Fake backends; delays maps a part's backend ("server", "network", "topology") to seconds of latency."""
+    calls, delays, dataset, graph = [], {}, NetworkDataset(DATASET), topology()
+
+    def server_status(url, mode):
+        calls.append((url, mode))
+        time.sleep(delays.get("server", 0))
+        return {"url": url, "state": "UP", "status_code": 200}
+
+    def network_dataset():
+        time.sleep(delays.get("network", 0))
+        return dataset
+
+    def get_topology():
+        time.sleep(delays.get("topology", 0))
+        return graph
+
+    monkeypatch.setattr(incident_snapshot_tool, "get_server_status", server_status)
+    monkeypatch.setattr(incident_snapshot_tool, "get_network_dataset", network_dataset)
+    monkeypatch.setattr(incident_snapshot_tool, "get_topology", get_topology)
+    monkeypatch.setattr(diagnose_incident_tool, "_diagnosis_cache", _DiagnosisCache(100))
+    return calls, delays
+
+
+def snapshot(target, log_lines=None, **kwargs) -> dict:
+    return json.loads(get_incident_snapshot.fn(target, log_lines, **kwargs))
+
+
+def test_site_snapshot_merges_every_part(parts):
+    calls, _ = parts
+    result = snapshot("s002", LOGS + ["  "])
+    assert calls == [("https://s002.noc.example", "headers")]
+    assert result["server"]["state"] == "UP"
+    assert list(result["network"]["sites"]) == ["S002", "S005"]
+    assert result["network"]["sites"]["S002"]["summary"]["state"] == {"down": 1}
+    assert result["diagnosis"]["root_cause"] == "Power Outage"
+    assert result["diagnosis"]["cause_counts"] == {"Backhaul Failure": 1, "Power Outage": 2}
+    assert len(result["diagnosis"]["logs"]) == 3
+    assert {incident["incident_key"] for incident in result["diagnosis"]["incidents"]} == {"S002", "S005"}
+    assert result["blast_radius"]["failure"]["links"] == ["R03-R04"]
+    assert sorted(result["blast_radius"]["affected_sites"]) == ["S005", "S006"]
+    assert set(result["timings_ms"]) == {"server", "network", "diagnosis", "blast_radius"}
+
+
+def test_url_snapshot_without_logs_only_checks_the_server(parts):
+    calls, _ = parts
+    result = snapshot(" https://api.noc.example/health ")
+    assert calls == [("https://api.noc.example/health", "headers")]
+    assert set(result) == {"target", "timings_ms", "server", "wall_ms"}
+
+
+def test_site_without_address_or_failed_link_uses_the_site_itself(parts):
+    calls, _ = parts
+    result = snapshot("S005")
+    assert calls == []
+    assert result["server"] == {"state": "UNKNOWN", "error": "No server address recorded for S005"}
+    assert result["blast_radius"]["failure"]["nodes"] == ["S005"]
+    assert "S005 itself going down" in result["blast_radius"]["assumption"]
+    assert "diagnosis" not in result
+
+
+def test_unknown_site_reports_a_blast_radius_error(parts):
+    assert snapshot("S404")["blast_radius"] == {"error": "Failed link or site not found in the network topology"}
+
+
+def test_parts_run_concurrently(parts):
+    _, delays = parts
+    delays.update(server=0.4, network=0.4, topology=0.4)
+    started = time.perf_counter()
+    result = snapshot("S002", LOGS)
+    assert time.perf_counter() - started < 1.0
+    assert all(result["timings_ms"][part] >= 400 for part in ("server", "network", "blast_radius"))
+
+
+def test_slow_part_is_reported_as_timed_out(parts):
+    _, delays = parts
+    delays["topology"] = 2.5
+    started = time.perf_counter()
+    result = snapshot("S002", LOGS, timeout=1)
+    assert time.perf_counter() - started < 2.0
+    assert result["blast_radius"] == {"error": "timed out after 1s"}
+    assert "blast_radius" not in result["timings_ms"]
+    assert result["diagnosis"]["root_cause"] == "Power Outage"
+
+
+def test_failing_part_is_reported_without_hiding_the_others(parts, monkeypatch):
+    def unavailable():
+        raise ValueError("Network data is neither a JSON object nor a list")
+
+    monkeypatch.setattr(incident_snapshot_tool, "get_network_dataset", unavailable)
+    result = snapshot("S002", LOGS)
+    assert result["network"] == {"error": "Network data is neither a JSON object nor a list"}
+    assert result["server"] == result["network"]   # the site's address comes from the same dataset
+    assert result["diagnosis"]["root_cause"] == "Power Outage"
+
+
+def test_terse_snapshot_keeps_states_and_counts_only(parts):
+    result = snapshot("S002", LOGS, response_format="terse")
+    assert "records" not in result["network"]["sites"]["S002"]
+    assert result["network"]["sites"]["S002"]["match_count"] == 1
+    assert set(result["diagnosis"]) == {"root_cause", "cause_counts", "incidents"}
+    assert "timings_ms" not in result
@@ -0,0 +1,114 @@
+import pytest
+
+import jira_connect_tool
+from jira_connect_tool import JIRA_BULK_CHUNK_SIZE, _TTLCache, _bulk_create_jira_issues, _priority_mapping
+
+BASE_URL = "https://jira/rest/api/3"
+DEFAULTS = {
+    "severity_level": "HIGH", "outage_type": "power", "affected_nodes": 3,
+    "description": None, "customer_impact": None, "location": None
+}
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body=None, text: str = None):
+        self.status_code = status_code
+        self._body = body
+        self.text = text if text is not None else str(body)
+
+    def json(self):
+        if self._body is None:
+            raise ValueError("not JSON")
+        return self._body
+
+
+def site(payload) -> int:
+    return int(payload["fields"]["summary"].split(" - ")[1][1:])
+
+
+class FakeBulkEndpoint:
+    """POST /issue/bulk keying each issue by its site number."""
+
+    def __init__(self):
+        self.chunks = []      # site numbers of each request
+        self.reject = set()   # sites reported as failed elements
+        self.response = None  # answer every request with this instead
+
+    def __call__(self, method, url, json=None, **kwargs):
+        assert (method, url) == ("POST", f"{BASE_URL}/issue/bulk")
+        updates = json["issueUpdates"]
+        self.chunks.append([site(payload) for payload in updates])
+        if self.response is not None:
+            return self.response
+        errors = [
+            {"status": 400, "failedElementNumber": position, "elementErrors": {"errors": {"summary": "rejected"}}}
+            for position, payload in enumerate(updates) if site(payload) in self.reject
+        ]
+        issues = [{"id": str(site(payload)), "key": f"NOC-{site(payload)}"} for payload in updates if site(payload) not in self.reject]
+        return FakeResponse(201, {"issues": issues, "errors": errors})
+
+
+@pytest.fixture
+def bulk(monkeypatch):
+    monkeypatch.setattr(jira_connect_tool, "_metadata_cache", _TTLCache(60, 1024))
+    monkeypatch.setattr(jira_connect_tool, "_resolve_account_id", lambda *args: None)
+    endpoint = FakeBulkEndpoint()
+    monkeypatch.setattr(jira_connect_tool, "_jira_request", endpoint)
+    return endpoint
+
+
+def create(records):
+    return _bulk_create_jira_issues(BASE_URL, {}, records, DEFAULTS, _priority_mapping(), "NOC", "Task", None)
+
+
+def records(count):
+    return [{"location": f"S{i}"} for i in range(count)]
+
+
+def test_records_are_sent_in_chunks_and_reported_in_order(bulk):
+    result = create(records(2 * JIRA_BULK_CHUNK_SIZE + 20))
+    assert sorted(len(chunk) for chunk in bulk.chunks) == [20, JIRA_BULK_CHUNK_SIZE, JIRA_BULK_CHUNK_SIZE]
+    assert (result["status"], result["created"], result["failed"]) == ("success", 120, 0)
+    assert [r["issue_key"] for r in result["results"]] == [f"NOC-{i}" for i in range(120)]
+
+
+def test_failed_elements_do_not_shift_the_created_keys(bulk):
+    bulk.reject = {1, 3}
+    result = create(records(5))
+    assert result["status"] == "partial" and (result["created"], result["failed"]) == (3, 2)
+    assert [r.get("issue_key") for r in result["results"]] == ["NOC-0", None, "NOC-2", None, "NOC-4"]
+    assert result["results"][1]["error"] == {"summary": "rejected"}
+
+
+def test_invalid_records_are_reported_without_being_sent(bulk):
+    result = create([{"location": "S0"}, {"location": "S1", "outage_type": ""}])
+    assert bulk.chunks == [[0]]
+    assert result["results"][1]["error"] == "severity_level and outage_type are required"
+
+
+def test_record_values_override_the_defaults(bulk, monkeypatch):
+    sent = []
+    send = jira_connect_tool._jira_request
+    monkeypatch.setattr(jira_connect_tool, "_jira_request", lambda method, url, json=None, **kw: sent.extend(json["issueUpdates"]) or send(method, url, json=json, **kw))
+    create([{"location": "S0", "severity_level": "CRITICAL", "outage_type": "fiber"}, {"location": "S1"}])
+    assert sent[0]["fields"]["labels"] == ["network-outage", "severity-critical", "type-fiber"]
+    assert sent[1]["fields"]["labels"] == ["network-outage", "severity-high", "type-power"]
+
+
+def test_rejected_request_reports_nothing_created(bulk):
+    bulk.response = FakeResponse(400, {"errors": [], "errorMessages": ["bad"]})
+    result = create(records(3))
+    assert result["status"] == "failed" and result["created"] == 0
+    assert all(r["error"].startswith("Not created (HTTP 400)") for r in result["results"])
+
+
+def test_server_error_without_json_may_have_created_issues(bulk):
+    bulk.response = FakeResponse(502, None, text="<html>Bad gateway</html>")
+    result = create(records(2))
+    assert result["status"] == "failed"
+    assert all(r["error"] == "HTTP 502, issues may have been created" for r in result["results"])
+
+
+def test_created_issues_are_remembered_for_close(bulk):
+    create(records(2))
+    assert jira_connect_tool._metadata_cache.get(("created_type", "NOC-1")) == "Task"
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+import jira_connect_tool
+from jira_connect_tool import _TTLCache, _priority_mapping, _resolve_account_id, invalidate_jira_metadata
+
+BASE_URL = "https://jira/rest/api/3"
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body=None):
+        self.status_code = status_code
+        self._body = body
+        self.text = str(body)
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def user_search(monkeypatch):
+    """Fake /user/search that knows one user; returns the list of queries sent."""
+    monkeypatch.setattr(jira_connect_tool, "_metadata_cache", _TTLCache(60, 16))
+    queries = []
+
+    def request(method, url, params=None, **kwargs):
+        queries.append(params["query"])
+        if params["query"] == "down@example.com":
+            return FakeResponse(503, {})
+        users = [{"accountId": "acc-1"}] if params["query"] == "noc@example.com" else []
+        return FakeResponse(200, users)
+
+    monkeypatch.setattr(jira_connect_tool, "_jira_request", request)
+    return queries
+
+
+def test_entries_expire_after_the_ttl():
+    cache = _TTLCache(0.05, 4)
+    cache.set(("account", "a"), "acc-1")
+    assert cache.get(("account", "a")) == "acc-1"
+    time.sleep(0.1)
+    assert cache.get(("account", "a")) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = _TTLCache(60, 2)
+    cache.set(("account", "a"), 1)
+    cache.set(("account", "b"), 2)
+    cache.get(("account", "a"))
+    cache.set(("account", "c"), 3)
+    assert cache.get(("account", "b")) is None
+    assert (cache.get(("account", "a")), cache.get(("account", "c"))) == (1, 3)
+
+
+def test_invalidate_drops_one_kind_or_everything():
+    cache = _TTLCache(60, 8)
+    cache.set(("account", "a"), 1)
+    cache.set(("transition", "NOC", "Task", "To Do"), {"id": "31"})
+    cache.invalidate("account")
+    assert cache.get(("account", "a")) is None
+    assert cache.get(("transition", "NOC", "Task", "To Do")) == {"id": "31"}
+    cache.invalidate()
+    assert cache.get(("transition", "NOC", "Task", "To Do")) is None
+
+
+def test_account_id_is_looked_up_once(user_search):
+    assert [_resolve_account_id(BASE_URL, {}, "noc@example.com") for _ in range(3)] == ["acc-1"] * 3
+    assert user_search == ["noc@example.com"]
+
+
+def test_unknown_assignee_is_cached_as_missing(user_search):
+    assert _resolve_account_id(BASE_URL, {}, "nobody@example.com") is None
+    assert _resolve_account_id(BASE_URL, {}, "nobody@example.com") is None
+    assert user_search == ["nobody@example.com"]
+
+
+def test_failed_lookup_is_not_cached(user_search):
+    assert _resolve_account_id(BASE_URL, {}, "down@example.com") is None
+    assert _resolve_account_id(BASE_URL, {}, "down@example.com") is None
+    assert user_search == ["down@example.com"] * 2
+
+
+def test_invalidation_forces_a_new_lookup(user_search):
+    _resolve_account_id(BASE_URL, {}, "noc@example.com")
+    invalidate_jira_metadata("account")
+    _resolve_account_id(BASE_URL, {}, "noc@example.com")
+    assert user_search == ["noc@example.com"] * 2
+
+
+def test_priority_mapping_is_read_once_per_ttl(monkeypatch):
+    monkeypatch.setattr(jira_connect_tool, "_metadata_cache", _TTLCache(60, 16))
+    monkeypatch.setenv("JIRA_PRIORITY_CRITICAL", "Blocker")
+    assert _priority_mapping()["CRITICAL"] == "Blocker"
+    monkeypatch.setenv("JIRA_PRIORITY_CRITICAL", "P1")
+    assert _priority_mapping()["CRITICAL"] == "Blocker"
+    invalidate_jira_metadata("priority")
+    assert _priority_mapping()["CRITICAL"] == "P1"
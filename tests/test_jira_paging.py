@@ -0,0 +1,60 @@
+import pytest
+
+import jira_connect_tool
+from jira_connect_tool import JiraAPIError, iter_jira_issues
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict = None):
+        self.status_code = status_code
+        self._body = body or {}
+        self.text = str(self._body)
+
+    def json(self):
+        return self._body
+
+
+def fake_jira(monkeypatch, total: int, clamp: int = None, short_pages: dict = None, fail_at: int = None):
+    """Serve issues 0..total-1, at most clamp per page; short_pages maps startAt to a smaller page size."""
+    requests = []
+
+    def request(method, url, params=None, **kwargs):
+        start, size = params["startAt"], params["maxResults"]
+        requests.append(start)
+        if start == fail_at:
+            return FakeResponse(500, {"errorMessages": ["boom"]})
+        size = min(size, clamp or size, (short_pages or {}).get(start, size))
+        issues = [{"key": f"NOC-{i}"} for i in range(start, min(start + size, total))]
+        return FakeResponse(200, {"issues": issues, "total": total, "startAt": start})
+
+    monkeypatch.setattr(jira_connect_tool, "_jira_request", request)
+    return requests
+
+
+def keys(issues) -> list:
+    return [int(issue["key"].split("-")[1]) for issue in issues]
+
+
+@pytest.mark.parametrize("total,page_size,limit", [(0, 10, None), (7, 10, None), (25, 10, None), (100, 7, None), (100, 10, 33)])
+def test_pages_in_order_without_gaps_or_duplicates(monkeypatch, total, page_size, limit):
+    fake_jira(monkeypatch, total)
+    expected = list(range(min(total, limit if limit is not None else total)))
+    assert keys(iter_jira_issues("https://jira/rest/api/3", {}, "project = NOC", page_size=page_size, limit=limit)) == expected
+
+
+def test_pages_by_the_size_jira_actually_returns(monkeypatch):
+    requests = fake_jira(monkeypatch, 120, clamp=50)
+    assert keys(iter_jira_issues("https://jira/rest/api/3", {}, "project = NOC", page_size=100)) == list(range(120))
+    assert sorted(requests) == [0, 50, 100]
+
+
+def test_short_page_gap_is_fetched(monkeypatch):
+    requests = fake_jira(monkeypatch, 40, short_pages={10: 4})
+    assert keys(iter_jira_issues("https://jira/rest/api/3", {}, "project = NOC", page_size=10)) == list(range(40))
+    assert 14 in requests
+
+
+def test_rejected_page_raises(monkeypatch):
+    fake_jira(monkeypatch, 40, fail_at=20)
+    with pytest.raises(JiraAPIError):
+        list(iter_jira_issues("https://jira/rest/api/3", {}, "project = NOC", page_size=10))
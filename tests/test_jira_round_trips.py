@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+
+import jira_connect_tool
+from jira_connect_tool import (
+    _TTLCache, _close_jira_issue, _create_jira_issue, _priority_mapping, _query_jira_issue, _update_jira_issue
+)
+
+BASE_URL = "https://jira/rest/api/3"
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body=None):
+        self.status_code = status_code
+        self._body = body or {}
+        self.text = str(body) if body else ""
+
+    def json(self):
+        return self._body
+
+
+class FakeJira:
+    """Issues of type Task start in "To Do"; "Done" (id 31) closes them."""
+
+    def __init__(self):
+        self.calls = []          # (method, path, params) of every request
+        self.transition_id = "31"
+        self.created = 0
+        self._lock = threading.Lock()
+
+    def paths(self) -> list:
+        return [f"{method} {path}" for method, path, _ in self.calls]
+
+    def __call__(self, method, url, params=None, json=None, **kwargs):
+        path = url[len(BASE_URL):]
+        with self._lock:
+            self.calls.append((method, path, params))
+        fields = {"summary": "Outage", "issuetype": {"name": "Task"}, "status": {"name": "To Do"}}
+        if method == "POST" and path == "/issue":
+            self.created += 1
+            return FakeResponse(201, {"key": f"NOC-{self.created}", "id": str(self.created)})
+        if method == "GET" and path.startswith("/issue/"):
+            body = {"key": path.split("/")[2], "fields": fields}
+            if params and params.get("expand") == "transitions":
+                body["transitions"] = [{"id": self.transition_id, "name": "Done", "to": {"name": "Done"}}]
+            return FakeResponse(200, body)
+        if method == "POST" and path.endswith("/transitions"):
+            ok = json["transition"]["id"] == self.transition_id
+            return FakeResponse(204) if ok else FakeResponse(400, {"errorMessages": ["transition not valid"]})
+        if method == "POST" and path.endswith("/comment"):
+            return FakeResponse(201, {"id": "1"})
+        return FakeResponse(404)
+
+
+@pytest.fixture
+def jira(monkeypatch):
+    monkeypatch.setattr(jira_connect_tool, "_metadata_cache", _TTLCache(60, 256))
+    monkeypatch.setattr(jira_connect_tool, "_resolve_account_id", lambda *args: None)
+    fake = FakeJira()
+    monkeypatch.setattr(jira_connect_tool, "_jira_request", fake)
+    return fake
+
+
+def create(jira):
+    return _create_jira_issue(BASE_URL, {}, "HIGH", "power", 3, None, None, "S002", _priority_mapping(), "NOC", "Task", None)["issue_key"]
+
+
+def test_cold_close_reads_state_and_transitions_in_one_request(jira):
+    result = _close_jira_issue(BASE_URL, {}, "NOC-7", "restored", confirm=False)
+    assert result["status"] == "Done"
+    assert jira.paths() == ["GET /issue/NOC-7", "POST /issue/NOC-7/transitions"]
+    assert jira.calls[0][2] == {"fields": "issuetype,status", "expand": "transitions"}
+
+
+def test_confirm_adds_one_summary_read(jira):
+    _close_jira_issue(BASE_URL, {}, "NOC-7", "restored", confirm=True)
+    assert jira.paths() == ["GET /issue/NOC-7", "POST /issue/NOC-7/transitions", "GET /issue/NOC-7"]
+
+
+def test_resolution_comment_rides_in_the_transition(jira, monkeypatch):
+    payloads = []
+    send = jira_connect_tool._jira_request
+    monkeypatch.setattr(jira_connect_tool, "_jira_request", lambda method, url, **kw: payloads.append(kw.get("json")) or send(method, url, **kw))
+    _close_jira_issue(BASE_URL, {}, "NOC-7", "replaced the UPS", confirm=False)
+    comment = payloads[-1]["update"]["comment"][0]["add"]["body"]
+    assert "replaced the UPS" in str(comment)
+    assert not any(path.endswith("/comment") for path in jira.paths())
+
+
+def test_queried_issue_closes_with_one_request(jira):
+    _close_jira_issue(BASE_URL, {}, "NOC-7", None, confirm=False)   # learns the Task/To Do transition
+    _query_jira_issue(BASE_URL, {}, "NOC-8")
+    jira.calls.clear()
+    _close_jira_issue(BASE_URL, {}, "NOC-8", None, confirm=False)
+    assert jira.paths() == ["POST /issue/NOC-8/transitions"]
+
+
+def test_issues_created_here_close_without_a_lookup_after_the_first(jira):
+    first = create(jira)
+    jira.calls.clear()
+    _close_jira_issue(BASE_URL, {}, first, None, confirm=False)
+    assert jira.paths() == [f"GET /issue/{first}", f"POST /issue/{first}/transitions"]
+
+    second = create(jira)
+    jira.calls.clear()
+    _close_jira_issue(BASE_URL, {}, second, None, confirm=False)
+    assert jira.paths() == [f"POST /issue/{second}/transitions"]
+
+
+def test_stale_cached_transition_is_looked_up_again(jira):
+    _close_jira_issue(BASE_URL, {}, "NOC-7", None, confirm=False)
+    _query_jira_issue(BASE_URL, {}, "NOC-8")
+    jira.transition_id = "41"   # the workflow changed
+    jira.calls.clear()
+    result = _close_jira_issue(BASE_URL, {}, "NOC-8", None, confirm=False)
+    assert result["status"] == "Done"
+    assert jira.paths() == ["POST /issue/NOC-8/transitions", "GET /issue/NOC-8", "POST /issue/NOC-8/transitions"]
+
+
+def test_update_reads_back_in_parallel_or_not_at_all(jira):
+    result = _update_jira_issue(BASE_URL, {}, "NOC-7", "crew on site", confirm=True)
+    assert result["status"] == "To Do" and result["summary"] == "Outage"
+    assert sorted(jira.paths()) == ["GET /issue/NOC-7", "POST /issue/NOC-7/comment"]
+    jira.calls.clear()
+    assert _update_jira_issue(BASE_URL, {}, "NOC-7", "crew on site", confirm=False)["status"] == "success"
+    assert jira.paths() == ["POST /issue/NOC-7/comment"]
@@ -0,0 +1,110 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import jira_connect_tool
+from jira_connect_tool import _JiraScheduler
+
+URL = "https://jira/rest/api/3/issue/NOC-1"
+
+
+class FakeSession:
+    """Answers with the queued (status, headers) pairs, or raises queued exceptions; records send times."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.sent.append(time.monotonic())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            answer = self.answers.pop(0) if self.answers else (200, {})
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if isinstance(answer, Exception):
+            raise answer
+        status, headers = answer
+        return SimpleNamespace(status_code=status, headers=headers, content=b"", request=SimpleNamespace(body=None))
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(jira_connect_tool, "JIRA_BACKOFF_BASE", 0.01)
+    fake = FakeSession()
+    monkeypatch.setattr(jira_connect_tool, "_get_session", lambda: fake)
+    return fake
+
+
+def test_retry_after_is_honoured(session):
+    session.answers = [(429, {"Retry-After": "0.3"}), (200, {})]
+    scheduler = _JiraScheduler(rate=100, burst=10, max_in_flight=4, max_retries=3)
+    assert scheduler.request("GET", URL).status_code == 200
+    assert session.sent[1] - session.sent[0] >= 0.3
+    stats = scheduler.stats()
+    assert (stats["throttled"], stats["retried"], stats["failed"]) == (1, 1, 0)
+
+
+def test_throttling_pauses_every_caller(session):
+    session.answers = [(503, {"Retry-After": "0.3"})]
+    session.delay = 0.05
+    scheduler = _JiraScheduler(rate=100, burst=10, max_in_flight=4, max_retries=3)
+    first = threading.Thread(target=scheduler.request, args=("GET", URL))
+    first.start()
+    time.sleep(0.1)   # the 503 has been answered and the pause set
+    started = time.monotonic()
+    scheduler.request("GET", URL)
+    assert time.monotonic() - started >= 0.2
+    first.join()
+
+
+def test_gives_up_after_max_retries(session):
+    session.answers = [(429, {"Retry-After": "0"})] * 3
+    scheduler = _JiraScheduler(rate=100, burst=10, max_in_flight=4, max_retries=2)
+    assert scheduler.request("GET", URL).status_code == 429
+    assert len(session.sent) == 3 and scheduler.stats()["failed"] == 1
+
+
+def test_connection_errors_are_retried_only_for_get(session):
+    session.answers = [requests.exceptions.ConnectionError("reset"), (200, {})]
+    scheduler = _JiraScheduler(rate=100, burst=10, max_in_flight=4, max_retries=2)
+    assert scheduler.request("GET", URL).status_code == 200
+
+    session.answers = [requests.exceptions.ConnectionError("reset"), (201, {})]
+    with pytest.raises(requests.exceptions.ConnectionError):
+        scheduler.request("POST", URL)
+    assert len(session.answers) == 1
+
+
+def test_token_bucket_limits_the_sustained_rate(session):
+    scheduler = _JiraScheduler(rate=20, burst=2, max_in_flight=8, max_retries=0)
+    for _ in range(6):
+        scheduler.request("GET", URL)
+    assert session.sent[-1] - session.sent[0] >= (6 - 2) / 20 * 0.9
+
+
+def test_in_flight_requests_are_bounded(session):
+    session.delay = 0.05
+    scheduler = _JiraScheduler(rate=1000, burst=100, max_in_flight=3, max_retries=0)
+    threads = [threading.Thread(target=scheduler.request, args=("GET", URL)) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert session.max_in_flight == 3
+    assert scheduler.stats()["queued"] > 0 and scheduler.stats()["in_flight"] == 0
+
+
+def test_retry_after_accepts_an_http_date():
+    response = SimpleNamespace(headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert 0 <= _JiraScheduler._retry_after(response) <= jira_connect_tool.JIRA_BACKOFF_BASE
+    assert _JiraScheduler._retry_after(SimpleNamespace(headers={"Retry-After": "soon"})) is None
@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import jira_connect_tool
+from jira_connect_tool import JIRA_POOL_BLOCK, JIRA_POOL_MAXSIZE, _get_session, _jira_request
+
+
+@pytest.fixture
+def fresh_session(monkeypatch):
+    monkeypatch.setattr(jira_connect_tool, "_session", None)
+    yield
+    if jira_connect_tool._session is not None:
+        jira_connect_tool._session.close()
+
+
+def test_one_session_is_shared_by_every_thread(fresh_session):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        sessions = set(map(id, pool.map(lambda _: _get_session(), range(32))))
+    assert len(sessions) == 1
+
+
+def test_session_pool_is_bounded(fresh_session):
+    adapter = _get_session().get_adapter("https://example.atlassian.net")
+    assert adapter._pool_maxsize == JIRA_POOL_MAXSIZE
+    assert adapter._pool_block == JIRA_POOL_BLOCK
+
+
+def test_sequential_calls_reuse_one_connection(fresh_session, http_server):
+    http_server.routes = {"/rest/api/3/myself": (200, {"Content-Type": "application/json"}, b"{}", 0)}
+    for _ in range(5):
+        assert _jira_request("GET", http_server.url("/rest/api/3/myself"), timeout=5).status_code == 200
+    assert len(http_server.clients) == 5
+    assert len(set(http_server.clients)) == 1
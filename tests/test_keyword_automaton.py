@@ -0,0 +1,50 @@
+import re
+
+import pytest
+
+from diagnose_incident_tool import ROOT_CAUSE_KEYWORDS, KeywordAutomaton
+
+
+def regex_matches(cause_keywords: dict, text: str) -> list:
+    """The same whole-word / prefix matching, one regular expression per keyword."""
+    matches = []
+    for cause_index, keywords in enumerate(cause_keywords.values()):
+        for keyword in keywords:
+            term = keyword.rstrip("*").lower()
+            tail = "" if keyword.endswith("*") else r"(?!\w)"
+            for match in re.finditer(rf"(?<!\w)(?={re.escape(term)}{tail})", text.lower()):
+                matches.append((cause_index, term, match.start()))
+    return sorted(matches)
+
+
+@pytest.mark.parametrize("text", [
+    "Fiber cut detected on backhaul link R03-R04",
+    "UPS battery low, generator failed to start after power loss",
+    "BGP neighbor down after config push; misconfigured ACL policy",
+    "powerful routing_table backhauls configs reconfigured",
+    "",
+    "no keywords here at all",
+])
+def test_scan_matches_regex(text):
+    automaton = KeywordAutomaton(ROOT_CAUSE_KEYWORDS)
+    assert sorted(automaton.scan(text)) == regex_matches(ROOT_CAUSE_KEYWORDS, text)
+
+
+def test_overlapping_keywords_all_match():
+    automaton = KeywordAutomaton({"A": ["link failure"], "B": ["failure"], "C": ["link"]})
+    assert sorted(automaton.scan("LINK FAILURE")) == [(0, "link failure", 0), (1, "failure", 5), (2, "link", 0)]
+
+
+def test_prefix_keyword_matches_longer_words_only_at_the_end():
+    automaton = KeywordAutomaton({"Configuration Error": ["config*"]})
+    assert automaton.scan("reconfig config configuration") == [(0, "config", 9), (0, "config", 16)]
+
+
+def test_classify_picks_highest_score_and_first_cause_on_ties():
+    automaton = KeywordAutomaton(ROOT_CAUSE_KEYWORDS)
+    root_cause, scores, keywords = automaton.classify("power outage: UPS on battery, BGP flapping")
+    assert root_cause == "Power Outage"
+    assert scores == {"Backhaul Failure": 0, "Power Outage": 3, "Configuration Error": 1}
+    assert keywords == ["battery", "bgp", "power", "ups"]
+    assert automaton.classify("backhaul and power")[0] == "Backhaul Failure"
+    assert automaton.classify("all quiet")[0] == "Unknown"
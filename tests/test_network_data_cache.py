@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+import network_data_tool
+from network_data_tool import get_network_dataset, query_network_data
+
+PAYLOAD = {
+    "sites": [
+        {"site_id": "S002", "region": "East", "node_type": "cell tower", "status": "down"},
+        {"site_id": "S005", "region": "West", "node_type": "cell tower", "status": "active"},
+    ],
+    "nodes": {
+        "R03": {"site": {"id": "S005"}, "region": "West", "type": "router", "state": "Degraded"},
+        "R04": {"name": "S002", "area": "East", "category": "router", "health": "down"},
+    },
+}
+
+
+class Endpoint:
+    """The /data route: serves the payload with an ETag, answers 304 when it matches, or fails."""
+
+    def __init__(self, server):
+        self.server = server
+        self.payload = PAYLOAD
+        self.version = 1
+        self.status = 200
+        self.delay = 0
+        server.routes["/data"] = self
+
+    def __call__(self, handler):
+        if self.status != 200:
+            return self.status, {}, b"unavailable", self.delay
+        etag = f'"v{self.version}"'
+        if handler.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b"", self.delay
+        return 200, {"ETag": etag, "Content-Type": "application/json"}, json.dumps(self.payload).encode(), self.delay
+
+    @property
+    def fetches(self) -> int:
+        return sum(1 for method, path, _ in self.server.requests if path == "/data")
+
+
+@pytest.fixture
+def endpoint(http_server, monkeypatch):
+    monkeypatch.setattr(network_data_tool, "NETWORK_DATA_URL", http_server.url("/data"))
+    monkeypatch.setattr(network_data_tool, "_session", requests.Session())
+    monkeypatch.setattr(network_data_tool, "_dataset", None)
+    monkeypatch.setattr(network_data_tool, "_failure", None)
+    return Endpoint(http_server)
+
+
+def test_fetches_once_and_serves_hits_within_the_ttl(endpoint):
+    first = get_network_dataset()
+    assert first.cache_status == "refreshed" and len(first.records) == 4
+    assert get_network_dataset() is first and first.cache_status == "hit"
+    assert endpoint.fetches == 1
+
+
+def test_revalidates_with_the_etag(endpoint):
+    first = get_network_dataset()
+    assert get_network_dataset(max_age=0) is first and first.cache_status == "revalidated"
+    assert endpoint.server.requests[-1][2]["If-None-Match"] == '"v1"'
+
+    endpoint.version = 2
+    endpoint.payload = {"sites": PAYLOAD["sites"][:1]}
+    second = get_network_dataset(max_age=0)
+    assert second is not first and second.etag == '"v2"' and len(second.records) == 1
+
+
+def test_serves_stale_data_and_backs_off_while_the_endpoint_fails(endpoint, monkeypatch):
+    first = get_network_dataset()
+    endpoint.status = 503
+    assert get_network_dataset(max_age=0) is first and first.cache_status == "stale"
+    assert get_network_dataset(max_age=0) is first
+    assert endpoint.fetches == 2   # the second stale answer did not try the endpoint
+
+    monkeypatch.setattr(network_data_tool, "NETWORK_DATA_RETRY_AFTER", 0)
+    endpoint.status = 200
+    assert get_network_dataset(max_age=0) is first and first.cache_status == "revalidated"
+    assert network_data_tool._failure is None
+
+
+def test_raises_without_data_to_serve_and_does_not_retry_during_backoff(endpoint):
+    endpoint.status = 500
+    with pytest.raises(requests.exceptions.HTTPError):
+        get_network_dataset()
+    with pytest.raises(requests.exceptions.HTTPError):
+        get_network_dataset()
+    assert endpoint.fetches == 1
+
+
+def test_one_caller_refreshes_while_the_others_get_the_current_copy(endpoint):
+    first = get_network_dataset()
+    endpoint.version, endpoint.delay = 2, 0.5
+    refreshed = []
+    refresher = threading.Thread(target=lambda: refreshed.append(get_network_dataset(max_age=0)))
+    refresher.start()
+    time.sleep(0.1)
+
+    started = time.perf_counter()
+    served = [get_network_dataset(max_age=0) for _ in range(5)]
+    assert time.perf_counter() - started < 0.3
+    assert all(dataset is first for dataset in served) and first.cache_status == "stale"
+
+    refresher.join()
+    assert refreshed[0].etag == '"v2"' and endpoint.fetches == 2
+    assert get_network_dataset() is refreshed[0]
+
+
+def test_query_filters_by_indexed_fields(endpoint):
+    result = json.loads(query_network_data.fn(site_id="s002"))
+    assert result["match_count"] == 2
+    assert {record["collection"] for record in result["records"]} == {"sites", "nodes"}
+
+    result = json.loads(query_network_data.fn(region="west", state="degraded"))
+    assert [record["id"] for record in result["records"]] == ["R03"]
+    assert result["summary"] == {"state": {"degraded": 1}, "region": {"west": 1}, "node_type": {"router": 1}, "records": 1}
+
+    assert json.loads(query_network_data.fn(node_type="router", limit=1))["match_count"] == 2
+    assert len(json.loads(query_network_data.fn(node_type="router", limit=1))["records"]) == 1
+    assert json.loads(query_network_data.fn(state="Missing"))["match_count"] == 0
+
+
+def test_query_without_filters_returns_the_summary_only(endpoint):
+    result = json.loads(query_network_data.fn())
+    assert "records" not in result
+    assert result["summary"]["state"] == {"down": 2, "active": 1, "degraded": 1}
+    assert result["dataset"]["records"] == 4
+
+
+def test_query_reports_an_unavailable_endpoint(endpoint):
+    endpoint.status = 502
+    result = json.loads(query_network_data.fn(site_id="S002"))
+    assert result["error"].startswith("Network data unavailable") and result["url"] == endpoint.server.url("/data")
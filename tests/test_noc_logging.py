@@ -0,0 +1,112 @@
+import json
+import logging
+import queue
+
+import pytest
+
+import noc_logging
+from noc_logging import EventLogger, JsonFormatter, _DroppingQueueHandler, get_logger
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.formatter = JsonFormatter()
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def lines(self) -> list:
+        return [json.loads(self.formatter.format(record)) for record in self.records]
+
+
+@pytest.fixture
+def log(request):
+    logger = logging.getLogger(f"test.{request.node.name}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    records = Records()
+    logger.addHandler(records)
+    yield EventLogger(logger), records
+    logger.removeHandler(records)
+
+
+def test_records_are_json_lines_with_event_and_fields(log):
+    logger, records = log
+    logger.info("jira.issue.created", issue_key="NOC-1", status=201, labels=["a", "b"])
+    [line] = records.lines()
+    assert set(line) == {"ts", "level", "logger", "event", "issue_key", "status", "labels"}
+    assert (line["level"], line["event"], line["issue_key"], line["status"], line["labels"]) == ("info", "jira.issue.created", "NOC-1", 201, ["a", "b"])
+    assert line["logger"].startswith("test.") and line["ts"].endswith("+00:00")
+
+
+def test_exception_is_attached(log):
+    logger, records = log
+    try:
+        raise ValueError("bad payload")
+    except ValueError:
+        logger.log(logging.ERROR, "jira.issue.failed", exc_info=True)
+    [line] = records.lines()
+    assert line["level"] == "error" and "ValueError: bad payload" in line["exception"]
+
+
+def test_lazy_fields_run_only_when_the_record_is_formatted(log):
+    logger, records = log
+    calls = []
+    logger.debug("jira.issue.payload", payload=lambda: calls.append("debug") or {})
+    logger.info("jira.issue.payload", payload=lambda: calls.append("info") or {"summary": "S002 down"})
+    assert calls == []
+    [line] = records.lines()
+    assert calls == ["info"] and line["payload"] == {"summary": "S002 down"}
+
+
+def test_failing_lazy_field_does_not_lose_the_record(log):
+    logger, records = log
+    logger.warning("smtp.send.retry", detail=lambda: 1 / 0, attempt=2)
+    [line] = records.lines()
+    assert line["detail"] == "<unavailable: division by zero>" and line["attempt"] == 2
+
+
+def test_long_fields_are_truncated(log, monkeypatch):
+    monkeypatch.setattr(noc_logging, "LOG_MAX_FIELD_CHARS", 10)
+    logger, records = log
+    logger.info("big", text="x" * 25, items=list(range(20)), small=[1])
+    [line] = records.lines()
+    assert line["text"] == "x" * 10 + "... [15 more chars]"
+    assert line["items"].startswith("[0, 1, 2,") and line["items"].endswith("more chars]")
+    assert line["small"] == [1]
+
+
+def test_sampled_events_are_dropped_but_errors_are_kept(log, monkeypatch):
+    monkeypatch.setattr(noc_logging, "LOG_SAMPLE_RATES", {"tool.call": 0.0, "jira.request": 0.25})
+    monkeypatch.setattr(noc_logging.random, "random", lambda: 0.1)
+    logger, records = log
+    logger.info("tool.call", tool="a")
+    logger.info("jira.request", url="u")
+    logger.error("tool.call", tool="b")
+    logger.info("smtp.sent")
+    lines = records.lines()
+    assert [(line["event"], line.get("sample_rate")) for line in lines] == [("jira.request", 0.25), ("tool.call", 0.0), ("smtp.sent", None)]
+
+    monkeypatch.setattr(noc_logging.random, "random", lambda: 0.3)
+    logger.info("jira.request", url="u")
+    assert len(records.records) == 3
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    records = queue.Queue(2)
+    handler = _DroppingQueueHandler(records)
+    for i in range(5):
+        handler.emit(logging.LogRecord("noc.test", logging.INFO, __file__, 1, f"event.{i}", None, None))
+    assert [records.get_nowait().getMessage() for _ in range(records.qsize())] == ["event.0", "event.1"]
+
+
+def test_get_logger_shares_the_noc_root():
+    logger = get_logger("diagnosis")
+    assert logger.logger.name == "noc.diagnosis"
+    root = logging.getLogger("noc")
+    assert root.propagate is False
+    assert sum(isinstance(handler, _DroppingQueueHandler) for handler in root.handlers) == 1
+    get_logger("jira")
+    assert sum(isinstance(handler, _DroppingQueueHandler) for handler in root.handlers) == 1
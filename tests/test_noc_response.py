@@ -0,0 +1,33 @@
+import json
+
+from noc_response import _field_tree, _project, format_response
+
+
+def test_field_tree_nests_paths_and_keeps_whole_values():
+    assert _field_tree(["a.b", "a.c", "d"]) == {"a": {"b": {}, "c": {}}, "d": {}}
+    assert _field_tree(["a", "a.b"]) == {"a": {}}
+    assert _field_tree(["", "..", "x..y"]) == {"x": {"y": {}}}
+
+
+def test_project_follows_lists_and_wildcards():
+    value = {
+        "records": [{"site_id": "S1", "state": "up", "extra": 1}, {"site_id": "S2"}],
+        "sites": {"S1": {"state": "up", "records": []}, "S2": {"state": "down"}},
+        "other": True
+    }
+    tree = _field_tree(["records.site_id", "records.state", "sites.*.state"])
+    assert _project(value, tree) == {
+        "records": [{"site_id": "S1", "state": "up"}, {"site_id": "S2"}],
+        "sites": {"S1": {"state": "up"}, "S2": {"state": "down"}}
+    }
+    assert _project(value, {}) is value
+    assert _project("scalar", {"a": {}}) == "scalar"
+
+
+def test_format_response_formats():
+    result = {"error": None, "count": 2, "items": [{"id": 1, "traceback": "t"}], "traceback": "t"}
+    assert json.loads(format_response(result, "full")) == result
+    assert json.loads(format_response(result, "compact")) == {"error": None, "count": 2, "items": [{"id": 1}]}
+    assert json.loads(format_response(result, "terse", terse_fields=("count",))) == {"count": 2}
+    assert json.loads(format_response(result, response_fields=["items.id"])) == {"error": None, "items": [{"id": 1}]}
+    assert format_response("not json") == "not json"
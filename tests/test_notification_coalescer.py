@@ -0,0 +1,105 @@
+import json
+import time
+
+import pytest
+
+import email_notification_tool
+from email_notification_tool import _NotificationCoalescer, _NotificationOutbox, send_outage_notification
+
+
+@pytest.fixture
+def mailbox(tmp_path, monkeypatch):
+    """(recipient, subject, body) of every email sent, through a private outbox and a fake SMTP."""
+    sent = []
+
+    def send(messages):
+        sent.extend((recipient, subject, body) for _, recipient, subject, body, _ in messages)
+        return [{"status": "success", "message_id": message[0]} for message in messages]
+
+    monkeypatch.setattr(email_notification_tool, "_send_messages", send)
+    outbox = _NotificationOutbox(str(tmp_path), 2)
+    monkeypatch.setattr(email_notification_tool, "_outbox", outbox)
+    yield sent
+    if outbox._pool is not None:
+        outbox._pool.shutdown(wait=True)
+    if outbox._lock_file is not None:
+        outbox._lock_file.close()
+
+
+def wait_for_mail(mailbox, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while len(mailbox) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return mailbox
+
+
+def add(coalescer, severity="HIGH", nodes=1, recipient="noc@example.com", incident="INC1"):
+    return coalescer.add(recipient, severity, "power", nodes, incident, False)
+
+
+def test_burst_is_merged_and_sent_once_at_the_deadline(mailbox):
+    coalescer = _NotificationCoalescer(0.3, 100)
+    results = [add(coalescer, nodes=n) for n in (1, 2, 3)]
+    assert [r["count"] for r in results] == [1, 2, 3]
+    assert len({r["message_id"] for r in results}) == 1
+    assert mailbox == []
+    wait_for_mail(mailbox, 1)
+    time.sleep(0.1)
+    assert len(mailbox) == 1
+    recipient, subject, body = mailbox[0]
+    assert subject.startswith("[DIGEST x3]") and "6 Affected" in subject
+    assert "MERGED NOTIFICATIONS (3)" in body
+
+
+def test_groups_are_split_by_incident_severity_and_recipient(mailbox):
+    coalescer = _NotificationCoalescer(60, 100)
+    ids = {
+        add(coalescer)["message_id"],
+        add(coalescer, severity="LOW")["message_id"],
+        add(coalescer, recipient="field@example.com")["message_id"],
+        add(coalescer, incident="INC2")["message_id"],
+        add(coalescer)["message_id"],
+    }
+    assert len(ids) == 4
+    assert sorted(key[1] for key in coalescer._digests) == ["HIGH", "HIGH", "HIGH", "LOW"]
+
+
+def test_critical_is_sent_at_once_with_the_open_digests_of_its_incident(mailbox, monkeypatch):
+    coalescer = _NotificationCoalescer(60, 100)
+    monkeypatch.setattr(email_notification_tool, "_coalescer", coalescer)
+    add(coalescer, severity="LOW", nodes=2)
+    add(coalescer, severity="HIGH", nodes=3)
+    add(coalescer, severity="HIGH", incident="INC2")
+    result = json.loads(send_outage_notification.fn(
+        "CRITICAL", "power", 10, recipient_email="noc@example.com", incident_number="INC1", coalesce=True, response_format="full"
+    ))
+    assert result["notification_status"] == "sent"
+    _, subject, body = mailbox[0]
+    assert "[CRITICAL]" in subject and "15 Affected" in subject
+    assert "MERGED NOTIFICATIONS (2)" in body
+    assert [key[0] for key in coalescer._digests] == ["INC2"]
+
+
+def test_oldest_digest_is_flushed_beyond_max_keys(mailbox):
+    coalescer = _NotificationCoalescer(60, 2)
+    for incident in ("INC1", "INC2", "INC3"):
+        add(coalescer, incident=incident)
+    wait_for_mail(mailbox, 1)
+    assert "INC1" in mailbox[0][1]
+    assert sorted(key[0] for key in coalescer._digests) == ["INC2", "INC3"]
+
+
+def test_open_digests_are_reopened_from_the_spool(mailbox, tmp_path, monkeypatch):
+    first = _NotificationCoalescer(60, 100)
+    message_id = add(first, nodes=4)["message_id"]
+    deadline = first._digests[("INC1", "HIGH", "noc@example.com")]["deadline"]
+
+    email_notification_tool._outbox._lock_file.close()   # the process exits
+    restarted = _NotificationOutbox(str(tmp_path), 2)
+    monkeypatch.setattr(email_notification_tool, "_outbox", restarted)
+    second = _NotificationCoalescer(60, 100)
+    assert second.status(message_id)["notifications_merged"] == 1
+    result = add(second, nodes=1)
+    assert (result["message_id"], result["count"]) == (message_id, 2)
+    assert second._digests[("INC1", "HIGH", "noc@example.com")]["deadline"] == deadline
+    restarted._lock_file.close()
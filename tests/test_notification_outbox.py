@@ -0,0 +1,126 @@
+import json
+import time
+
+import pytest
+
+import email_notification_tool
+from email_notification_tool import _NotificationOutbox
+
+
+@pytest.fixture
+def delivered(monkeypatch):
+    """Recipients handed to SMTP; a recipient starting with "bad" fails."""
+    sent = []
+
+    def send(messages):
+        results = []
+        for message_id, recipient, *_ in messages:
+            ok = not recipient.startswith("bad")
+            if ok:
+                sent.append(recipient)
+            results.append({"status": "success", "message_id": message_id} if ok else {"status": "error", "error": "refused"})
+        return results
+
+    monkeypatch.setattr(email_notification_tool, "_send_messages", send)
+    monkeypatch.setattr(email_notification_tool, "NOTIFICATION_RETRY_DELAY", 0)
+    return sent
+
+
+@pytest.fixture
+def outboxes(tmp_path):
+    """Factory of outboxes on one spool directory, each standing in for a separate process."""
+    created = []
+
+    def make():
+        outbox = _NotificationOutbox(str(tmp_path), 2)
+        created.append(outbox)
+        return outbox
+
+    yield make
+    for outbox in created:
+        if outbox._pool is not None:
+            outbox._pool.shutdown(wait=True)
+        if outbox._lock_file is not None:
+            outbox._lock_file.close()
+
+
+def wait_for(outbox, message_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = outbox.status(message_id)
+        if status and status["status"] in ("sent", "failed"):
+            return status
+        time.sleep(0.01)
+    pytest.fail(f"{message_id} not delivered")
+
+
+def spool_events(path) -> list:
+    with open(path, encoding="utf-8") as spool:
+        return [(entry["message_id"], entry["event"]) for entry in map(json.loads, spool)]
+
+
+def write_spool(path, *entries):
+    with open(path, "w", encoding="utf-8") as spool:
+        for entry in entries:
+            spool.write(json.dumps(entry) + "\n")
+
+
+def queued(message_id, recipient):
+    return {"message_id": message_id, "event": "queued", "recipient": recipient, "subject": "s", "body": "b", "queued_at": "2026-01-01T00:00:00"}
+
+
+def test_enqueue_returns_at_once_and_spools_the_outcome(outboxes, delivered):
+    outbox = outboxes()
+    message_id = outbox.enqueue("noc@example.com", "subject", "body")
+    assert wait_for(outbox, message_id)["status"] == "sent"
+    assert delivered == ["noc@example.com"]
+    assert spool_events(outbox.spool_path) == [(message_id, "queued"), (message_id, "sent")]
+
+
+def test_failed_delivery_is_retried_then_marked_failed(outboxes, delivered, monkeypatch):
+    monkeypatch.setattr(email_notification_tool, "NOTIFICATION_MAX_ATTEMPTS", 2)
+    outbox = outboxes()
+    status = wait_for(outbox, outbox.enqueue("bad@example.com", "subject", "body"))
+    assert (status["status"], status["attempts"], status["error"]) == ("failed", 2, "refused")
+
+
+def test_restart_replays_only_unfinished_messages(tmp_path, outboxes, delivered):
+    write_spool(
+        tmp_path / "spool-0.jsonl",
+        queued("m1", "a@example.com"), queued("m2", "b@example.com"),
+        {"message_id": "m2", "event": "sent", "status": "sent"}
+    )
+    with open(tmp_path / "spool-0.jsonl", "a", encoding="utf-8") as spool:
+        spool.write('{"message_id": "m3", "ev')   # torn line from a crash
+    outbox = outboxes()
+    assert wait_for(outbox, "m1")["status"] == "sent"
+    assert delivered == ["a@example.com"]
+
+
+def test_spool_of_a_dead_process_is_adopted(tmp_path, outboxes, delivered):
+    running = outboxes()
+    running.status("none")                      # takes spool-0
+    write_spool(tmp_path / "spool-5.jsonl", queued("orphan", "c@example.com"))
+    restarted = outboxes()
+    assert wait_for(restarted, "orphan")["status"] == "sent"
+    assert restarted.spool_path.endswith("spool-1.jsonl")
+    assert not (tmp_path / "spool-5.jsonl").exists()
+
+
+def test_spool_of_a_running_process_is_left_alone(outboxes, delivered):
+    running = outboxes()
+    running.hold({"message_id": "d1", "recipient": "noc@example.com", "entries": [1]})
+    other = outboxes()
+    assert other.held() == []
+    assert other.spool_path != running.spool_path
+    assert spool_events(running.spool_path) == [("d1", "digest")]
+
+
+def test_held_digests_survive_a_restart_until_released(tmp_path, outboxes, delivered):
+    first = outboxes()
+    first.hold({"message_id": "d1", "recipient": "noc@example.com", "entries": [1]})
+    first.hold({"message_id": "d2", "recipient": "noc@example.com", "entries": [2]})
+    first.release("d2")
+    first._lock_file.close()                    # the process exits
+    first._lock_file = None
+    assert [digest["message_id"] for digest in outboxes().held()] == ["d1"]
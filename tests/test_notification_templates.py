@@ -0,0 +1,59 @@
+import pytest
+
+from email_notification_tool import _compile_template, _generate_email_body, render_notifications
+
+
+def notification(severity="HIGH", **overrides):
+    return dict({"severity_level": severity, "outage_type": "fiber", "affected_nodes": 12500, "incident_number": "INC0001002", "include_details": True}, **overrides)
+
+
+@pytest.mark.parametrize("severity, actions", [
+    ("CRITICAL", "CRITICAL RESPONSE PROTOCOL"),
+    ("HIGH", "HIGH PRIORITY RESPONSE"),
+    ("MEDIUM", "STANDARD RESPONSE"),
+    ("LOW", "STANDARD RESPONSE"),
+])
+def test_body_carries_the_severity_response(severity, actions):
+    body = render_notifications([notification(severity)])[0]["plain"]
+    assert actions in body
+    assert f"Severity: {severity}" in body and "Affected: 12,500 customers/nodes" in body
+    assert "Outage Type: FIBER" in body and "A fiber outage" in body
+
+
+def test_details_and_missing_incident_number():
+    with_details = render_notifications([notification()])[0]["plain"]
+    assert "TECHNICAL DETAILS" in with_details and "ServiceNow Incident: INC0001002" in with_details
+    without = render_notifications([notification(include_details=False, incident_number=None)])[0]["plain"]
+    assert "TECHNICAL DETAILS" not in without and "Incident Number: Not assigned" in without
+    assert "$" not in with_details + without
+
+
+def test_templates_are_compiled_once_per_variant():
+    _compile_template.cache_clear()
+    severities = ["CRITICAL", "HIGH", "MEDIUM", "LOW"] * 50
+    render_notifications([notification(severity, include_details=(i // 4) % 2 == 0) for i, severity in enumerate(severities)], ("plain", "html"))
+    info = _compile_template.cache_info()
+    assert info.misses == 3 * 2 * 2   # responses x detail levels x formats
+    assert info.hits == len(severities) * 2 - info.misses
+
+
+def test_batch_shares_one_timestamp_and_personalizes_the_greeting():
+    bodies = render_notifications([notification(team="Field Ops"), notification(team=None)])
+    first, second = (body["plain"] for body in bodies)
+    assert first.startswith("Attention: Field Ops\n\n") and not second.startswith("Attention")
+    generated = [line for body in (first, second) for line in body.splitlines() if line.startswith("Generated at:")]
+    assert len(set(generated)) == 1
+
+
+def test_html_escapes_values_and_keeps_the_layout():
+    body = render_notifications([notification(team="<Ops & Field>")], ("plain", "html"))[0]
+    assert body["html"].startswith("<html><body><pre")
+    assert "Attention: &lt;Ops &amp; Field&gt;" in body["html"]
+    assert "Attention: <Ops & Field>" in body["plain"]
+
+
+def test_single_body_helper_matches_batch_rendering():
+    single = _generate_email_body("HIGH", "fiber", 12500, "INC0001002", True)
+    batch = render_notifications([notification()])[0]["plain"]
+    strip_time = lambda body: [line for line in body.splitlines() if "Time:" not in line and "Generated at:" not in line]
+    assert strip_time(single) == strip_time(batch)
@@ -0,0 +1,22 @@
+import pytest
+
+from check_server_status_tool import _probe
+
+
+@pytest.mark.parametrize("url,mode,error", [
+    ("https://example.com:99999/", "get", "invalid URL"),
+    ("https://example.com:port/", "head", "invalid URL"),
+    ("https://[::1/", "headers", "invalid URL"),
+    ("https:///path", "tcp", "invalid URL: no host name"),
+    ("http://example.com/", "tls", "tls mode needs an https:// URL"),
+    ("https://example.com/", "ping", "invalid mode 'ping'"),
+])
+def test_invalid_input_is_reported_without_connecting(url, mode, error):
+    result = _probe(url, mode)
+    assert result["error"].startswith(error)
+    assert result["state"] == "DOWN"
+    assert result["status_code"] is None and result["connect_ms"] is None
+
+
+def test_url_without_scheme_defaults_to_https():
+    assert _probe("example.com:99999", "tcp")["url"] == "https://example.com:99999"
@@ -0,0 +1,52 @@
+import time
+
+from check_server_status_tool import check_server_status_batch
+
+
+def sweep(urls, **kwargs) -> dict:
+    """URL -> table row of a batch sweep, plus the summary line under "summary"."""
+    lines = check_server_status_batch.fn(urls, **kwargs).splitlines()
+    rows = {line.split()[0]: line.split() for line in lines[1:-1]}
+    rows["summary"] = lines[-1]
+    return rows
+
+
+def test_sweep_reports_every_url_in_order(http_server):
+    http_server.routes = {"/ok": (200, {}, b"", 0), "/missing": (404, {}, b"", 0)}
+    urls = [http_server.url("/ok"), http_server.url("/missing"), "http://127.0.0.1:1/"]
+    result = sweep(urls, mode="headers")
+    assert list(result)[:-1] == urls
+    assert result[urls[0]][1] == "UP" and result[urls[0]][-1] == "200"
+    assert result[urls[1]][1] == "DOWN" and result[urls[1]][-1] == "404"
+    assert result[urls[2]][1] == "DOWN"
+    assert result["summary"] == "1/3 UP, 2 DOWN (mode: headers)"
+
+
+def test_probes_run_concurrently(http_server):
+    http_server.routes = {f"/{i}": (200, {}, b"", 0.4) for i in range(6)}
+    urls = [http_server.url(f"/{i}") for i in range(6)]
+    started = time.perf_counter()
+    assert sweep(urls)["summary"].startswith("6/6 UP")
+    assert time.perf_counter() - started < 1.5
+
+
+def test_max_workers_bounds_probes_in_flight(http_server):
+    http_server.routes = {f"/{i}": (200, {}, b"", 0.2) for i in range(4)}
+    urls = [http_server.url(f"/{i}") for i in range(4)]
+    started = time.perf_counter()
+    assert sweep(urls, max_workers=1)["summary"].startswith("4/4 UP")
+    assert time.perf_counter() - started >= 0.8
+
+
+def test_hosts_unfinished_at_the_deadline_are_reported_timed_out(http_server):
+    http_server.routes = {"/fast": (200, {}, b"", 0), "/slow": (200, {}, b"", 3)}
+    urls = [http_server.url("/fast"), http_server.url("/slow")]
+    started = time.perf_counter()
+    result = sweep(urls, deadline=1)
+    assert time.perf_counter() - started < 2.5
+    assert result[urls[0]][1] == "UP"
+    assert result[urls[1]][1] == "DOWN" and "sweep deadline 1s" in " ".join(result[urls[1]])
+
+
+def test_blank_input_is_rejected():
+    assert check_server_status_batch.fn(["", "  "]) == "No URLs supplied"
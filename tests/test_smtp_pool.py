@@ -0,0 +1,111 @@
+import smtplib
+
+import pytest
+
+import email_notification_tool
+from email_notification_tool import SMTP_POOL_SIZE, _send_email, _send_messages, _SMTPPool, send_outage_notification_batch
+
+
+class FakeSMTP:
+    """SMTP session that records what it is asked to do."""
+
+    sessions = []
+    refuse = set()          # recipients refused with 550
+    drop_after = None       # disconnect on the message after this many sent on one session
+    noop_code = 250
+
+    def __init__(self, host, port, timeout=None):
+        self.logged_in = False
+        self.sent = []
+        self.noops = 0
+        self.closed = False
+        FakeSMTP.sessions.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        self.logged_in = True
+
+    def sendmail(self, sender, recipient, message):
+        assert self.logged_in and not self.closed
+        if FakeSMTP.drop_after is not None and len(self.sent) >= FakeSMTP.drop_after:
+            self.closed = True
+            raise smtplib.SMTPServerDisconnected("connection dropped")
+        if recipient in FakeSMTP.refuse:
+            raise smtplib.SMTPRecipientsRefused({recipient: (550, b"no such user")})
+        self.sent.append(recipient)
+
+    def noop(self):
+        self.noops += 1
+        return (FakeSMTP.noop_code, b"OK")
+
+    def rset(self):
+        pass
+
+    def quit(self):
+        self.closed = True
+
+    close = quit
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    monkeypatch.setattr(FakeSMTP, "sessions", [])
+    monkeypatch.setattr(FakeSMTP, "refuse", set())
+    monkeypatch.setattr(email_notification_tool.smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(email_notification_tool, "_smtp_pool", _SMTPPool(SMTP_POOL_SIZE))
+    return FakeSMTP
+
+
+def messages(count):
+    return [(f"id-{i}", f"team{i}@example.com", "subject", "body", None) for i in range(count)]
+
+
+def test_sequential_sends_share_one_login(smtp):
+    for i in range(5):
+        assert _send_email(f"team{i}@example.com", "subject", "body")["status"] == "success"
+    assert len(smtp.sessions) == 1 and len(smtp.sessions[0].sent) == 5
+
+
+def test_batch_uses_at_most_the_pool_size_sessions(smtp):
+    recipients = [f"team{i}@example.com" for i in range(3 * SMTP_POOL_SIZE)]
+    for _ in range(2):
+        send_outage_notification_batch.fn(recipients, "HIGH", "power", 12, response_format="full")
+    assert len(smtp.sessions) <= SMTP_POOL_SIZE
+    assert sorted(r for session in smtp.sessions for r in session.sent) == sorted(recipients * 2)
+
+
+def test_idle_session_is_checked_and_replaced_when_dead(smtp, monkeypatch):
+    monkeypatch.setattr(email_notification_tool, "SMTP_NOOP_AFTER_IDLE", 0)
+    _send_messages(messages(1))
+    _send_messages(messages(1))
+    assert len(smtp.sessions) == 1 and smtp.sessions[0].noops == 1
+
+    monkeypatch.setattr(FakeSMTP, "noop_code", 421)
+    _send_messages(messages(1))
+    assert len(smtp.sessions) == 2 and smtp.sessions[0].closed
+
+
+def test_session_is_retired_after_max_messages(smtp, monkeypatch):
+    monkeypatch.setattr(email_notification_tool, "SMTP_MAX_MESSAGES_PER_SESSION", 2)
+    _send_messages(messages(2))
+    _send_messages(messages(1))
+    assert [len(session.sent) for session in smtp.sessions] == [2, 1]
+    assert smtp.sessions[0].closed
+
+
+def test_refused_recipient_does_not_stop_the_rest(smtp):
+    smtp.refuse.add("team1@example.com")
+    results = _send_messages(messages(3))
+    assert [r["status"] for r in results] == ["success", "error", "success"]
+    assert len(smtp.sessions) == 1
+
+
+def test_unsent_messages_are_retried_on_a_fresh_session_after_a_drop(smtp, monkeypatch):
+    monkeypatch.setattr(FakeSMTP, "drop_after", 2)
+    results = _send_messages(messages(4))
+    assert [r["status"] for r in results] == ["success"] * 4
+    assert [session.sent for session in smtp.sessions] == [
+        ["team0@example.com", "team1@example.com"], ["team2@example.com", "team3@example.com"]
+    ]
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from ibm_watsonx_orchestrate.agent_builder.tools import tool
+
+import noc_metrics
+from noc_metrics import MetricsRegistry, _is_error_result, export_metrics, instrument_tool, observe_call
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(noc_metrics, "registry", registry)
+    return registry
+
+
+def errors(registry, tool_name) -> int:
+    return registry._counters.get(("noc_tool_errors_total", (("tool", tool_name),)), 0)
+
+
+def histogram(registry, name, labels):
+    return registry._histograms.get((name, labels))
+
+
+@pytest.mark.parametrize("result, is_error", [
+    ('{"error":"Jira unreachable"}', True),
+    ('{\n  "error": "indented full format"\n}', True),
+    ('{"error":""}', False),
+    ('{"error":null,"issue_key":"NOC-1"}', False),
+    ('{"notification_status":"failed"}', True),
+    ('{"status":"error","detail":"x"}', True),
+    ('{"status":"failed"}', True),
+    ('{"status":"sent"}', False),
+    ('{"incidents":[{"status":"failed"}]}', False),
+    ('[{"error":"in a list"}]', False),
+    ('Site S002 error budget failed', False),
+    ('"error"', False),
+])
+def test_is_error_result(result, is_error):
+    assert _is_error_result(result) is is_error
+
+
+def test_counts_errors_durations_and_response_sizes(registry):
+    @instrument_tool(name="lookup")
+    def lookup(key):
+        return json.dumps({"error": "not found"} if key == "missing" else {"key": key})
+
+    assert lookup("S002") == '{"key": "S002"}'
+    lookup("missing")
+    labels = (("tool", "lookup"),)
+    assert errors(registry, "lookup") == 1
+    assert histogram(registry, "noc_tool_duration_seconds", labels).count == 2
+    sizes = histogram(registry, "noc_tool_response_bytes", labels)
+    assert (sizes.count, sizes.sum) == (2, len('{"key": "S002"}') + len('{"error": "not found"}'))
+
+
+def test_raising_call_is_counted_and_reraised(registry):
+    @instrument_tool
+    def broken():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        broken()
+    assert errors(registry, "broken") == 1
+    assert histogram(registry, "noc_tool_duration_seconds", (("tool", "broken"),)).count == 1
+    assert histogram(registry, "noc_tool_response_bytes", (("tool", "broken"),)) is None
+
+
+@instrument_tool
+@tool(name="echo_status")
+def echo_status(status: str) -> str:
+    """
+    Returns the given notification status.
+
+    Args:
+        status: Status to return
+
+    Returns:
+        JSON string with the status
+    """
+    return json.dumps({"notification_status": status})
+
+
+def test_wraps_adk_tools_without_changing_their_spec(registry):
+    assert echo_status.__tool_spec__.name == "echo_status"
+    assert list(echo_status.__tool_spec__.input_schema.properties) == ["status"]
+    echo_status.fn("queued")
+    echo_status.fn("failed")
+    assert errors(registry, "echo_status") == 1
+    assert histogram(registry, "noc_tool_duration_seconds", (("tool", "echo_status"),)).count == 2
+
+
+def test_outbound_calls_and_prometheus_export(registry, tmp_path):
+    with observe_call("jira", "POST /issue") as call:
+        call.sent_bytes, call.received_bytes = 300, 2000
+    with pytest.raises(TimeoutError):
+        with observe_call("jira", "POST /issue"):
+            raise TimeoutError
+
+    text = open(export_metrics(str(tmp_path / "noc.prom")), encoding="utf-8").read()
+    labels = '{system="jira",operation="POST /issue"}'
+    assert f"noc_outbound_errors_total{labels} 1" in text
+    assert f"noc_outbound_duration_seconds_count{labels} 2" in text
+    assert f"noc_outbound_sent_bytes_sum{labels} 300.000000" in text
+    assert f'noc_outbound_received_bytes_bucket{{system="jira",operation="POST /issue",le="1024"}} 0' in text
+    assert f'noc_outbound_received_bytes_bucket{{system="jira",operation="POST /issue",le="4096"}} 1' in text
+    assert text.count("# TYPE noc_outbound_duration_seconds histogram") == 1
@@ -0,0 +1,84 @@
+from collections import defaultdict, deque
+import random
+
+import pytest
+
+from network_topology_tool import TopologyGraph
+
+
+def bfs_cut(graph: TopologyGraph, links: list, roots: list, failed_links: list, failed_nodes: list) -> set:
+    """Nodes no longer reachable from a root (or from the assumed root of an unrooted part)."""
+    failed = {frozenset(link) for link in failed_links}
+    adjacency = defaultdict(list)
+    for a, b in links:
+        if a != b and frozenset((a, b)) not in failed:
+            adjacency[a].append(b)
+            adjacency[b].append(a)
+    starts = list(roots) + [graph.node_ids[node] for node in range(1, len(graph.node_ids)) if graph.component[node] == node]
+    starts = [node for node in starts if node not in failed_nodes]
+    reached, queue = set(starts), deque(starts)
+    while queue:
+        node = queue.popleft()
+        for neighbor in adjacency[node]:
+            if neighbor not in reached and neighbor not in failed_nodes:
+                reached.add(neighbor)
+                queue.append(neighbor)
+    return set(graph.node_ids[1:]) - reached
+
+
+def random_network(seed: int):
+    rng = random.Random(seed)
+    nodes = [f"R{i:02d}" for i in range(rng.randint(2, 30))]
+    links = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(rng.randint(1, 2 * len(nodes)))]
+    roots = rng.sample(nodes, rng.randint(0, 2))
+    return nodes, links, roots, rng
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_blast_radius_matches_bfs(seed):
+    nodes, links, roots, rng = random_network(seed)
+    graph = TopologyGraph(nodes, links, roots, sites=set(nodes))
+    for _ in range(5):
+        failed_links = [list(rng.choice(links)) for _ in range(rng.randint(0, 2))]
+        failed_nodes = rng.sample(nodes, rng.randint(0 if failed_links else 1, 1))
+        result = graph.blast_radius(links=failed_links, nodes=failed_nodes)
+        expected = bfs_cut(graph, links, roots, failed_links, failed_nodes)
+        assert set(result["affected_sites"]) == expected
+        assert result["affected_site_count"] == result["affected_nodes"] == len(expected)
+
+
+def test_weights_and_node_types_are_summed():
+    graph = TopologyGraph(
+        ["HUB", "R1", "R2", "S1", "S2"],
+        [("HUB", "R1"), ("R1", "R2"), ("R2", "S1"), ("R2", "S2")],
+        roots=["HUB"],
+        weights={"S1": 40, "S2": 60},
+        node_types={"HUB": "hub", "R1": "router", "R2": "router", "S1": "site", "S2": "site"},
+        sites={"S1", "S2"}
+    )
+    result = graph.blast_radius(links=[["R1", "R2"]])
+    assert result["method"] == "euler_interval"
+    assert sorted(result["affected_sites"]) == ["S1", "S2"]
+    assert result["affected_nodes"] == 101
+    assert result["by_node_type"] == {"router": 1, "site": 2}
+    assert "ambiguous" not in result
+
+
+def test_redundant_and_parallel_links_cut_nothing():
+    graph = TopologyGraph(["C", "A", "B"], [("C", "A"), ("A", "B"), ("B", "C"), ("C", "A")], roots=["C"], sites={"A", "B"})
+    assert graph.blast_radius(links=[["A", "B"]])["affected_site_count"] == 0
+    assert graph.blast_radius(links=[["C", "A"]])["method"] == "search"
+    assert graph.blast_radius(links=[["C", "A"]])["affected_site_count"] == 0
+
+
+def test_unrooted_part_is_rooted_at_highest_degree_node_and_flagged():
+    nodes = ["S1", "R1", "R2", "S2", "S3"]
+    links = [("R1", "R2"), ("R1", "S1"), ("R2", "S2"), ("R2", "S3")]
+    result = TopologyGraph(nodes, links, sites={"S1", "S2", "S3"}).blast_radius(links=[["R1", "R2"]])
+    assert result["ambiguous"] is True
+    assert result["assumed_roots"] == ["R2"]
+    assert result["affected_sites"] == ["S1"]
+    assert sorted(result["other_side"]["affected_sites"]) == ["S2", "S3"]
+    # Record order does not change the root
+    reordered = TopologyGraph(list(reversed(nodes)), list(reversed(links)), sites={"S1", "S2", "S3"})
+    assert reordered.blast_radius(links=[["R1", "R2"]])["assumed_roots"] == ["R2"]
@@ -1,24 +1,481 @@
 from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+import http.client
 import requests
+import socket
+import ssl
+import threading
+import time
 
+from noc_metrics import instrument_tool, record_call
+
+# Probe configuration
+PROBE_TIMEOUT = 5          # seconds per probe phase (connect, TLS, response)
+BATCH_MAX_WORKERS = 512    # upper bound on concurrent probes in a batch sweep
+BATCH_DEADLINE = PROBE_TIMEOUT + 2  # seconds for a whole sweep; unfinished hosts are reported as timed out
+USER_AGENT = "dish-noc-server-check/1.0"
+
+# Probe modes, cheapest last:
+#   get     - full GET through requests, body downloaded (original behaviour: follows
+#             redirects, honours HTTP(S)_PROXY, verifies against certifi); only
+#             ttfb_ms and latency_ms are reported, dns_ms, connect_ms and tls_ms
+#             stay null because requests does not expose those phases
+#   The cheaper modes drive the socket directly, so they connect straight to the host
+#   (no proxy), do not follow redirects and verify TLS against the system CA store.
+#   head    - HEAD request, no body
+#   headers - GET that stops as soon as the status line and headers arrive
+#   tls     - TCP connect + TLS handshake only, no HTTP exchange
+#   tcp     - TCP connect only
+PROBE_MODES = ("get", "head", "headers", "tls", "tcp")
+
+# Background monitor configuration
+MONITOR_MODE = "headers"        # default probe mode of monitored targets
+MONITOR_HISTORY_SIZE = 720      # samples kept per target (fixed-size ring buffer)
+MONITOR_MAX_TARGETS = 500       # registered targets; bounds total monitor memory
+MONITOR_MIN_INTERVAL = 5        # seconds between probes while a target is flapping
+MONITOR_MAX_INTERVAL = 45       # seconds between probes while a target is stable; keep below MONITOR_CACHE_MAX_AGE
+MONITOR_FLAP_WINDOW = 6         # recent samples inspected for state changes
+MONITOR_CACHE_MAX_AGE = 60      # seconds a monitor sample may answer check_server_status
+MONITOR_WORKERS = 64            # concurrent monitor probes
+
+
+@instrument_tool
 @tool(
     name="check_server_status",
-    description="Checks whether a given server (HTTP/HTTPS endpoint) is up or down by sending an HTTP GET request.",
+    description="Checks whether a given server (HTTP/HTTPS endpoint) is up or down. Supports low-cost probe modes (get, head, headers, tls, tcp) and reports a DNS/connect/TLS/first-byte latency breakdown.",
     permission=ToolPermission.ADMIN
 )
-def check_server_status(url: str) -> str:
+def check_server_status(url: str, mode: str = "get", max_age: int = MONITOR_CACHE_MAX_AGE) -> str:
     """
     Takes a server address (URL) and returns whether the HTTP service is reachable.
     Returns 'UP' for status codes < 400, otherwise 'DOWN'.
+
+    If the URL is registered with the background monitor and its latest sample is
+    younger than max_age seconds, the answer comes from memory instead of a new probe.
+
+    Args:
+        url: Server address (URL or host name)
+        mode: Probe mode - get (full GET; reports only time to headers and total), head, headers (GET without body), tls (handshake only) or tcp (connect only); the socket-level modes also report DNS, connect and TLS times
+        max_age: Maximum age in seconds of a monitor sample to answer from (0 forces a live probe)
     """
+    result = get_server_status(url, mode, max_age)
+    source = f", monitored {result['age_s']}s ago" if "age_s" in result else ""
+    if result["error"]:
+        return f"{result['url']} is DOWN (error: {result['error']}; {_format_timings(result)}{source})"
+    if result["status_code"] is not None:
+        return f"{result['url']} is {result['state']} (status code {result['status_code']}, {result['mode']}; {_format_timings(result)}{source})"
+    return f"{result['url']} is {result['state']} ({result['mode']} handshake ok; {_format_timings(result)}{source})"
+
+
+@instrument_tool
+@tool(
+    name="check_server_status_batch",
+    description="Checks many servers (HTTP/HTTPS endpoints) concurrently and returns one compact UP/DOWN/latency table. Use for outage sweeps across many hosts.",
+    permission=ToolPermission.ADMIN
+)
+def check_server_status_batch(urls: List[str], max_workers: int = 0, mode: str = "headers", deadline: int = BATCH_DEADLINE) -> str:
+    """
+    Probes a list of server addresses concurrently with a bounded worker pool.
+
+    Args:
+        urls: List of server addresses (URLs or host names)
+        max_workers: Maximum number of probes in flight at once; 0 probes every URL at once (capped at BATCH_MAX_WORKERS)
+        mode: Probe mode - get, head, headers, tls or tcp (defaults to headers, which skips the body)
+        deadline: Seconds for the whole sweep; hosts still being probed then are reported DOWN as timed out
+
+    Returns:
+        A table with one line per URL (STATE, DNS/connect/TLS/first-byte/total latency
+        in ms, status code or error) followed by an UP/DOWN summary line.
+    """
+    targets = [u.strip() for u in urls or [] if u and u.strip()]
+    if not targets:
+        return "No URLs supplied"
+
+    workers = max(1, min(int(max_workers or len(targets)), BATCH_MAX_WORKERS, len(targets)))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="server-check")
+    futures = [pool.submit(_probe, target, mode) for target in targets]
+    wait(futures, timeout=max(deadline, 1))
+    pool.shutdown(wait=False, cancel_futures=True)
+    results = [
+        future.result() if future.done() and not future.cancelled() else _timed_out(target, mode, deadline)
+        for target, future in zip(targets, futures)
+    ]
+
+    width = max(len(r["url"]) for r in results)
+    lines = [f"{'URL'.ljust(width)}  STATE    DNS   CONN    TLS   TTFB  TOTAL  DETAIL"]
+    for r in results:
+        timings = "  ".join(_ms(r[key]).rjust(5) for key in ("dns_ms", "connect_ms", "tls_ms", "ttfb_ms", "latency_ms"))
+        detail = r["error"] or (r["status_code"] if r["status_code"] is not None else f"{r['mode']} ok")
+        lines.append(f"{r['url'].ljust(width)}  {r['state'].ljust(5)}  {timings}  {detail}")
+
+    up = sum(1 for r in results if r["state"] == "UP")
+    lines.append(f"{up}/{len(results)} UP, {len(results) - up} DOWN (mode: {results[0]['mode']})")
+    return "\n".join(lines)
+
+
+@instrument_tool
+@tool(
+    name="manage_server_monitor",
+    description="Registers servers with the background health monitor, removes them, lists them, or reports uptime percentage and p50/p95 latency from the monitor's in-memory history.",
+    permission=ToolPermission.ADMIN
+)
+def manage_server_monitor(action: str, urls: List[str] = None, window_minutes: int = 15, mode: str = MONITOR_MODE) -> str:
+    """
+    Manage the background server health monitor.
+
+    Args:
+        action: Action to perform (register, unregister, list, report)
+        urls: Server addresses to register, unregister or report on (report defaults to all targets)
+        window_minutes: Look-back window in minutes for the report action
+        mode: Probe mode the registered targets are monitored with; check_server_status only answers from the monitor for the same mode
+
+    Returns:
+        A short confirmation line, or for report a table of STATE, uptime %, p50/p95
+        latency, sample count and current probe interval per target.
+    """
+    action = (action or "").lower()
+    targets = [u.strip() for u in urls or [] if u and u.strip()]
+
+    if action == "register":
+        if not targets:
+            return "No URLs supplied"
+        if (mode or "").lower() not in PROBE_MODES:
+            return f"Invalid mode: {mode}. Valid modes: {', '.join(PROBE_MODES)}"
+        added = [u for u in targets if _monitor.register(u, mode)]
+        rejected = len(targets) - len(added)
+        line = f"Monitoring {len(added)} target(s), {len(_monitor.targets())} total"
+        return line + (f"; {rejected} rejected (limit {MONITOR_MAX_TARGETS} targets)" if rejected else "")
+    if action == "unregister":
+        removed = sum(1 for u in targets if _monitor.unregister(u))
+        return f"Stopped monitoring {removed} target(s), {len(_monitor.targets())} remaining"
+    if action == "list":
+        return "\n".join(_monitor.targets()) or "No targets registered"
+    if action == "report":
+        reports = [_monitor.report(u, window_minutes) for u in (targets or _monitor.targets())]
+        reports = [r for r in reports if r]
+        if not reports:
+            return "No monitor data for the requested targets"
+        width = max(len(r["url"]) for r in reports)
+        lines = [f"{'URL'.ljust(width)}  STATE  UPTIME    P50    P95  SAMPLES  INTERVAL"]
+        for r in reports:
+            uptime = f"{r['uptime_pct']}%" if r["uptime_pct"] is not None else "-"
+            lines.append(
+                f"{r['url'].ljust(width)}  {r['state'].ljust(5)}  {uptime.rjust(6)}  {_ms(r['p50_ms']).rjust(5)}  "
+                f"{_ms(r['p95_ms']).rjust(5)}  {str(r['samples']).rjust(7)}  {str(r['interval_s']).rjust(7)}s"
+            )
+        lines.append(f"Window: last {window_minutes} minute(s)")
+        return "\n".join(lines)
+    return f"Invalid action: {action}. Valid actions: register, unregister, list, report"
+
+
+def _timed_out(url: str, mode: str, deadline: float) -> dict:
+    result = _empty_result(_normalize_url(url), (mode or "get").lower())
+    result["error"] = f"timed out (sweep deadline {deadline}s)"
+    return result
+
+
+def get_server_status(url: str, mode: str = "get", max_age: int = MONITOR_CACHE_MAX_AGE) -> dict:
+    """Probe result dict for url, taken from the monitor when a sample younger than max_age exists."""
+    cached = _monitor.latest(url, max_age, mode) if max_age and max_age > 0 else None
+    return cached or _probe(url, mode)
+
+
+def _normalize_url(url: str) -> str:
+    """Default to HTTPS if no scheme is included."""
+    url = url.strip()
     if not url.startswith("http"):
-        url = "https://" + url  # Default to HTTPS if not included
+        url = "https://" + url
+    return url
+
+
+def _ms(value) -> str:
+    return "-" if value is None else str(value)
+
+
+def _format_timings(result: dict) -> str:
+    """Render the latency breakdown, skipping phases that did not run."""
+    parts = [
+        f"{label} {result[key]}ms"
+        for label, key in (("dns", "dns_ms"), ("connect", "connect_ms"), ("tls", "tls_ms"), ("ttfb", "ttfb_ms"), ("total", "latency_ms"))
+        if result[key] is not None
+    ]
+    return ", ".join(parts) or "no timing"
+
+
+def _empty_result(url: str, mode: str) -> dict:
+    """Probe result with every field present, reporting DOWN until the probe succeeds."""
+    return {
+        "url": url,
+        "mode": mode,
+        "state": "DOWN",
+        "status_code": None,
+        "dns_ms": None,
+        "connect_ms": None,
+        "tls_ms": None,
+        "ttfb_ms": None,
+        "latency_ms": None,
+        "error": None
+    }
+
+
+def _probe(url: str, mode: str = "get") -> dict:
+    """
+    Probe a single URL and return its state, status code or error, and a latency
+    breakdown (dns_ms, connect_ms, tls_ms, ttfb_ms, latency_ms).
+
+    The probe drives the socket itself so each phase can be timed and so the cheaper
+    modes never read more than the status line and headers.
+    """
+    url = _normalize_url(url)
+    mode = (mode or "get").lower()
+    result = _empty_result(url, mode)
+    if mode not in PROBE_MODES:
+        result["error"] = f"invalid mode '{mode}', valid modes: {', '.join(PROBE_MODES)}"
+        return result
 
     try:
-        response = requests.get(url, timeout=5)
-        if response.status_code < 400:
-            return f"{url} is UP (status code {response.status_code})"
+        parts = urlsplit(url)
+        host = parts.hostname
+        port = parts.port
+    except ValueError as e:
+        result["error"] = f"invalid URL: {e}"
+        return result
+    if not host:
+        result["error"] = "invalid URL: no host name"
+        return result
+    use_tls = parts.scheme == "https"
+    if mode == "tls" and not use_tls:
+        result["error"] = "tls mode needs an https:// URL"
+        return result
+    port = port or (443 if use_tls else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    started = time.perf_counter()
+    mark = started
+    sock = None
+
+    def lap() -> int:
+        nonlocal mark
+        now = time.perf_counter()
+        elapsed, mark = round((now - mark) * 1000), now
+        return elapsed
+
+    try:
+        if mode == "get":
+            response = _session.get(url, timeout=PROBE_TIMEOUT)
+            result["ttfb_ms"] = round(response.elapsed.total_seconds() * 1000)
+            result["status_code"] = response.status_code
+            result["state"] = "UP" if response.status_code < 400 else "DOWN"
+            return result
+
+        addresses = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        result["dns_ms"] = lap()
+
+        last_error = None
+        for family, socktype, proto, _, address in addresses:
+            try:
+                sock = socket.socket(family, socktype, proto)
+                sock.settimeout(PROBE_TIMEOUT)
+                sock.connect(address)
+                break
+            except OSError as e:
+                last_error = e
+                sock.close()
+                sock = None
+        if sock is None:
+            raise last_error or OSError("no address to connect to")
+        result["connect_ms"] = lap()
+
+        if use_tls and mode != "tcp":
+            context = ssl.create_default_context()
+            sock = context.wrap_socket(sock, server_hostname=host)
+            result["tls_ms"] = lap()
+
+        if mode in ("tcp", "tls"):
+            result["state"] = "UP"
+            return result
+
+        if use_tls:
+            conn = http.client.HTTPSConnection(host, port, timeout=PROBE_TIMEOUT)
         else:
-            return f"{url} is DOWN (status code {response.status_code})"
-    except requests.exceptions.RequestException as e:
-        return f"{url} is DOWN (error: {e})"
+            conn = http.client.HTTPConnection(host, port, timeout=PROBE_TIMEOUT)
+        conn.sock = sock
+        conn.request("HEAD" if mode == "head" else "GET", path, headers={"User-Agent": USER_AGENT, "Connection": "close"})
+        response = conn.getresponse()
+        result["ttfb_ms"] = lap()
+        response.close()
+
+        result["status_code"] = response.status
+        result["state"] = "UP" if response.status < 400 else "DOWN"
+        return result
+
+    except socket.gaierror as e:
+        result["error"] = f"DNS resolution failed: {e}"
+        return result
+    except (OSError, http.client.HTTPException, requests.exceptions.RequestException) as e:
+        result["error"] = str(e) or type(e).__name__
+        return result
+    finally:
+        if sock is not None:
+            sock.close()
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000)
+        record_call("probe", mode, time.perf_counter() - started, error=result["state"] != "UP")
+
+
+_session = requests.Session()
+_session.headers["User-Agent"] = USER_AGENT
+_session.mount("https://", HTTPAdapter(pool_connections=BATCH_MAX_WORKERS, pool_maxsize=4))
+_session.mount("http://", HTTPAdapter(pool_connections=BATCH_MAX_WORKERS, pool_maxsize=4))
+
+
+class _MonitoredTarget:
+    """Schedule and bounded sample history for one monitored URL."""
+
+    __slots__ = ("url", "mode", "interval", "next_due", "history", "last_result", "last_sampled")
+
+    def __init__(self, url: str, mode: str = MONITOR_MODE):
+        self.url = url
+        self.mode = mode
+        self.interval = MONITOR_MIN_INTERVAL
+        self.next_due = time.monotonic()
+        # Ring buffer of (monotonic timestamp, is_up, latency_ms); oldest samples fall off.
+        self.history = deque(maxlen=MONITOR_HISTORY_SIZE)
+        self.last_result = None
+        self.last_sampled = None
+
+
+class HealthMonitor:
+    """
+    Background prober for a registered set of URLs.
+
+    A single scheduler thread hands due targets to a bounded probe pool. After each
+    sample the target's interval adapts: it drops to MONITOR_MIN_INTERVAL while the
+    target's state keeps changing and doubles up to MONITOR_MAX_INTERVAL while it is
+    stable. Memory is bounded by MONITOR_MAX_TARGETS x MONITOR_HISTORY_SIZE samples.
+    """
+
+    def __init__(self):
+        self._targets = {}
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pool = None
+
+    def register(self, url: str, mode: str = MONITOR_MODE) -> bool:
+        url = _normalize_url(url)
+        mode = (mode or MONITOR_MODE).lower()
+        with self._lock:
+            target = self._targets.get(url)
+            if target is None:
+                if len(self._targets) >= MONITOR_MAX_TARGETS:
+                    return False
+                self._targets[url] = _MonitoredTarget(url, mode)
+            elif target.mode != mode:
+                target.mode = mode
+                target.last_result = None
+                target.interval = MONITOR_MIN_INTERVAL
+                target.next_due = time.monotonic()
+            self._ensure_running()
+        self._wakeup.set()
+        return True
+
+    def unregister(self, url: str) -> bool:
+        with self._lock:
+            return self._targets.pop(_normalize_url(url), None) is not None
+
+    def targets(self) -> List[str]:
+        with self._lock:
+            return list(self._targets)
+
+    def latest(self, url: str, max_age: float, mode: str):
+        """Return the most recent probe result if it was taken in mode and is younger than max_age seconds."""
+        with self._lock:
+            target = self._targets.get(_normalize_url(url))
+            if target is None or target.last_result is None or target.last_result["mode"] != (mode or "get").lower():
+                return None
+            age = time.monotonic() - target.last_sampled
+            if age > max_age:
+                return None
+            return dict(target.last_result, age_s=round(age))
+
+    def report(self, url: str, window_minutes: float):
+        """Uptime percentage and p50/p95 latency over the last window_minutes."""
+        with self._lock:
+            target = self._targets.get(_normalize_url(url))
+            if target is None:
+                return None
+            cutoff = time.monotonic() - window_minutes * 60
+            samples = [s for s in target.history if s[0] >= cutoff]
+            state = target.last_result["state"] if target.last_result else "-"
+            interval = target.interval
+
+        latencies = sorted(s[2] for s in samples if s[1] and s[2] is not None)
+        up = sum(1 for s in samples if s[1])
+        return {
+            "url": target.url,
+            "state": state,
+            "samples": len(samples),
+            "uptime_pct": round(100.0 * up / len(samples), 1) if samples else None,
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "interval_s": interval
+        }
+
+    def _ensure_running(self):
+        # Caller holds self._lock.
+        if self._thread is None or not self._thread.is_alive():
+            self._pool = self._pool or ThreadPoolExecutor(max_workers=MONITOR_WORKERS)
+            self._thread = threading.Thread(target=self._run, name="server-health-monitor", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                due = [t for t in self._targets.values() if t.next_due <= now and t.url not in self._in_flight]
+                self._in_flight.update(t.url for t in due)
+                pending = [t.next_due for t in self._targets.values() if t.url not in self._in_flight]
+            for target in due:
+                self._pool.submit(self._sample, target)
+            delay = min(pending) - now if pending else MONITOR_MAX_INTERVAL
+            self._wakeup.wait(timeout=max(0.05, min(delay, MONITOR_MAX_INTERVAL)))
+            self._wakeup.clear()
+
+    def _sample(self, target: _MonitoredTarget):
+        try:
+            result = _probe(target.url, target.mode)
+        except Exception as e:
+            result = dict(_empty_result(target.url, target.mode), error=str(e))
+        now = time.monotonic()
+        is_up = result["state"] == "UP"
+        with self._lock:
+            target.history.append((now, is_up, result["latency_ms"]))
+            target.last_result = result
+            target.last_sampled = now
+            recent = list(target.history)[-MONITOR_FLAP_WINDOW:]
+            flapping = any(a[1] != b[1] for a, b in zip(recent, recent[1:]))
+            if flapping:
+                target.interval = MONITOR_MIN_INTERVAL
+            else:
+                target.interval = min(target.interval * 2, MONITOR_MAX_INTERVAL, MONITOR_CACHE_MAX_AGE)
+            target.next_due = now + target.interval
+            self._in_flight.discard(target.url)
+        self._wakeup.set()
+
+
+def _percentile(sorted_values: list, pct: float):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+_monitor = HealthMonitor()
@@ -1,28 +1,779 @@
 from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import List
+import itertools
+import mmap
+import os
+import re
+import sys
+import threading
+import time
+import zlib
 
+from noc_logging import get_logger
+from noc_metrics import instrument_tool
+from noc_response import format_response
+
+try:
+    import numpy as np
+except ImportError:  # the statistical classifier is optional; keyword rules still work
+    np = None
+
+# Keywords are matched case-insensitively on word boundaries, so "power" does not
+# match "powered" and "acl" does not match "oracle". A trailing "*" matches any
+# word starting with the keyword ("config*" matches "config" and "configuration").
 ROOT_CAUSE_KEYWORDS = {
     "Backhaul Failure": ["fiber cut", "link failure", "carrier loss", "backhaul"],
     "Power Outage": ["power", "UPS", "battery", "generator", "electricity"],
-    "Configuration Error": ["bgp", "acl", "config", "routing", "misconfig", "policy"]
+    "Configuration Error": ["bgp", "acl", "config*", "routing", "misconfig*", "policy"]
 }
 
+# Bulk log file diagnosis
+INCIDENT_LOG_DIRECTORY = os.getenv(   # the only directory diagnose_incident_log_file reads from and writes to
+    "NOC_INCIDENT_LOG_DIR",
+    os.path.join(os.path.expanduser("~"), ".dish_noc", os.getenv("NOC_DEPLOYMENT", "default"), "incident_logs")
+)
+BULK_CHUNK_BYTES = 8 * 1024 * 1024   # bytes of the memory-mapped file decoded at a time
+BULK_BATCH_LINES = 5000              # lines classified per worker task
+BULK_TASKS_PER_WORKER = 2            # batches queued per worker; bounds memory regardless of file size
+
+# Statistical classifier (hashed word n-grams + linear softmax model, NumPy only)
+DIAGNOSIS_MODEL_PATH = os.getenv(
+    "NOC_DIAGNOSIS_MODEL",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "diagnosis_model.npz")
+)
+CLASSIFIER_HASH_BITS = 18            # 2**18 feature buckets; the model file size is fixed by this
+CLASSIFIER_MIN_CONFIDENCE = 0.6      # below this probability the keyword rules decide
+
+# Diagnoses are cached per log fingerprint (the log with IDs, addresses, numbers and
+# timestamps masked), so an alarm storm repeating one pattern is analyzed once.
+DIAGNOSIS_CACHE_SIZE = 10000
+FINGERPRINT_MASKS = [
+    ("<ts>", r"\d{4}-\d{2}-\d{2}[t ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:z|[+-]\d{2}:?\d{2})?"),
+    ("<ts>", r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec) +\d{1,2} \d{2}:\d{2}:\d{2}"),
+    ("<ts>", r"\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?![\w:])"),
+    ("<ip>", r"\d{1,3}(?:\.\d{1,3}){3}(?:/\d{1,2})?"),
+    ("<mac>", r"(?:[0-9a-f]{2}[:-]){5}[0-9a-f]{2}"),
+    ("<ip>", r"(?=[0-9a-f:]*\d)(?:[0-9a-f]{0,4}:){2,7}[0-9a-f]{0,4}(?![\w:])"),
+    ("<site>", r"s\d+\b"),
+    ("<router>", r"r\d+\b"),
+    ("<hex>", r"0x[0-9a-f]+|(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{6,}\b"),
+    ("<n>", r"\d+(?:\.\d+)?"),
+]
+
+# Alarm correlation: logs for the same site (or router link) that arrive within
+# CORRELATION_WINDOW seconds of each other are folded into one incident.
+CORRELATION_WINDOW = 300
+CORRELATION_MAX_OPEN_GROUPS = 10000  # oldest open incident is emitted early beyond this
+CORRELATION_SAMPLE_LOGS = 3
+CORRELATION_TERSE_FIELDS = (   # fields kept by response_format="terse"
+    "incident_count", "incidents.incident_key", "incidents.site", "incidents.root_cause",
+    "incidents.event_count", "incidents.first_seen", "incidents.last_seen"
+)
+SITE_PATTERN = re.compile(r"\bS\d+\b")
+ROUTER_PATTERN = re.compile(r"\bR\d+\b")
+LOG_TIMESTAMP_PATTERNS = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}"), "%Y-%m-%dT%H:%M:%S"),
+    (re.compile(r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) +\d{1,2} \d{2}:\d{2}:\d{2}"), "%b %d %H:%M:%S"),
+]
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over the keywords of every root cause.
+
+    A log is scanned once, left to right, whatever the number of keywords; each
+    match is then checked against word boundaries before it is counted.
+    """
+
+    def __init__(self, cause_keywords: dict):
+        self.causes = list(cause_keywords)
+        self._goto = [{}]
+        self._fail = [0]
+        # Per state: (cause index, keyword, keyword length, prefix-only) for every keyword ending there
+        self._output = [[]]
+
+        for cause_index, cause in enumerate(self.causes):
+            for keyword in cause_keywords[cause]:
+                prefix_only = keyword.endswith("*")
+                term = keyword.rstrip("*").lower()
+                if not term:
+                    continue
+                state = 0
+                for char in term:
+                    next_state = self._goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto[state][char] = next_state
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._output.append([])
+                    state = next_state
+                self._output[state].append((cause_index, term, len(term), prefix_only))
+
+        # Breadth-first pass to fill in failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def scan(self, text: str) -> list:
+        """Return (cause index, keyword, start offset) for every whole-word match in text."""
+        text = text.lower()
+        matches = []
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        length = len(text)
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            for cause_index, term, term_length, prefix_only in output[state]:
+                start = position - term_length + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if not prefix_only and position + 1 < length and _is_word_char(text[position + 1]):
+                    continue
+                matches.append((cause_index, term, start))
+        return matches
+
+    def classify(self, text: str) -> tuple:
+        """
+        Score every cause by its number of keyword matches.
+
+        Returns (root cause, scores, matched keywords). The highest score wins, ties go
+        to the cause listed first, and a log with no match is "Unknown".
+        """
+        matches = self.scan(text)
+        scores = dict.fromkeys(self.causes, 0)
+        for cause_index, _, _ in matches:
+            scores[self.causes[cause_index]] += 1
+        root_cause = max(scores, key=scores.get) if matches else "Unknown"
+        return root_cause, scores, sorted({term for _, term, _ in matches})
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+_automaton = KeywordAutomaton(ROOT_CAUSE_KEYWORDS)
+
+
+class HashedNgramClassifier:
+    """
+    Linear softmax classifier over hashed word unigrams and bigrams.
+
+    Features are CRC32 hashes of the n-grams folded into 2**hash_bits buckets, so the
+    model is a fixed-size weight matrix whatever the vocabulary. A batch of logs is
+    scored with one sparse gather-and-sum over the weight matrix.
+    """
+
+    _TOKEN = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, classes: list, weights, bias, hash_bits: int = CLASSIFIER_HASH_BITS):
+        self.classes = list(classes)
+        self.weights = weights
+        self.bias = bias
+        self.hash_bits = hash_bits
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as model:
+            return cls(
+                [str(c) for c in model["classes"]],
+                model["weights"],
+                model["bias"],
+                int(model["hash_bits"])
+            )
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            classes=np.array(self.classes),
+            weights=self.weights.astype(np.float32),
+            bias=self.bias.astype(np.float32),
+            hash_bits=np.array(self.hash_bits)
+        )
+
+    @classmethod
+    def train(cls, texts: list, labels: list, hash_bits: int = CLASSIFIER_HASH_BITS, epochs: int = 200, learning_rate: float = 0.5, l2: float = 1e-4):
+        """Fit the model with full-batch gradient descent on the softmax cross-entropy."""
+        classes = sorted(set(labels))
+        model = cls(classes, np.zeros((1 << hash_bits, len(classes)), dtype=np.float32), np.zeros(len(classes), dtype=np.float32), hash_bits)
+        rows, columns, values = model._features(texts)
+        targets = np.zeros((len(texts), len(classes)), dtype=np.float32)
+        targets[np.arange(len(texts)), [classes.index(label) for label in labels]] = 1.0
+
+        for _ in range(epochs):
+            delta = (model._probabilities(rows, columns, values, len(texts)) - targets) / len(texts)
+            gradient = np.zeros_like(model.weights)
+            np.add.at(gradient, columns, values[:, None] * delta[rows])
+            model.weights -= learning_rate * (gradient + l2 * model.weights)
+            model.bias -= learning_rate * delta.sum(axis=0)
+        return model
+
+    def predict_proba(self, texts: list):
+        """Probability of every class for every text, shape (len(texts), len(classes))."""
+        rows, columns, values = self._features(texts)
+        return self._probabilities(rows, columns, values, len(texts))
+
+    def _features(self, texts: list) -> tuple:
+        """Sparse (row, column, value) triplets, L2-normalized per text."""
+        mask = (1 << self.hash_bits) - 1
+        rows, columns, values = [], [], []
+        for row, text in enumerate(texts):
+            tokens = self._TOKEN.findall(text.lower())
+            grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not grams:
+                continue
+            weight = 1.0 / len(grams) ** 0.5
+            for gram in grams:
+                rows.append(row)
+                columns.append(zlib.crc32(gram.encode("utf-8")) & mask)
+                values.append(weight)
+        return np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64), np.array(values, dtype=np.float32)
+
+    def _probabilities(self, rows, columns, values, count: int):
+        logits = np.tile(self.bias, (count, 1))
+        np.add.at(logits, rows, self.weights[columns] * values[:, None])
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+
+log = get_logger("diagnosis")
+
+
+def _load_classifier():
+    if np is None or not os.path.exists(DIAGNOSIS_MODEL_PATH):
+        return None
+    try:
+        return HashedNgramClassifier.load(DIAGNOSIS_MODEL_PATH)
+    except (OSError, KeyError, ValueError) as e:
+        log.warning("diagnosis.model.unavailable", path=DIAGNOSIS_MODEL_PATH, error=str(e))
+        return None
+
+
+_classifier = _load_classifier()
+
+
+# All masks run as one alternation in a single pass; earlier entries win.
+_FINGERPRINT_PATTERN = re.compile(
+    r"(?<!\w)(?:" + "|".join(f"({pattern})" for _, pattern in FINGERPRINT_MASKS) + ")"
+)
+_FINGERPRINT_REPLACEMENTS = [None] + [mask for mask, _ in FINGERPRINT_MASKS]
+
+
+def fingerprint_log(log_message: str) -> str:
+    """Lower-case the log and mask timestamps, IPs, MACs, site/router IDs, hex IDs and numbers."""
+    return " ".join(_FINGERPRINT_PATTERN.sub(
+        lambda match: _FINGERPRINT_REPLACEMENTS[match.lastindex], log_message.lower()
+    ).split())
+
+
+class _DiagnosisCache:
+    """Thread-safe bounded LRU of diagnoses keyed by log fingerprint, with hit/miss counters."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def count_hit(self):
+        """Record a lookup answered without the cache (a repeat of a fingerprint already being diagnosed)."""
+        with self._lock:
+            self._hits += 1
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0
+            }
+
+
+_diagnosis_cache = _DiagnosisCache(DIAGNOSIS_CACHE_SIZE)
+
+
+def get_diagnosis_cache_stats() -> dict:
+    """Size, hits, misses, evictions and hit rate of this process's diagnosis cache."""
+    return _diagnosis_cache.stats()
+
+
+def classify_logs(log_messages: list) -> list:
+    """
+    Diagnose a batch of logs.
+
+    Logs whose fingerprint is already cached cost one dictionary lookup. The rest are
+    deduplicated by fingerprint, diagnosed once per pattern and cached. Returns one
+    dict per log with root_cause, confidence, method and per-cause probabilities (or
+    keyword scores); the dicts are shared with the cache and must not be modified.
+    """
+    results = [None] * len(log_messages)
+    pending = {}
+    for i, log_message in enumerate(log_messages):
+        fingerprint = fingerprint_log(log_message)
+        if fingerprint in pending:
+            _diagnosis_cache.count_hit()
+            pending[fingerprint].append(i)
+            continue
+        cached = _diagnosis_cache.get(fingerprint)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending[fingerprint] = [i]
+
+    if pending:
+        representatives = [log_messages[indices[0]] for indices in pending.values()]
+        for (fingerprint, indices), result in zip(pending.items(), _diagnose_uncached(representatives)):
+            _diagnosis_cache.set(fingerprint, result)
+            for i in indices:
+                results[i] = result
+    return results
+
+
+def _diagnose_uncached(log_messages: list) -> list:
+    """
+    The statistical model (when a model file is present) scores the whole batch at
+    once; any log it is not at least CLASSIFIER_MIN_CONFIDENCE sure about, and every
+    log when there is no model, is decided by the keyword rules instead.
+    """
+    results = [None] * len(log_messages)
+    if _classifier is not None and log_messages:
+        probabilities = _classifier.predict_proba(log_messages)
+        best = probabilities.argmax(axis=1)
+        for i, row in enumerate(probabilities):
+            if row[best[i]] >= CLASSIFIER_MIN_CONFIDENCE:
+                results[i] = {
+                    "root_cause": _classifier.classes[best[i]],
+                    "confidence": round(float(row[best[i]]), 3),
+                    "method": "classifier",
+                    "probabilities": {c: round(float(p), 3) for c, p in zip(_classifier.classes, row)}
+                }
+    for i, log_message in enumerate(log_messages):
+        if results[i] is None:
+            root_cause, scores, matched_keywords = _automaton.classify(log_message)
+            total = sum(scores.values())
+            results[i] = {
+                "root_cause": root_cause,
+                "confidence": round(scores[root_cause] / total, 3) if total else 0.0,
+                "method": "keywords",
+                "scores": scores,
+                "matched_keywords": matched_keywords
+            }
+    return results
+
+
+@instrument_tool
 @tool(
     name="diagnose_incident_log",
     description="Analyzes a log message and tags the most likely root cause (e.g. power outage, config error, backhaul issue).",
     permission=ToolPermission.ADMIN
 )
-def diagnose_incident_log(log_message: str) -> str:
+def diagnose_incident_log(log_message: str, include_scores: bool = False) -> str:
     """
-    Takes in a log message and returns a basic root cause tag based on keyword matching.
+    Takes in a log message and returns a root cause tag, using the trained statistical
+    model when one is installed and keyword matching otherwise.
+
+    Args:
+        log_message: The incident log message to analyze
+        include_scores: Return JSON with the confidence, the method used and the per-cause probabilities or keyword scores instead of the bare tag
     """
-    log_lower = log_message.lower()
-    for cause, keywords in ROOT_CAUSE_KEYWORDS.items():
-        if any(keyword in log_lower for keyword in keywords):
-            return cause
-    return "Unknown"
+    result = classify_logs([log_message])[0]
+    if not include_scores:
+        return result["root_cause"]
+    return format_response(result, tool="diagnose_incident_log")
+
+
+@instrument_tool
+@tool(
+    name="diagnose_incident_log_file",
+    description="Classifies every line of a syslog/NMS log file in the incident log directory by root cause using all CPU cores and returns per-cause counts, optionally writing a per-line result file.",
+    permission=ToolPermission.ADMIN
+)
+def diagnose_incident_log_file(file_path: str, output_path: str = None, workers: int = 0) -> str:
+    """
+    Streams a log file through the keyword classifier in parallel.
+
+    Args:
+        file_path: Path of the log file to classify, inside the incident log directory (relative paths are taken from it)
+        output_path: Optional path, inside the same directory, of a tab-separated file receiving "root cause<TAB>log line" for every line
+        workers: Number of worker processes (0 uses every CPU core)
+
+    Returns:
+        JSON string with line count, per-cause counts and elapsed seconds
+    """
+    resolved = {}
+    for argument, path in (("file_path", file_path), ("output_path", output_path)):
+        if path is None:
+            continue
+        resolved[argument] = _incident_log_path(path)
+        if resolved[argument] is None:
+            result = {"error": f"{argument} must be inside the incident log directory {INCIDENT_LOG_DIRECTORY}", argument: path}
+            return format_response(result, tool="diagnose_incident_log_file")
+    try:
+        result = diagnose_log_file(resolved["file_path"], resolved.get("output_path"), workers or None)
+    except OSError as e:
+        result = {"error": f"Cannot read or write log file: {e}", "file_path": file_path}
+    return format_response(result, tool="diagnose_incident_log_file")
+
+
+def diagnose_log_file(file_path: str, output_path: str = None, workers: int = None) -> dict:
+    """
+    Classify a log file line by line across a process pool.
+
+    The file is memory-mapped and decoded chunk by chunk, cut into batches of
+    BULK_BATCH_LINES lines, and classified by worker processes. At most
+    BULK_TASKS_PER_WORKER batches per worker are in flight, so memory use does not
+    depend on the file size. Results are consumed in order, so the output file
+    follows the input line order.
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    want_labels = output_path is not None
+    counts = dict.fromkeys(_automaton.causes + ["Unknown"], 0)
+    if _classifier is not None:
+        counts.update(dict.fromkeys(_classifier.classes, 0))
+    total = 0
+
+    output = open(output_path, "w", encoding="utf-8") if want_labels else None
+    try:
+        def collect(batch, result):
+            nonlocal total
+            batch_counts, labels = result
+            for cause, count in batch_counts.items():
+                counts[cause] += count
+            total += len(batch)
+            if output is not None:
+                output.writelines(f"{label}\t{line}\n" for label, line in zip(labels, batch))
+
+        batches = _iter_batches(_iter_mmap_lines(file_path), BULK_BATCH_LINES)
+        first = next(batches, None)
+        second = next(batches, None) if first is not None else None
+        if second is None:
+            # A single batch is not worth starting worker processes for
+            if first is not None:
+                collect(first, _classify_batch(first, want_labels))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = deque()
+                for batch in itertools.chain((first, second), batches):
+                    in_flight.append((batch, pool.submit(_classify_batch, batch, want_labels)))
+                    if len(in_flight) >= workers * BULK_TASKS_PER_WORKER:
+                        done_batch, future = in_flight.popleft()
+                        collect(done_batch, future.result())
+                while in_flight:
+                    done_batch, future = in_flight.popleft()
+                    collect(done_batch, future.result())
+    finally:
+        if output is not None:
+            output.close()
+
+    return {
+        "file_path": file_path,
+        "lines": total,
+        "counts": counts,
+        "output_path": output_path,
+        "workers": workers,
+        "elapsed_seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def _incident_log_path(path: str):
+    """Real path of a file inside INCIDENT_LOG_DIRECTORY, or None if it resolves outside it (symlinks included)."""
+    directory = os.path.realpath(INCIDENT_LOG_DIRECTORY)
+    resolved = os.path.realpath(os.path.join(directory, path))
+    if os.path.commonpath([directory, resolved]) != directory or resolved == directory:
+        return None
+    return resolved
+
+
+def _iter_mmap_lines(file_path: str):
+    """Yield the non-empty lines of a file, decoding one memory-mapped chunk at a time."""
+    with open(file_path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            size = len(mapped)
+            offset = 0
+            while offset < size:
+                end = min(offset + BULK_CHUNK_BYTES, size)
+                if end < size:
+                    # Extend the chunk to the next newline so no line is split
+                    newline = mapped.find(b"\n", end)
+                    end = size if newline == -1 else newline + 1
+                for line in mapped[offset:end].decode("utf-8", errors="replace").splitlines():
+                    if line.strip():
+                        yield line
+                offset = end
+
+
+def _iter_batches(lines, batch_size: int):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _classify_batch(lines: list, want_labels: bool) -> tuple:
+    """Worker task: per-cause counts for a batch, plus per-line labels if requested."""
+    counts = {}
+    labels = [] if want_labels else None
+    for result in classify_logs(lines):
+        root_cause = result["root_cause"]
+        counts[root_cause] = counts.get(root_cause, 0) + 1
+        if want_labels:
+            labels.append(root_cause)
+    return counts, labels
+
+
+def parse_log_timestamp(log_line: str):
+    """Epoch seconds of the first ISO-8601 or syslog timestamp in the line, or None."""
+    for pattern, date_format in LOG_TIMESTAMP_PATTERNS:
+        match = pattern.search(log_line)
+        if match:
+            timestamp = _parse_timestamp_text(match.group(), date_format)
+            if timestamp is not None:
+                return timestamp
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_timestamp_text(text: str, date_format: str):
+    """strptime is slow; alarm storms repeat the same second many times."""
+    try:
+        if date_format.startswith("%Y"):
+            parsed = datetime.strptime(text.replace(" ", "T", 1), date_format)
+        else:  # syslog timestamps carry no year
+            parsed = datetime.strptime(" ".join(text.split()), date_format).replace(year=datetime.now().year)
+    except ValueError:
+        return None
+    return parsed.timestamp()
+
+
+class IncidentCorrelator:
+    """
+    Incrementally folds a stream of alarm logs into incidents.
+
+    Each log is keyed by the site it mentions (S005), else by the router link it
+    mentions (R03-R04) or the open site incident that link was last seen with, else
+    "unlocated". An incident stays open while logs for its
+    key keep arriving within window_seconds of the previous one, and is emitted once
+    the stream's clock moves past that. State is one small record per open incident,
+    capped at max_open_groups, so it is bounded however long the stream runs.
+    """
+
+    def __init__(self, window_seconds: float = CORRELATION_WINDOW, max_open_groups: int = CORRELATION_MAX_OPEN_GROUPS):
+        self.window_seconds = window_seconds
+        self.max_open_groups = max_open_groups
+        self._open = OrderedDict()  # key -> incident, least recently updated first
+        self._links = {}  # router link -> key of the open incident it was first seen in
+        self._clock = None
+
+    def add(self, log_lines: list, timestamps: list = None) -> list:
+        """
+        Feed logs in arrival order and return the incidents they closed.
+
+        Timestamps (epoch seconds) are taken from the list, else parsed from the log,
+        else the previous log's time (or now, for the first log) is used. Logs past the
+        end of a shorter timestamp list are timed as if they had no entry in it.
+        """
+        closed = []
+        for i, (log_line, diagnosis) in enumerate(zip(log_lines, classify_logs(log_lines))):
+            timestamp = timestamps[i] if timestamps and i < len(timestamps) else None
+            if timestamp is None:
+                timestamp = parse_log_timestamp(log_line)
+            if timestamp is None:
+                timestamp = self._clock if self._clock is not None else time.time()
+            self._clock = timestamp if self._clock is None else max(self._clock, timestamp)
+            closed.extend(self._expire())
+            self._record(log_line, diagnosis["root_cause"], timestamp)
+            if len(self._open) > self.max_open_groups:
+                closed.append(self._close_oldest())
+        return closed
+
+    def flush(self) -> list:
+        """Emit every open incident, e.g. at the end of a finite batch."""
+        closed = [self._finish(incident) for incident in self._open.values()]
+        self._open.clear()
+        self._links.clear()
+        return closed
+
+    def _expire(self) -> list:
+        closed = []
+        while self._open:
+            incident = next(iter(self._open.values()))
+            if self._clock - incident["last_seen"] <= self.window_seconds:
+                break
+            closed.append(self._close_oldest())
+        return closed
+
+    def _close_oldest(self) -> dict:
+        incident = self._open.popitem(last=False)[1]
+        for link in incident["links"]:
+            if self._links.get(link) == incident["key"]:
+                del self._links[link]
+        return self._finish(incident)
+
+    def _record(self, log_line: str, root_cause: str, timestamp: float):
+        sites = SITE_PATTERN.findall(log_line)
+        routers = sorted(set(ROUTER_PATTERN.findall(log_line)))
+        link = "-".join(routers) if routers else None
+        if sites:
+            key = sites[0]
+        elif link:
+            key = self._links.get(link, link)
+        else:
+            key = "unlocated"
+        incident = self._open.get(key)
+        if incident is None:
+            incident = self._open[key] = {
+                "key": key,
+                "site": sites[0] if sites else None,
+                "routers": set(),
+                "links": set(),
+                "first_seen": timestamp,
+                "last_seen": timestamp,
+                "event_count": 0,
+                "cause_counts": {},
+                "sample_logs": []
+            }
+        self._open.move_to_end(key)
+        incident["routers"].update(routers)
+        if link and link not in self._links:
+            incident["links"].add(link)
+            self._links[link] = key
+        incident["first_seen"] = min(incident["first_seen"], timestamp)
+        incident["last_seen"] = max(incident["last_seen"], timestamp)
+        incident["event_count"] += 1
+        incident["cause_counts"][root_cause] = incident["cause_counts"].get(root_cause, 0) + 1
+        if len(incident["sample_logs"]) < CORRELATION_SAMPLE_LOGS:
+            incident["sample_logs"].append(log_line)
+
+    @staticmethod
+    def _finish(incident: dict) -> dict:
+        counts = incident["cause_counts"]
+        known = {cause: count for cause, count in counts.items() if cause != "Unknown"}
+        return {
+            "incident_key": incident["key"],
+            "site": incident["site"],
+            "routers": sorted(incident["routers"]),
+            "root_cause": max(known, key=known.get) if known else "Unknown",
+            "event_count": incident["event_count"],
+            "cause_counts": counts,
+            "first_seen": datetime.fromtimestamp(incident["first_seen"]).isoformat(),
+            "last_seen": datetime.fromtimestamp(incident["last_seen"]).isoformat(),
+            "sample_logs": incident["sample_logs"]
+        }
+
+
+@instrument_tool
+@tool(
+    name="correlate_incident_logs",
+    description="Groups raw alarm logs by site or router link within a sliding time window and returns one incident per group with its dominant root cause and event count.",
+    permission=ToolPermission.ADMIN
+)
+def correlate_incident_logs(log_lines: List[str], window_seconds: int = CORRELATION_WINDOW, response_format: str = None, response_fields: List[str] = None) -> str:
+    """
+    Reduces a burst of alarm logs to a handful of correlated incidents.
+
+    Args:
+        log_lines: Raw log lines in arrival order; ISO-8601 or syslog timestamps in the lines are used when present
+        window_seconds: Logs for the same site or link further apart than this start a new incident
+        response_format: Response detail: "compact" (default; no whitespace), "terse" (incident keys, sites, causes, counts and times only) or "full" (everything, indented)
+        response_fields: Dotted paths of the only fields to return, e.g. ["incidents.site", "incidents.root_cause"]
+
+    Returns:
+        JSON string with the incidents (most events first) and the number of logs processed
+    """
+    correlator = IncidentCorrelator(window_seconds)
+    incidents = correlator.add(log_lines) + correlator.flush()
+    incidents.sort(key=lambda incident: -incident["event_count"])
+    return format_response({
+        "log_count": len(log_lines),
+        "incident_count": len(incidents),
+        "incidents": incidents
+    }, response_format, response_fields, CORRELATION_TERSE_FIELDS, "correlate_incident_logs")
+
+
+def _train_from_file(training_path: str, model_path: str = DIAGNOSIS_MODEL_PATH):
+    """
+    Train the classifier from a "root cause<TAB>log line" file.
+
+    The labels must be the confirmed root causes of resolved incidents. A file written
+    by diagnose_incident_log_file is labelled by the keyword rules, and a model trained
+    on it only learns to repeat them, so a warning is logged when every label agrees
+    with the rules.
+    """
+    texts, labels = [], []
+    with open(training_path, encoding="utf-8") as training:
+        for line in training:
+            label, _, text = line.rstrip("\n").partition("\t")
+            if label and text:
+                labels.append(label)
+                texts.append(text)
+    if texts and all(_automaton.classify(text)[0] == label for text, label in zip(texts, labels)):
+        log.warning("diagnosis.train.keyword_labels", training_path=training_path, logs=len(texts))
+    model = HashedNgramClassifier.train(texts, labels)
+    model.save(model_path)
+    log.info("diagnosis.train.saved", logs=len(texts), classes=model.classes, model_path=model_path)
+
+
+# Offline training: python diagnose_incident_tool.py train <labelled.tsv> [model.npz]
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "train":
+        _train_from_file(*sys.argv[2:4])
+    else:
+        log.error("diagnosis.train.usage", usage="python diagnose_incident_tool.py train <labelled.tsv> [model.npz]")
+        sys.exit(2)
 
 ##Sample Logs
 # "Site S005 is unreachable. Fiber cut detected between router R03 and R04. Escalated to backhaul team.",
 # "UPS unit failed at site S002. Generator did not auto-start. Site running on battery only.",
 # "BGP session dropped due to incorrect neighbor settings in config push from NOC.",
-# "Ping lost, link failure, to site S008. Investigating further..."
\ No newline at end of file
+# "Ping lost, link failure, to site S008. Investigating further..."
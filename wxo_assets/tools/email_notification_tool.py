@@ -4,14 +4,35 @@ Sends real emails via Gmail SMTP.
 """
 
 from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
-from typing import Dict, Any
+from typing import Dict, Any, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from string import Template
+import heapq
+import html
+import itertools
 import json
+import os
 import smtplib
+import threading
+import time
+import uuid
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import traceback
 
+try:
+    import fcntl
+except ImportError:  # no cross-process spool locking (Windows); run one process per spool directory
+    fcntl = None
+
+from noc_logging import get_logger
+from noc_metrics import instrument_tool, observe_call
+from noc_response import format_response
+
 
 # Gmail SMTP Configuration
 SMTP_SERVER = "smtp.gmail.com"
@@ -20,7 +41,37 @@ SENDER_EMAIL = "your-email@gmail.com"
 SENDER_PASSWORD = "YOUR_APP_SPECIFIC_PASSWORD"  # App-specific password
 DEFAULT_RECIPIENT = "recipient@company.com"
 
+# SMTP connection pool
+SMTP_TIMEOUT = 30                     # seconds for connect and each SMTP command
+SMTP_POOL_SIZE = 4                    # authenticated sessions kept open
+SMTP_NOOP_AFTER_IDLE = 30             # NOOP-check a pooled session idle longer than this (seconds)
+SMTP_MAX_MESSAGES_PER_SESSION = 100   # reconnect after this many messages on one session
+
+# Asynchronous delivery (delivery_mode="async")
+NOTIFICATION_SPOOL_DIR = os.getenv(   # private to this deployment (NOC_DEPLOYMENT) and OS user
+    "NOC_NOTIFICATION_SPOOL_DIR",
+    os.path.join(os.path.expanduser("~"), ".dish_noc", os.getenv("NOC_DEPLOYMENT", "default"), "notification_spool")
+)
+NOTIFICATION_WORKERS = 4              # background delivery threads
+NOTIFICATION_MAX_ATTEMPTS = 3         # delivery attempts before a message is marked failed
+NOTIFICATION_RETRY_DELAY = 10         # seconds between delivery attempts
+NOTIFICATION_STATUS_HISTORY = 10000   # finished message statuses kept for lookup
+
+# Storm coalescing (coalesce=True)
+NOTIFICATION_COALESCE_WINDOW = 300    # seconds notifications for the same incident, severity and recipient are merged
+NOTIFICATION_COALESCE_MAX_KEYS = 1000 # open digests; the oldest is flushed early beyond this
 
+# Fields kept by response_format="terse"
+EMAIL_TERSE_FIELDS = (
+    "notification_status", "status", "message_id", "attempts", "sent", "failed", "queued",
+    "email_details.recipient", "email_details.message_id", "email_details.notifications_merged", "email_details.send_at",
+    "results.recipient", "results.status", "results.message_id", "results.error"
+)
+
+log = get_logger("email")
+
+
+@instrument_tool
 @tool(
     name="email_notification_simple",
     description="Send real email notifications for Dish Network NOC incidents and outages via Gmail",
@@ -32,7 +83,11 @@ def send_outage_notification(
     affected_nodes: int,
     recipient_email: str = None,
     incident_number: str = None,
-    include_details: bool = True
+    include_details: bool = True,
+    delivery_mode: str = "sync",
+    coalesce: bool = False,
+    response_format: str = None,
+    response_fields: List[str] = None
 ) -> str:
     """
     Send real email notification for network outage incidents.
@@ -44,6 +99,10 @@ def send_outage_notification(
         recipient_email: Email address to send to (defaults to IBM email)
         incident_number: ServiceNow incident number if available
         include_details: Whether to include detailed technical information
+        delivery_mode: "sync" sends before returning; "async" queues the email and returns its message_id immediately
+        coalesce: Merge with other notifications of the same severity for the same incident (or outage type) and recipient into one digest email sent after NOTIFICATION_COALESCE_WINDOW seconds; CRITICAL notifications are always sent immediately
+        response_format: Response detail: "compact" (default; no whitespace, tracebacks or sent payloads), "terse" (status fields only) or "full" (everything, indented)
+        response_fields: Dotted paths of the only fields to return, e.g. ["notification_status", "email_details.message_id"]
     
     Returns:
         JSON string with email sending status and details
@@ -53,22 +112,56 @@ def send_outage_notification(
     recipient = recipient_email or DEFAULT_RECIPIENT
     
     try:
+        digest = None
+        if coalesce:
+            coalesced = _coalescer.add(recipient, severity_level, outage_type, affected_nodes, incident_number, include_details)
+            if coalesced["status"] == "coalesced":
+                return format_response({
+                    "notification_status": "coalesced",
+                    "email_details": {
+                        "recipient": recipient,
+                        "incident_number": incident_number,
+                        "message_id": coalesced["message_id"],
+                        "notifications_merged": coalesced["count"],
+                        "send_at": coalesced["send_at"]
+                    },
+                    "message": f"📥 Notification merged into digest {coalesced['message_id']} ({coalesced['count']} so far)"
+                }, response_format, response_fields, EMAIL_TERSE_FIELDS, "email_notification_simple")
+            # CRITICAL bypass: fold the open digests for this incident into this email
+            digest = coalesced.get("digest")
+            if digest:
+                affected_nodes += digest["affected_nodes"]
+        
         # Generate email subject
-        subject = f"🚨 [{severity_level}] Dish Network {outage_type.upper()} Outage"
-        if incident_number:
-            subject += f" - {incident_number}"
-        subject += f" - {affected_nodes:,} Affected"
+        subject = _generate_subject(severity_level, outage_type, affected_nodes, incident_number)
         
         # Generate email body
         body_content = _generate_email_body(
             severity_level, outage_type, affected_nodes, incident_number, include_details
         )
+        if digest:
+            body_content += _generate_digest_section(digest["entries"])
+        
+        if (delivery_mode or "sync").lower() == "async":
+            message_id = _outbox.enqueue(recipient, subject, body_content)
+            return format_response({
+                "notification_status": "queued",
+                "email_details": {
+                    "subject": subject,
+                    "recipient": recipient,
+                    "priority": "high" if severity_level in ["CRITICAL", "HIGH"] else "normal",
+                    "timestamp": datetime.now().isoformat(),
+                    "message_id": message_id,
+                    "incident_number": incident_number
+                },
+                "message": f"📨 Email to {recipient} queued for delivery, check status with message_id {message_id}"
+            }, response_format, response_fields, EMAIL_TERSE_FIELDS, "email_notification_simple")
         
         # Send the actual email
         email_result = _send_email(recipient, subject, body_content)
         
         if email_result["status"] == "success":
-            return json.dumps({
+            return format_response({
                 "notification_status": "sent",
                 "email_details": {
                     "subject": subject,
@@ -84,9 +177,9 @@ def send_outage_notification(
                     "sender": SENDER_EMAIL
                 },
                 "message": f"✅ Email sent successfully to {recipient}"
-            }, indent=2)
+            }, response_format, response_fields, EMAIL_TERSE_FIELDS, "email_notification_simple")
         else:
-            return json.dumps({
+            return format_response({
                 "notification_status": "failed",
                 "error": email_result.get("error"),
                 "email_details": {
@@ -94,115 +187,762 @@ def send_outage_notification(
                     "recipient": recipient,
                     "timestamp": datetime.now().isoformat()
                 }
-            }, indent=2)
+            }, response_format, response_fields, EMAIL_TERSE_FIELDS, "email_notification_simple")
             
     except Exception as e:
-        return json.dumps({
+        log.error("email.notification.failed", recipient=recipient, exc_info=True)
+        return format_response({
             "notification_status": "error",
             "error": f"Failed to send email: {str(e)}",
             "timestamp": datetime.now().isoformat(),
             "traceback": traceback.format_exc()
-        }, indent=2)
+        }, response_format, response_fields, EMAIL_TERSE_FIELDS, "email_notification_simple")
 
 
-def _send_email(recipient: str, subject: str, body: str) -> dict:
-    """Send email via Gmail SMTP."""
+@instrument_tool
+@tool(
+    name="email_notification_batch",
+    description="Send the same Dish Network NOC outage notification to a list of recipients (e.g. all regional teams) over pooled Gmail SMTP sessions",
+    permission=ToolPermission.READ_WRITE
+)
+def send_outage_notification_batch(
+    recipient_emails: List[str],
+    severity_level: str,
+    outage_type: str,
+    affected_nodes: int,
+    incident_number: str = None,
+    include_details: bool = True,
+    delivery_mode: str = "sync",
+    team_names: List[str] = None,
+    include_html: bool = False,
+    response_format: str = None,
+    response_fields: List[str] = None
+) -> str:
+    """
+    Send one outage notification to many recipients, one email each.
+    
+    Args:
+        recipient_emails: Email addresses to send to
+        severity_level: Severity level (LOW, MEDIUM, HIGH, CRITICAL)
+        outage_type: Type of outage (satellite, ground, fiber, power)
+        affected_nodes: Number of affected network nodes or customers
+        incident_number: ServiceNow incident number if available
+        include_details: Whether to include detailed technical information
+        delivery_mode: "sync" sends before returning; "async" queues every email and returns their message_ids immediately
+        team_names: Optional team name per recipient (same order as recipient_emails) used to personalize each email
+        include_html: Also send an HTML version of each email alongside the plain text
+        response_format: Response detail: "compact" (default; no whitespace, tracebacks or sent payloads), "terse" (status fields only) or "full" (everything, indented)
+        response_fields: Dotted paths of the only fields to return, e.g. ["sent", "results.status"]
+    
+    Returns:
+        JSON string with per-recipient sending status
+    """
+    
+    recipients = [r.strip() for r in recipient_emails or [] if r and r.strip()]
+    if not recipients:
+        return format_response({"notification_status": "error", "error": "No recipients supplied"}, response_format, response_fields, EMAIL_TERSE_FIELDS, "email_notification_batch")
     
     try:
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = SENDER_EMAIL
-        msg['To'] = recipient
-        msg['Subject'] = subject
+        subject = _generate_subject(severity_level, outage_type, affected_nodes, incident_number)
+        teams = list(team_names or [])
+        teams += [None] * (len(recipients) - len(teams))
+        formats = ("plain", "html") if include_html else ("plain",)
+        bodies = render_notifications([
+            {
+                "severity_level": severity_level,
+                "outage_type": outage_type,
+                "affected_nodes": affected_nodes,
+                "incident_number": incident_number,
+                "include_details": include_details,
+                "team": team
+            }
+            for team in teams[:len(recipients)]
+        ], formats)
         
-        # Attach body
-        msg.attach(MIMEText(body, 'plain'))
+        if (delivery_mode or "sync").lower() == "async":
+            queued = [
+                {"recipient": recipient, "message_id": _outbox.enqueue(recipient, subject, body["plain"], html_body=body.get("html"))}
+                for recipient, body in zip(recipients, bodies)
+            ]
+            return format_response({
+                "notification_status": "queued",
+                "subject": subject,
+                "queued": len(queued),
+                "results": queued,
+                "timestamp": datetime.now().isoformat(),
+                "message": f"📨 {len(queued)} email(s) queued for delivery"
+            }, response_format, response_fields, EMAIL_TERSE_FIELDS, "email_notification_batch")
         
-        # Connect to Gmail SMTP server
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()  # Enable encryption
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
+        messages = [
+            (_new_message_id(), recipient, subject, body["plain"], body.get("html"))
+            for recipient, body in zip(recipients, bodies)
+        ]
         
-        # Send email
-        text = msg.as_string()
-        server.sendmail(SENDER_EMAIL, recipient, text)
-        server.quit()
+        # Each worker sends its share of the list over one pooled session
+        workers = min(SMTP_POOL_SIZE, len(messages))
+        shares = [messages[i::workers] for i in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            share_results = list(pool.map(_send_messages, shares))
+        results = [None] * len(messages)
+        for i, share in enumerate(share_results):
+            results[i::workers] = share
         
-        return {
-            "status": "success",
-            "message": f"Email sent to {recipient}",
-            "message_id": f"dish-noc-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        sent = sum(1 for r in results if r["status"] == "success")
+        return format_response({
+            "notification_status": "sent" if sent == len(results) else ("partial" if sent else "failed"),
+            "subject": subject,
+            "sent": sent,
+            "failed": len(results) - sent,
+            "results": results,
+            "timestamp": datetime.now().isoformat(),
+            "message": f"✅ Email sent to {sent} of {len(results)} recipient(s)"
+        }, response_format, response_fields, EMAIL_TERSE_FIELDS, "email_notification_batch")
+    
+    except Exception as e:
+        log.error("email.notification.failed", recipients=len(recipients), exc_info=True)
+        return format_response({
+            "notification_status": "error",
+            "error": f"Failed to send emails: {str(e)}",
+            "timestamp": datetime.now().isoformat(),
+            "traceback": traceback.format_exc()
+        }, response_format, response_fields, EMAIL_TERSE_FIELDS, "email_notification_batch")
+
+
+@instrument_tool
+@tool(
+    name="email_notification_status",
+    description="Look up the delivery status of a queued Dish Network NOC email notification by its message_id",
+    permission=ToolPermission.READ_ONLY
+)
+def get_notification_status(message_id: str, response_format: str = None, response_fields: List[str] = None) -> str:
+    """
+    Look up the delivery status of an email queued with delivery_mode="async".
+    
+    Args:
+        message_id: Message ID returned when the email was queued
+        response_format: Response detail: "compact" (default; no whitespace, tracebacks or sent payloads), "terse" (status fields only) or "full" (everything, indented)
+        response_fields: Dotted paths of the only fields to return, e.g. ["status", "attempts"]
+    
+    Returns:
+        JSON string with the message status (coalescing, queued, sending, sent, failed or unknown)
+    """
+    
+    status = _coalescer.status(message_id) or _outbox.status(message_id)
+    if status is None:
+        return format_response({"message_id": message_id, "status": "unknown"}, response_format, response_fields, EMAIL_TERSE_FIELDS, "email_notification_status")
+    return format_response(dict(status, message_id=message_id), response_format, response_fields, EMAIL_TERSE_FIELDS, "email_notification_status")
+
+
+def _generate_subject(severity_level: str, outage_type: str, affected_nodes: int, incident_number: str) -> str:
+    """Generate the email subject line for an outage."""
+    subject = f"🚨 [{severity_level}] Dish Network {outage_type.upper()} Outage"
+    if incident_number:
+        subject += f" - {incident_number}"
+    subject += f" - {affected_nodes:,} Affected"
+    return subject
+
+
+class _SMTPPool:
+    """
+    Pool of logged-in SMTP sessions.
+
+    Sessions are opened lazily (connect, STARTTLS, login) and returned to the pool
+    after use, so many messages share one TLS handshake and one login. A session that
+    has been idle for SMTP_NOOP_AFTER_IDLE seconds is checked with NOOP before reuse
+    and replaced if the server has dropped it.
+    """
+
+    def __init__(self, size: int):
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def session(self):
+        self._slots.acquire()
+        entry = None
+        try:
+            entry = self._checkout()
+            yield entry
+            entry["last_used"] = time.monotonic()
+            if entry["sent"] < SMTP_MAX_MESSAGES_PER_SESSION:
+                with self._lock:
+                    self._idle.append(entry)
+            else:
+                _quit(entry["server"])
+        except Exception:
+            if entry is not None:
+                _quit(entry["server"])
+            raise
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            _quit(entry["server"])
+
+    def _checkout(self) -> dict:
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                return self._connect()
+            if time.monotonic() - entry["last_used"] < SMTP_NOOP_AFTER_IDLE:
+                return entry
+            try:
+                if entry["server"].noop()[0] == 250:
+                    return entry
+            except (smtplib.SMTPException, OSError):
+                pass
+            _quit(entry["server"])
+
+    @staticmethod
+    def _connect() -> dict:
+        # Connect to Gmail SMTP server
+        with observe_call("smtp", "connect"):
+            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+            try:
+                server.starttls()  # Enable encryption
+                server.login(SENDER_EMAIL, SENDER_PASSWORD)
+            except Exception:
+                _quit(server)
+                raise
+        return {"server": server, "sent": 0, "last_used": time.monotonic()}
+
+
+def _quit(server: smtplib.SMTP):
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+
+_smtp_pool = _SMTPPool(SMTP_POOL_SIZE)
+
+
+def _new_message_id() -> str:
+    return f"dish-noc-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def _build_message(recipient: str, subject: str, body: str, html_body: str = None) -> MIMEMultipart:
+    # Create message; with an HTML body, plain and HTML are sent as alternatives
+    msg = MIMEMultipart('alternative') if html_body else MIMEMultipart()
+    msg['From'] = SENDER_EMAIL
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    
+    # Attach body
+    msg.attach(MIMEText(body, 'plain'))
+    if html_body:
+        msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+
+def _send_messages(messages: list) -> list:
+    """
+    Send (message_id, recipient, subject, body, html_body) tuples over a single pooled
+    SMTP session; html_body may be None for plain-text only.
+
+    A message the server rejects gets its own error result and the rest are still
+    sent. If the session drops mid-way, the unsent messages are retried once on a
+    fresh session. Returns one result dict per message, in order.
+    """
+    results = [None] * len(messages)
+    for _ in range(2):
+        pending = [i for i, r in enumerate(results) if r is None]
+        if not pending:
+            break
+        try:
+            with _smtp_pool.session() as entry:
+                for i in pending:
+                    message_id, recipient, subject, body, html_body = messages[i]
+                    message = _build_message(recipient, subject, body, html_body).as_string()
+                    try:
+                        with observe_call("smtp", "send") as call:
+                            call.sent_bytes = len(message)
+                            entry["server"].sendmail(SENDER_EMAIL, recipient, message)
+                    except smtplib.SMTPRecipientsRefused as e:
+                        log.warning("email.recipient.refused", recipient=recipient, error=str(e))
+                        results[i] = {"status": "error", "recipient": recipient, "error": str(e)}
+                        continue
+                    except smtplib.SMTPResponseException as e:
+                        # Rejected for this message only (SMTPDataError, SMTPSenderRefused, ...):
+                        # reset the transaction and carry on with the rest on the same session
+                        log.warning("email.message.rejected", recipient=recipient, code=e.smtp_code, error=str(e))
+                        results[i] = {"status": "error", "recipient": recipient, "error": str(e)}
+                        entry["server"].rset()
+                        continue
+                    entry["sent"] += 1
+                    results[i] = {
+                        "status": "success",
+                        "recipient": recipient,
+                        "message": f"Email sent to {recipient}",
+                        "message_id": message_id
+                    }
+        except smtplib.SMTPServerDisconnected:
+            continue
+        except Exception as e:
+            for i in pending:
+                if results[i] is None:
+                    results[i] = {"status": "error", "recipient": messages[i][1], "error": str(e)}
+            break
+    
+    return [r or {"status": "error", "recipient": messages[i][1], "error": "SMTP session disconnected"} for i, r in enumerate(results)]
+
+
+def _send_email(recipient: str, subject: str, body: str) -> dict:
+    """Send email via Gmail SMTP, reusing a pooled authenticated session."""
+    
+    result = _send_messages([(_new_message_id(), recipient, subject, body, None)])[0]
+    result.pop("recipient", None)
+    return result
+
+
+class _NotificationOutbox:
+    """
+    Background delivery queue backed by append-only JSON-lines spool files.
+
+    enqueue() writes the message to the spool, hands it to a worker pool and returns
+    its message ID straight away. Workers record "sent" or "failed" in the spool once
+    delivery finishes. When the process restarts, every spooled message without a
+    final status is queued again. The spool is rewritten to hold only pending
+    messages once nothing is in flight, so it does not grow forever.
+
+    Each process owns one spool file in the spool directory, spool-<n>.jsonl, and
+    holds an exclusive lock on spool-<n>.lock while it runs. The lock goes away with
+    the process, so a spool file whose lock can be taken has no live owner: the next
+    process to start takes over its pending messages.
+
+    The spool also holds the open digests of _NotificationCoalescer (hold() on every
+    change, release() when merged elsewhere; enqueue() with the digest's message ID
+    closes it), so digests waiting for their send time survive a restart too.
+    """
+
+    def __init__(self, spool_dir: str, workers: int):
+        self.spool_dir = spool_dir
+        self.spool_path = None
+        self._lock_file = None
+        self._workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._held = {}      # message ID -> open digest
+        self._statuses = OrderedDict()
+        self._spooled_lines = 0
+
+    def enqueue(self, recipient: str, subject: str, body: str, message_id: str = None, html_body: str = None) -> str:
+        record = {
+            "message_id": message_id or _new_message_id(),
+            "recipient": recipient,
+            "subject": subject,
+            "body": body,
+            "html_body": html_body,
+            "queued_at": datetime.now().isoformat()
         }
+        with self._lock:
+            self._start()
+            self._append(dict(record, event="queued"))
+            self._held.pop(record["message_id"], None)
+            self._pending[record["message_id"]] = record
+            self._set_status(record["message_id"], {"status": "queued", "recipient": recipient, "queued_at": record["queued_at"]})
+        self._pool.submit(self._deliver, record)
+        return record["message_id"]
+
+    def status(self, message_id: str):
+        with self._lock:
+            self._start()
+            status = self._statuses.get(message_id)
+            return dict(status) if status else None
+
+    def hold(self, digest: dict):
+        """Spool the current state of an open digest (a JSON-serializable dict with a message_id)."""
+        with self._lock:
+            self._start()
+            self._append(dict(digest, event="digest"))
+            self._held[digest["message_id"]] = digest
+
+    def release(self, message_id: str):
+        """Drop an open digest that was sent some other way."""
+        with self._lock:
+            self._start()
+            if self._held.pop(message_id, None) is not None:
+                self._append({"message_id": message_id, "event": "released"})
+
+    def held(self) -> list:
+        """Open digests found in the spool or held since."""
+        with self._lock:
+            self._start()
+            return [dict(digest) for digest in self._held.values()]
+
+    def _start(self):
+        # Caller holds self._lock. Replays the spool on first use.
+        if self._pool is not None:
+            return
+        self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="noc-email")
+        for record in self._claim_spool():
+            self._pending[record["message_id"]] = record
+            self._set_status(record["message_id"], {"status": "queued", "recipient": record["recipient"], "queued_at": record["queued_at"]})
+            self._pool.submit(self._deliver, record)
+
+    def _claim_spool(self) -> list:
+        """Lock a spool file for this process; return its pending messages and those of spool files without an owner."""
+        os.makedirs(self.spool_dir, mode=0o700, exist_ok=True)
+        for shard in itertools.count():
+            lock_file = _try_lock(os.path.join(self.spool_dir, f"spool-{shard}.lock"))
+            if lock_file:
+                self._lock_file = lock_file
+                self.spool_path = os.path.join(self.spool_dir, f"spool-{shard}.jsonl")
+                break
+        pending, self._held = self._read_spool(self.spool_path)
+        self._rewrite(pending)
+        for name in sorted(os.listdir(self.spool_dir)):
+            path = os.path.join(self.spool_dir, name)
+            if not name.endswith(".jsonl") or path == self.spool_path:
+                continue
+            lock_file = _try_lock(path[:-len(".jsonl")] + ".lock")
+            if not lock_file:
+                continue  # its process is still running
+            with lock_file:
+                adopted, held = self._read_spool(path)
+                if adopted or held:
+                    pending += adopted
+                    self._held.update(held)
+                    self._rewrite(pending)
+                    log.info("email.spool.adopted", spool=path, messages=len(adopted), digests=len(held))
+                os.remove(path)
+        return pending
+
+    def _read_spool(self, path: str) -> tuple:
+        """Messages without a final status and open digests (message ID -> digest) in a spool file."""
+        if not os.path.exists(path):
+            return [], {}
+        pending, held = OrderedDict(), {}
+        with open(path, encoding="utf-8") as spool:
+            for line in spool:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from a crash mid-write
+                message_id = entry.pop("message_id", None)
+                event = entry.pop("event", None)
+                if event == "digest":
+                    held[message_id] = dict(entry, message_id=message_id)
+                elif event == "released":
+                    held.pop(message_id, None)
+                elif event == "queued":
+                    held.pop(message_id, None)
+                    pending[message_id] = dict(entry, message_id=message_id)
+                elif message_id in pending:
+                    del pending[message_id]
+                    self._set_status(message_id, entry)
+        return list(pending.values()), held
+
+    def _deliver(self, record: dict):
+        message_id = record["message_id"]
+        result = None
+        for attempt in range(1, NOTIFICATION_MAX_ATTEMPTS + 1):
+            with self._lock:
+                self._set_status(message_id, dict(self._statuses.get(message_id, {}), status="sending", attempts=attempt))
+            result = _send_messages([(message_id, record["recipient"], record["subject"], record["body"], record.get("html_body"))])[0]
+            if result["status"] == "success":
+                break
+            if attempt < NOTIFICATION_MAX_ATTEMPTS:
+                time.sleep(NOTIFICATION_RETRY_DELAY)
         
-    except Exception as e:
-        return {
-            "status": "error",
-            "error": str(e)
+        final = {
+            "status": "sent" if result["status"] == "success" else "failed",
+            "recipient": record["recipient"],
+            "queued_at": record["queued_at"],
+            "finished_at": datetime.now().isoformat(),
+            "attempts": attempt
         }
+        if result["status"] != "success":
+            final["error"] = result.get("error")
+            log.warning("email.delivery.failed", message_id=message_id, recipient=record["recipient"], attempts=attempt, error=final["error"])
+        with self._lock:
+            self._append(dict(final, message_id=message_id, event=final["status"]))
+            self._set_status(message_id, final)
+            self._pending.pop(message_id, None)
+            if not self._pending and self._spooled_lines > 1000:
+                self._rewrite([])
+
+    def _set_status(self, message_id: str, status: dict):
+        # Caller holds self._lock.
+        self._statuses[message_id] = status
+        self._statuses.move_to_end(message_id)
+        while len(self._statuses) > NOTIFICATION_STATUS_HISTORY:
+            self._statuses.popitem(last=False)
+
+    def _append(self, entry: dict):
+        # Caller holds self._lock.
+        with open(self.spool_path, "a", encoding="utf-8") as spool:
+            spool.write(json.dumps(entry) + "\n")
+            spool.flush()
+            os.fsync(spool.fileno())
+        self._spooled_lines += 1
+
+    def _rewrite(self, pending: list):
+        # Caller holds self._lock (or runs before the workers start).
+        tmp_path = self.spool_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as spool:
+            for record in pending:
+                spool.write(json.dumps(dict(record, event="queued")) + "\n")
+            for digest in self._held.values():
+                spool.write(json.dumps(dict(digest, event="digest")) + "\n")
+            spool.flush()
+            os.fsync(spool.fileno())
+        os.replace(tmp_path, self.spool_path)
+        self._spooled_lines = len(pending) + len(self._held)
+
+
+def _try_lock(path: str):
+    """The open lock file if this process got an exclusive lock on it, else None."""
+    lock_file = open(path, "a")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+_outbox = _NotificationOutbox(NOTIFICATION_SPOOL_DIR, NOTIFICATION_WORKERS)
+
+
+class _NotificationCoalescer:
+    """
+    Merges bursts of notifications into digest emails.
+
+    Notifications are grouped by (incident number, or outage type when there is no
+    incident number, severity and recipient), so a digest never mixes severities. The
+    first one in a group opens a digest that is sent through the async outbox
+    NOTIFICATION_COALESCE_WINDOW seconds later. Later ones in the window are added to
+    it, with affected_nodes summed. A CRITICAL notification is never held back: it
+    closes the open digests of every severity for its incident and recipient and is
+    sent at once with them folded in.
+
+    Send times are kept in one heap served by a single scheduler thread. Every change
+    to a digest is spooled through the outbox, and digests found there on first use
+    are reopened with their original send time.
+    """
+
+    def __init__(self, window: float, max_keys: int):
+        self.window = window
+        self.max_keys = max_keys
+        self._digests = OrderedDict()
+        self._deadlines = []   # heap of (send time, message ID, key)
+        self._lock = threading.Condition()
+        self._thread = None
+
+    def add(self, recipient: str, severity_level: str, outage_type: str, affected_nodes: int, incident_number: str, include_details: bool) -> dict:
+        group = incident_number or outage_type.lower()
+        key = (group, severity_level.upper(), recipient)
+        entry = {
+            "severity_level": severity_level,
+            "outage_type": outage_type,
+            "affected_nodes": affected_nodes,
+            "received_at": datetime.now().strftime('%H:%M:%S')
+        }
+        
+        with self._lock:
+            self._start()
+            if severity_level.upper() == "CRITICAL":
+                folded = [self._digests.pop(open_key) for open_key in list(self._digests) if open_key[0] == group and open_key[-1] == recipient]
+                for digest in folded:
+                    _outbox.release(digest["message_id"])
+                digest = {
+                    "affected_nodes": sum(digest["affected_nodes"] for digest in folded),
+                    "entries": [entry for digest in folded for entry in digest["entries"]]
+                } if folded else None
+                return {"status": "bypass", "digest": digest}
+            
+            digest = self._digests.get(key)
+            if digest is None:
+                deadline = time.time() + self.window
+                digest = {
+                    "message_id": _new_message_id(),
+                    "key": list(key),
+                    "recipient": recipient,
+                    "incident_number": incident_number,
+                    "severity_level": severity_level,
+                    "outage_types": [],
+                    "affected_nodes": 0,
+                    "include_details": False,
+                    "entries": [],
+                    "deadline": deadline,
+                    "send_at": datetime.fromtimestamp(deadline).isoformat()
+                }
+                self._digests[key] = digest
+                self._schedule(key, digest)
+                overflow = self._digests.popitem(last=False)[1] if len(self._digests) > self.max_keys else None
+            else:
+                overflow = None
+            
+            digest["entries"].append(entry)
+            digest["affected_nodes"] += affected_nodes
+            digest["include_details"] = digest["include_details"] or include_details
+            if outage_type not in digest["outage_types"]:
+                digest["outage_types"].append(outage_type)
+            _outbox.hold(digest)
+            result = {"status": "coalesced", "message_id": digest["message_id"], "count": len(digest["entries"]), "send_at": digest["send_at"]}
+        
+        if overflow:
+            self._send(overflow)
+        return result
+
+    def status(self, message_id: str):
+        with self._lock:
+            self._start()
+            for digest in self._digests.values():
+                if digest["message_id"] == message_id:
+                    return {
+                        "status": "coalescing",
+                        "recipient": digest["recipient"],
+                        "notifications_merged": len(digest["entries"]),
+                        "send_at": digest["send_at"]
+                    }
+        return None
+
+    def flush_all(self):
+        """Send every open digest now (e.g. before shutdown)."""
+        with self._lock:
+            self._start()
+            digests, self._digests = list(self._digests.values()), OrderedDict()
+            self._deadlines = []
+        for digest in digests:
+            self._send(digest)
+
+    def _start(self):
+        # Caller holds self._lock. Reopens spooled digests and starts the scheduler on first use.
+        if self._thread is not None:
+            return
+        for digest in sorted(_outbox.held(), key=lambda digest: digest["deadline"]):
+            key = tuple(digest["key"])
+            self._digests[key] = digest
+            self._schedule(key, digest)
+        self._thread = threading.Thread(target=self._run, name="noc-email-coalescer", daemon=True)
+        self._thread.start()
+
+    def _schedule(self, key: tuple, digest: dict):
+        # Caller holds self._lock.
+        heapq.heappush(self._deadlines, (digest["deadline"], digest["message_id"], key))
+        self._lock.notify()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._deadlines or self._deadlines[0][0] > time.time():
+                    self._lock.wait(self._deadlines[0][0] - time.time() if self._deadlines else None)
+                _, message_id, key = heapq.heappop(self._deadlines)
+                digest = self._digests.get(key)
+                if digest is None or digest["message_id"] != message_id:
+                    continue  # already sent, bypassed or replaced
+                del self._digests[key]
+            try:
+                self._send(digest)
+            except Exception:
+                log.error("email.digest.failed", message_id=message_id, exc_info=True)
+
+    @staticmethod
+    def _send(digest: dict):
+        outage_type = "/".join(digest["outage_types"])
+        subject = _generate_subject(digest["severity_level"], outage_type, digest["affected_nodes"], digest["incident_number"])
+        body = _generate_email_body(
+            digest["severity_level"], outage_type, digest["affected_nodes"], digest["incident_number"], digest["include_details"]
+        )
+        count = len(digest["entries"])
+        if count > 1:
+            subject = f"[DIGEST x{count}] {subject}"
+            body += _generate_digest_section(digest["entries"])
+        _outbox.enqueue(digest["recipient"], subject, body, message_id=digest["message_id"])
+
+
+_coalescer = _NotificationCoalescer(NOTIFICATION_COALESCE_WINDOW, NOTIFICATION_COALESCE_MAX_KEYS)
+
+
+def _generate_digest_section(entries: list) -> str:
+    """List the individual notifications merged into a digest."""
+    lines = [f"• {e['received_at']} - {e['severity_level']} {e['outage_type'].upper()} - {e['affected_nodes']:,} affected" for e in entries]
+    return f"""
+
+MERGED NOTIFICATIONS ({len(entries)}):
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+""" + "\n".join(lines)
 
 
 def _generate_email_body(severity_level: str, outage_type: str, affected_nodes: int, incident_number: str, include_details: bool) -> str:
     """Generate email body content based on outage details."""
     
-    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
-    
-    base_body = f"""🚨 DISH NETWORK OPERATIONS CENTER ALERT 🚨
+    return render_notifications([{
+        "severity_level": severity_level,
+        "outage_type": outage_type,
+        "affected_nodes": affected_nodes,
+        "incident_number": incident_number,
+        "include_details": include_details
+    }])[0]["plain"]
+
+
+# Notification templates. Sections are joined and compiled once per
+# (severity response, include_details, format) by _compile_template.
+_BODY_HEADER = """${greeting}🚨 DISH NETWORK OPERATIONS CENTER ALERT 🚨
 
 INCIDENT DETAILS:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-🔥 Severity: {severity_level}
-📡 Outage Type: {outage_type.upper()}
-👥 Affected: {affected_nodes:,} customers/nodes
-⏰ Detection Time: {current_time}
-🎫 Incident Number: {incident_number or 'Not assigned'}
+🔥 Severity: ${severity_level}
+📡 Outage Type: ${outage_type_upper}
+👥 Affected: ${affected_nodes} customers/nodes
+⏰ Detection Time: ${current_time}
+🎫 Incident Number: ${incident_number_display}
 
 STATUS: 🔴 ACTIVE INCIDENT
 
 SUMMARY:
-A {outage_type} outage has been detected affecting {affected_nodes:,} network elements.
-This incident has been classified as {severity_level} priority and requires immediate attention.
+A ${outage_type} outage has been detected affecting ${affected_nodes} network elements.
+This incident has been classified as ${severity_level} priority and requires immediate attention.
 
 IMMEDIATE ACTIONS REQUIRED:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
-    
-    # Add severity-specific actions
-    if severity_level == "CRITICAL":
-        base_body += """
+
+# Severity-specific actions
+_RESPONSE_ACTIONS = {
+    "CRITICAL": """
 🚨 CRITICAL RESPONSE PROTOCOL:
 • IMMEDIATE escalation to senior NOC engineer
 • Page on-call infrastructure team
 • Activate emergency response procedures
 • Prepare customer communication
 • Notify executive management
-• Dispatch field technicians if required"""
-    elif severity_level == "HIGH":
-        base_body += """
+• Dispatch field technicians if required""",
+    "HIGH": """
 ⚠️ HIGH PRIORITY RESPONSE:
 • Escalate to NOC supervisor immediately
 • Notify infrastructure team
 • Monitor for further degradation
 • Prepare customer status update
-• Review backup systems"""
-    else:
-        base_body += """
+• Review backup systems""",
+    "STANDARD": """
 📋 STANDARD RESPONSE:
 • Continue monitoring situation
 • Log incident details thoroughly
 • Apply standard response procedures
 • Keep stakeholders informed"""
-    
-    if include_details:
-        base_body += f"""
+}
+
+_TECHNICAL_DETAILS = """
 
 TECHNICAL DETAILS:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 🔧 Detection System: Automated NOC Monitoring
 🌐 Affected Services: Network Infrastructure
 📍 Geographic Impact: Multiple regions
-🛠️ ServiceNow Incident: {incident_number or 'Being created'}
+🛠️ ServiceNow Incident: ${incident_number_servicenow}
 📊 Network Availability: Degraded"""
-    
-    base_body += f"""
+
+_BODY_FOOTER = """
 
 CONTACT INFORMATION:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -213,11 +953,67 @@ CONTACT INFORMATION:
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 This is an automated notification from Dish Network NOC System.
-Generated at: {current_time}
+Generated at: ${current_time}
 Sent via: IBM watsonx Orchestrate Agent System
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
-    
-    return base_body.strip()
+
+_HTML_WRAPPER = """<html><body><pre style="font-family: Menlo, Consolas, monospace; font-size: 13px;">{}</pre></body></html>"""
+
+
+@lru_cache(maxsize=None)
+def _compile_template(response: str, include_details: bool, fmt: str) -> Template:
+    """Assemble and compile the body template for one severity response, detail level and format."""
+    text = _BODY_HEADER + _RESPONSE_ACTIONS[response]
+    if include_details:
+        text += _TECHNICAL_DETAILS
+    text = (text + _BODY_FOOTER).strip()
+    if fmt == "html":
+        # Placeholders survive escaping; substituted values are escaped at render time
+        text = _HTML_WRAPPER.format(html.escape(text, quote=False))
+    return Template(text)
+
+
+def render_notifications(notifications: List[Dict[str, Any]], formats: tuple = ("plain",)) -> List[Dict[str, str]]:
+    """
+    Render many notification bodies in one call.
+
+    Each notification is a dict with severity_level, outage_type, affected_nodes,
+    incident_number and include_details, plus an optional team used to personalize
+    the greeting. The timestamp is taken once for the whole batch and each compiled
+    template is looked up once per (severity response, include_details, format).
+
+    Returns one dict per notification mapping each requested format ("plain",
+    "html") to its rendered body.
+    """
+    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')
+    rendered = []
+    for notification in notifications:
+        severity_level = notification["severity_level"]
+        outage_type = notification["outage_type"]
+        affected_nodes = f"{notification['affected_nodes']:,}"
+        incident_number = notification.get("incident_number")
+        team = notification.get("team")
+        response = severity_level if severity_level in ("CRITICAL", "HIGH") else "STANDARD"
+        include_details = bool(notification.get("include_details", True))
+        values = {
+            "greeting": f"Attention: {team}\n\n" if team else "",
+            "severity_level": severity_level,
+            "outage_type": outage_type,
+            "outage_type_upper": outage_type.upper(),
+            "affected_nodes": affected_nodes,
+            "current_time": current_time,
+            "incident_number_display": incident_number or 'Not assigned',
+            "incident_number_servicenow": incident_number or 'Being created'
+        }
+        bodies = {}
+        for fmt in formats:
+            template = _compile_template(response, include_details, fmt)
+            if fmt == "html":
+                bodies[fmt] = template.substitute({k: html.escape(v, quote=False) for k, v in values.items()})
+            else:
+                bodies[fmt] = template.substitute(values)
+        rendered.append(bodies)
+    return rendered
 
 
 # Test function for standalone testing
@@ -0,0 +1,170 @@
+"""
+Composite first-response snapshot of an incident for watsonx Orchestrate.
+
+Runs the server check, the network status lookup, log diagnosis and the blast-radius
+computation concurrently and returns them as one snapshot, so the first phase of an
+incident takes as long as the slowest of them instead of one agent round-trip each.
+
+The helpers come from the sibling tool modules, so import this tool with the package
+root option: orchestrate tools import -k python -f incident_snapshot_tool.py -p .
+"""
+
+from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List
+import re
+import time
+
+from check_server_status_tool import get_server_status
+from diagnose_incident_tool import IncidentCorrelator, classify_logs
+from network_data_tool import get_network_dataset
+from network_topology_tool import get_topology
+from noc_metrics import instrument_tool
+from noc_response import format_response
+
+
+SNAPSHOT_TIMEOUT = 20          # seconds to wait for all parts; late parts are reported as timed out
+SNAPSHOT_MAX_RECORDS = 10      # network records included per site
+SITE_URL_FIELDS = ("url", "management_url", "managementUrl", "host", "hostname", "management_ip", "ip")
+SNAPSHOT_TERSE_FIELDS = (   # fields kept by response_format="terse"
+    "target", "wall_ms",
+    "server.state", "server.status_code", "server.error",
+    "network.sites.*.match_count", "network.sites.*.summary.state", "network.error",
+    "diagnosis.root_cause", "diagnosis.cause_counts", "diagnosis.error",
+    "diagnosis.incidents.incident_key", "diagnosis.incidents.root_cause", "diagnosis.incidents.event_count",
+    "blast_radius.failure", "blast_radius.assumption", "blast_radius.affected_sites", "blast_radius.affected_site_count",
+    "blast_radius.affected_nodes", "blast_radius.ambiguous", "blast_radius.error"
+)
+
+SITE_ID_PATTERN = re.compile(r"\bS\d+\b", re.IGNORECASE)
+ROUTER_PATTERN = re.compile(r"\bR\d+\b")
+
+
+@instrument_tool
+@tool(
+    name="get_incident_snapshot",
+    description="First response to an incident in one call: checks the server, looks up the site's network status, diagnoses the log lines and computes the blast radius concurrently, and returns one merged snapshot.",
+    permission=ToolPermission.ADMIN
+)
+def get_incident_snapshot(target: str, log_lines: List[str] = None, timeout: int = SNAPSHOT_TIMEOUT, response_format: str = None, response_fields: List[str] = None) -> str:
+    """
+    Gathers server status, network status, diagnosis and blast radius for an incident at once.
+
+    Args:
+        target: Site ID (e.g. S002) or server URL of the incident
+        log_lines: Optional incident log lines to diagnose; site IDs and router links in them are looked up too
+        timeout: Seconds to wait for the slowest part before returning what is ready
+        response_format: Response detail: "compact" (default; no whitespace), "terse" (states, causes and counts only, no records or log details) or "full" (everything, indented)
+        response_fields: Dotted paths of the only fields to return, e.g. ["server.state", "blast_radius.affected_nodes"]; "*" matches any key, e.g. "network.sites.*.match_count"
+
+    Returns:
+        JSON string with server, network, diagnosis and blast_radius sections, per-part timings and total wall time
+    """
+    started = time.perf_counter()
+    log_lines = [line for line in (log_lines or []) if line and line.strip()]
+    target = target.strip()
+    is_site = bool(SITE_ID_PATTERN.fullmatch(target))
+
+    sites = list(dict.fromkeys([target.upper()] if is_site else []))
+    for line in log_lines:
+        sites.extend(site.upper() for site in SITE_ID_PATTERN.findall(line) if site.upper() not in sites)
+    link = None
+    for line in log_lines:
+        routers = list(dict.fromkeys(ROUTER_PATTERN.findall(line)))
+        if len(routers) >= 2:
+            link = routers[:2]
+            break
+
+    parts = {}
+    if is_site:
+        parts["server"] = lambda: _site_server_status(target.upper())
+    else:
+        parts["server"] = lambda: get_server_status(target, "headers")
+    if sites:
+        parts["network"] = lambda: _network_status(sites)
+    if log_lines:
+        parts["diagnosis"] = lambda: _diagnose(log_lines)
+    if link or sites:
+        parts["blast_radius"] = lambda: _blast_radius(link, sites[0] if sites else None)
+
+    # A pool per call: parts still running at the timeout finish on their own threads
+    # instead of holding workers that later snapshots need
+    executor = ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix="incident-snapshot")
+    futures = {name: executor.submit(_timed, part) for name, part in parts.items()}
+    wait(futures.values(), timeout=max(timeout, 1))
+    executor.shutdown(wait=False)
+
+    snapshot = {"target": target, "timings_ms": {}}
+    for name, future in futures.items():
+        if not future.done():
+            snapshot[name] = {"error": f"timed out after {timeout}s"}
+            continue
+        try:
+            snapshot[name], snapshot["timings_ms"][name] = future.result()
+        except Exception as e:
+            snapshot[name] = {"error": str(e)}
+    snapshot["wall_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return format_response(snapshot, response_format, response_fields, SNAPSHOT_TERSE_FIELDS, "get_incident_snapshot")
+
+
+def _timed(part) -> tuple:
+    started = time.perf_counter()
+    result = part()
+    return result, round((time.perf_counter() - started) * 1000, 1)
+
+
+def _site_server_status(site_id: str) -> dict:
+    """Probe the management address recorded for a site, if the network data has one."""
+    dataset = get_network_dataset()
+    for position in dataset.query(site_id=site_id):
+        record = dataset.records[position]
+        for field in SITE_URL_FIELDS:
+            address = record.get(field)
+            if isinstance(address, str) and address.strip():
+                return get_server_status(address, "headers")
+    return {"state": "UNKNOWN", "error": f"No server address recorded for {site_id}"}
+
+
+def _network_status(sites: list) -> dict:
+    dataset = get_network_dataset()
+    status = {"dataset": dataset.info(), "sites": {}}
+    for site_id in sites:
+        matches = dataset.query(site_id=site_id)
+        status["sites"][site_id] = {
+            "match_count": len(matches),
+            "summary": dataset.summary(matches),
+            "records": [dataset.records[i] for i in matches[:SNAPSHOT_MAX_RECORDS]]
+        }
+    return status
+
+
+def _diagnose(log_lines: list) -> dict:
+    diagnoses = classify_logs(log_lines)
+    counts = {}
+    for diagnosis in diagnoses:
+        counts[diagnosis["root_cause"]] = counts.get(diagnosis["root_cause"], 0) + 1
+    known = {cause: count for cause, count in counts.items() if cause != "Unknown"}
+    result = {
+        "root_cause": max(known, key=known.get) if known else "Unknown",
+        "cause_counts": counts,
+        "logs": [
+            {"root_cause": diagnosis["root_cause"], "confidence": diagnosis["confidence"], "method": diagnosis["method"]}
+            for diagnosis in diagnoses
+        ]
+    }
+    if len(log_lines) > 1:
+        correlator = IncidentCorrelator()
+        result["incidents"] = correlator.add(log_lines) + correlator.flush()
+    return result
+
+
+def _blast_radius(link: list, site_id: str) -> dict:
+    """Blast radius of the failed link in the logs, or else of the site itself going down."""
+    graph = get_topology()
+    if link and all(router in graph.index for router in link):
+        return graph.blast_radius(links=[link])
+    if site_id and site_id in graph.index:
+        result = graph.blast_radius(nodes=[site_id])
+        result["assumption"] = f"No failed link in the log lines; this is what {site_id} itself going down cuts off"
+        return result
+    return {"error": "Failed link or site not found in the network topology"}
@@ -4,12 +4,26 @@ Connects to actual Jira instance using REST API for incident management
 """
 
 from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
-from typing import Dict, Any
-import json
+from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from urllib.parse import urlsplit
 import os
 import base64
+import itertools
+import random
+import re
+import threading
+import time
+
+from noc_logging import get_logger
+from noc_metrics import instrument_tool, observe_call
+from noc_response import format_response
 
 # Load environment variables
 
@@ -24,6 +38,49 @@ JIRA_PRIORITY_HIGH="High"
 JIRA_PRIORITY_MEDIUM="Medium"
 JIRA_PRIORITY_LOW="Low"
 
+# Shared HTTP connection pool for all Jira calls
+JIRA_POOL_CONNECTIONS = 4   # number of per-host pools to keep
+JIRA_POOL_MAXSIZE = 16      # keep-alive connections kept per host
+JIRA_POOL_BLOCK = True      # wait for a free connection instead of exceeding JIRA_POOL_MAXSIZE per host
+
+# Request scheduler shared by all Jira calls (Atlassian rate limits)
+JIRA_RATE_LIMIT = 10.0            # sustained requests per second (token bucket refill rate)
+JIRA_RATE_BURST = 20              # token bucket capacity
+JIRA_MAX_IN_FLIGHT = 8            # concurrent requests; keep <= JIRA_POOL_MAXSIZE
+JIRA_MAX_RETRIES = 4              # retries after 429/503 (and connection errors on GET)
+JIRA_BACKOFF_BASE = 0.5           # seconds, doubled per retry, full jitter applied
+JIRA_BACKOFF_MAX = 30.0           # ceiling for a single backoff or Retry-After wait
+
+# Bulk issue creation
+JIRA_BULK_CHUNK_SIZE = 50         # Jira accepts at most 50 issues per bulk request
+JIRA_BULK_MAX_PARALLEL = 4        # bulk chunks sent concurrently
+
+# Paginated search
+JIRA_SEARCH_PAGE_SIZE = 100       # issues requested per page
+JIRA_SEARCH_PARALLEL_PAGES = 4    # pages fetched concurrently once the total is known
+JIRA_SEARCH_MAX_RESULTS = 1000    # hard cap on issues returned by one search action
+JIRA_SEARCH_DEFAULT_FIELDS = ["summary", "status", "priority", "assignee", "created"]
+
+# Metadata cache for assignee account IDs, workflow transitions and priority mappings
+JIRA_METADATA_TTL = 3600          # seconds before a cached lookup is refreshed
+JIRA_METADATA_MAX_ENTRIES = 256   # least recently used entries are evicted beyond this
+
+# Fields kept by response_format="terse"
+JIRA_TERSE_FIELDS = (
+    "status", "action", "issue_key", "priority", "created", "failed", "count", "scheduler",
+    "results.index", "results.issue_key", "results.error",
+    "issue.key", "issue.summary", "issue.status", "issue.priority",
+    "issues.key", "issues.summary", "issues.status", "issues.priority"
+)
+
+_JIRA_PATH_ID = re.compile(r"/(?:[A-Z][A-Z0-9]+-\d+|\d+)(?=/|$)")  # issue keys and numeric IDs in REST paths
+
+log = get_logger("jira")
+
+_session = None
+_session_lock = threading.Lock()
+
+@instrument_tool
 @tool(
     name="jira_connector_simple", 
     description="Create and manage Jira issues for Dish Network NOC operations via real Jira API",
@@ -37,13 +94,20 @@ def manage_jira_issue(
     issue_key: str = None,
     description: str = None,
     customer_impact: str = None,
-    location: str = None
+    location: str = None,
+    records: List[Dict[str, Any]] = None,
+    jql: str = None,
+    fields: List[str] = None,
+    max_results: int = 100,
+    confirm: bool = True,
+    response_format: str = None,
+    response_fields: List[str] = None
 ) -> str:
     """
     Create, update, or query Jira issues for network outages using real Jira REST API.
     
     Args:
-        action: Action to perform (create, update, close, query)
+        action: Action to perform (create, bulk_create, update, close, query, search, stats)
         severity_level: Severity level (LOW, MEDIUM, HIGH, CRITICAL)
         outage_type: Type of outage (satellite, ground, fiber, power, equipment)
         affected_nodes: Number of affected network nodes or customers (int or str)
@@ -51,6 +115,13 @@ def manage_jira_issue(
         description: Detailed issue description
         customer_impact: Description of customer impact
         location: Geographic location or network area affected
+        records: Outage records for bulk_create; each may set severity_level, outage_type, affected_nodes, description, customer_impact and location (missing values fall back to the arguments above)
+        jql: JQL for the search action (defaults to all network-outage issues in the project, newest first)
+        fields: Jira fields to return for each issue in the search action (defaults to summary, status, priority, assignee, created)
+        max_results: Maximum number of issues returned by the search action (capped at JIRA_SEARCH_MAX_RESULTS)
+        confirm: For update/close, read back the issue summary and status after the change (set false to save a round-trip)
+        response_format: Response detail: "compact" (default; no whitespace or debug detail), "terse" (issue keys and statuses only) or "full" (everything, indented)
+        response_fields: Dotted paths of the only fields to return, e.g. ["count", "issues.key", "issues.status"]
     
     Returns:
         JSON string with Jira issue management results
@@ -67,16 +138,8 @@ def manage_jira_issue(
     # Jira API base URL
     base_url = f"{instance_url.rstrip('/')}/rest/api/3"
     
-    # Create authentication headers
-    auth_string = f"{username}:{api_token}"
-    auth_bytes = auth_string.encode('ascii')
-    auth_b64 = base64.b64encode(auth_bytes).decode('ascii')
-    
-    headers = {
-        'Content-Type': 'application/json',
-        'Accept': 'application/json',
-        'Authorization': f'Basic {auth_b64}'
-    }
+    # Authentication headers are built once per credential pair
+    headers = dict(_auth_headers(username, api_token))
     
     # Convert affected_nodes to integer if it's a string
     try:
@@ -85,12 +148,7 @@ def manage_jira_issue(
         affected_nodes = 0
     
     # Map severity to Jira priority
-    priority_mapping = {
-        "CRITICAL": os.getenv('JIRA_PRIORITY_CRITICAL', 'Highest'),
-        "HIGH": os.getenv('JIRA_PRIORITY_HIGH', 'High'),
-        "MEDIUM": os.getenv('JIRA_PRIORITY_MEDIUM', 'Medium'),
-        "LOW": os.getenv('JIRA_PRIORITY_LOW', 'Low')
-    }
+    priority_mapping = _priority_mapping()
     
     # Add debug logging
     debug_info = {
@@ -106,29 +164,378 @@ def manage_jira_issue(
     try:
         if action.lower() == "create":
             result = _create_jira_issue(base_url, headers, severity_level, outage_type, affected_nodes, description, customer_impact, location, priority_mapping, project_key, issue_type, assignee)
-            return result
+        elif action.lower() == "bulk_create":
+            defaults = {
+                "severity_level": severity_level,
+                "outage_type": outage_type,
+                "affected_nodes": affected_nodes,
+                "description": description,
+                "customer_impact": customer_impact,
+                "location": location
+            }
+            result = _bulk_create_jira_issues(base_url, headers, records, defaults, priority_mapping, project_key, issue_type, assignee)
         elif action.lower() == "update":
-            return _update_jira_issue(base_url, headers, issue_key, description)
+            result = _update_jira_issue(base_url, headers, issue_key, description, confirm)
         elif action.lower() == "close":
-            return _close_jira_issue(base_url, headers, issue_key, description)
+            result = _close_jira_issue(base_url, headers, issue_key, description, confirm)
         elif action.lower() == "query":
-            return _query_jira_issue(base_url, headers, issue_key, project_key)
+            result = _query_jira_issue(base_url, headers, issue_key, project_key)
+        elif action.lower() == "stats":
+            result = {
+                "status": "success",
+                "action": "stats",
+                "scheduler": get_jira_scheduler_stats()
+            }
+        elif action.lower() == "search":
+            result = _search_jira_issues(base_url, headers, jql or _default_jql(project_key), fields, max_results)
         else:
-            return json.dumps({
-                "error": f"Invalid action: {action}. Valid actions: create, update, close, query",
+            result = {
+                "error": f"Invalid action: {action}. Valid actions: create, bulk_create, update, close, query, search, stats",
                 "debug_info": debug_info
-            })
+            }
     except Exception as e:
-        return json.dumps({
+        result = {
             "error": f"Jira API error: {str(e)}",
             "action": action,
             "debug_info": debug_info,
             "timestamp": datetime.now().isoformat()
-        })
+        }
+    return format_response(result, response_format, response_fields, JIRA_TERSE_FIELDS, "jira_connector_simple")
 
 
-def _create_jira_issue(base_url: str, headers: dict, severity_level: str, outage_type: str, affected_nodes: int, description: str, customer_impact: str, location: str, priority_mapping: dict, project_key: str, issue_type: str, assignee: str) -> str:
-    """Create a new Jira issue via real Jira REST API."""
+def _get_session() -> requests.Session:
+    """Return the process-wide keep-alive session shared by all Jira calls."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=JIRA_POOL_CONNECTIONS,
+                    pool_maxsize=JIRA_POOL_MAXSIZE,
+                    pool_block=JIRA_POOL_BLOCK
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+class _JiraScheduler:
+    """
+    Token-bucket scheduler for outbound Jira requests.
+
+    Every request takes a token (JIRA_RATE_LIMIT per second, bursts up to
+    JIRA_RATE_BURST) and an in-flight slot (JIRA_MAX_IN_FLIGHT). A 429 or 503 pauses
+    all callers until Retry-After has elapsed (or a jittered exponential backoff when
+    the header is missing) and the request is retried, so throttling slows the whole
+    process down instead of triggering a retry storm.
+    """
+
+    def __init__(self, rate: float, burst: int, max_in_flight: int, max_retries: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._stats = {"requests": 0, "queued": 0, "throttled": 0, "retried": 0, "failed": 0, "in_flight": 0}
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                with observe_call("jira", _jira_operation(method, url)) as call:
+                    response = _get_session().request(method, url, **kwargs)
+                    call.sent_bytes = len(response.request.body or b"")
+                    call.received_bytes = len(response.content)
+                    call.error = response.status_code >= 400
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                # Only GETs are retried; a POST may already have been applied by Jira
+                if method.upper() != "GET" or attempt >= self.max_retries:
+                    self._count("failed")
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in (429, 503):
+                    return response
+                self._count("throttled")
+                if attempt >= self.max_retries:
+                    self._count("failed")
+                    return response
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                with self._lock:
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            finally:
+                self._release()
+            self._count("retried")
+            attempt += 1
+            time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, tokens=round(self._tokens, 2))
+
+    def _acquire(self):
+        waited = False
+        if not self._slots.acquire(blocking=False):
+            waited = True
+            self._slots.acquire()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+                self._refilled_at = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    self._stats["requests"] += 1
+                    self._stats["in_flight"] += 1
+                    if waited:
+                        self._stats["queued"] += 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            waited = True
+            time.sleep(wait)
+
+    def _release(self):
+        with self._lock:
+            self._stats["in_flight"] -= 1
+        self._slots.release()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return random.uniform(0, min(JIRA_BACKOFF_MAX, JIRA_BACKOFF_BASE * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(response: requests.Response):
+        """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        # A little jitter keeps throttled callers from resuming in lockstep
+        return min(JIRA_BACKOFF_MAX, max(0.0, delay)) + random.uniform(0, JIRA_BACKOFF_BASE)
+
+
+_scheduler = _JiraScheduler(JIRA_RATE_LIMIT, JIRA_RATE_BURST, JIRA_MAX_IN_FLIGHT, JIRA_MAX_RETRIES)
+
+
+def _jira_request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a Jira request through the shared rate-limit scheduler and connection pool."""
+    return _scheduler.request(method, url, **kwargs)
+
+
+def _jira_operation(method: str, url: str) -> str:
+    """Metric label for a Jira call: method and REST path with issue keys and IDs masked."""
+    path = urlsplit(url).path.split("/rest/api/3", 1)[-1]
+    return f"{method.upper()} {_JIRA_PATH_ID.sub('/{id}', path)}"
+
+
+def get_jira_scheduler_stats() -> dict:
+    """Counters for requests sent, queued, throttled (429/503), retried and failed."""
+    return _scheduler.stats()
+
+
+@lru_cache(maxsize=8)
+def _auth_headers(username: str, api_token: str) -> tuple:
+    """Build the Basic auth and JSON headers for a credential pair."""
+    auth_string = f"{username}:{api_token}"
+    auth_bytes = auth_string.encode('ascii')
+    auth_b64 = base64.b64encode(auth_bytes).decode('ascii')
+    
+    return (
+        ('Content-Type', 'application/json'),
+        ('Accept', 'application/json'),
+        ('Authorization', f'Basic {auth_b64}')
+    )
+
+
+class JiraAPIError(Exception):
+    """Raised by streaming helpers when Jira answers with an unexpected HTTP status."""
+
+    def __init__(self, status_code: int, details: str):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.details = details
+
+
+class _TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None if the key is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self, kind: str = None):
+        """Drop all entries, or only those whose key starts with kind."""
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == kind]:
+                    del self._entries[key]
+
+
+_metadata_cache = _TTLCache(JIRA_METADATA_TTL, JIRA_METADATA_MAX_ENTRIES)
+
+
+def invalidate_jira_metadata(kind: str = None):
+    """
+    Drop cached Jira metadata so the next call fetches it again.
+
+    Args:
+        kind: "account", "transition", "issue_state", "created_type", "initial_status" or "priority"; None clears everything
+    """
+    _metadata_cache.invalidate(kind)
+
+
+def _priority_mapping() -> dict:
+    """Map severity to Jira priority name, read from the environment once per TTL."""
+    mapping = _metadata_cache.get(("priority",))
+    if mapping is None:
+        mapping = {
+            "CRITICAL": os.getenv('JIRA_PRIORITY_CRITICAL', 'Highest'),
+            "HIGH": os.getenv('JIRA_PRIORITY_HIGH', 'High'),
+            "MEDIUM": os.getenv('JIRA_PRIORITY_MEDIUM', 'Medium'),
+            "LOW": os.getenv('JIRA_PRIORITY_LOW', 'Low')
+        }
+        _metadata_cache.set(("priority",), mapping)
+    return mapping
+
+
+def _resolve_account_id(base_url: str, headers: dict, assignee: str):
+    """Look up the Jira account ID for an assignee email, cached per assignee."""
+    cached = _metadata_cache.get(("account", assignee))
+    if cached is not None:
+        return cached or None
+    
+    user_response = _jira_request("GET", f"{base_url}/user/search", headers=headers, params={"query": assignee}, timeout=30)
+    if user_response.status_code != 200:
+        return None
+    users = user_response.json()
+    account_id = users[0].get('accountId') if users else None
+    # An empty string caches "no such user" so unknown assignees are not searched every time
+    _metadata_cache.set(("account", assignee), account_id or "")
+    return account_id
+
+
+def _remember_issue_state(issue_key: str, fields: dict):
+    """Cache the issue type and status read from an issue, which select its workflow transitions."""
+    issue_type = (fields.get('issuetype') or {}).get('name')
+    status = (fields.get('status') or {}).get('name')
+    if issue_key and issue_type and status:
+        _metadata_cache.set(("issue_state", issue_key), (issue_type, status))
+
+
+def _remember_created_issue(project_key: str, issue_key: str, issue_type: str):
+    """
+    Record the type of an issue created here. Every new issue of a type starts in the
+    same workflow status, so once that status has been seen (on the first close of
+    such an issue) later new issues of the type get their state without a read.
+    """
+    initial_status = _metadata_cache.get(("initial_status", project_key, issue_type))
+    if initial_status is not None:
+        _metadata_cache.set(("issue_state", issue_key), (issue_type, initial_status))
+    else:
+        _metadata_cache.set(("created_type", issue_key), issue_type)
+
+
+def _resolve_close_transition(base_url: str, headers: dict, issue_key: str):
+    """
+    Find the Done/Resolved/Closed transition for an issue.
+
+    The transitions on offer depend on the issue's type and current status, so
+    transition IDs are cached per (project, issue type, status). When the issue's type
+    and status are known (from an earlier read, or for an issue created here once its
+    type's initial status is known), a cached transition needs no lookup; otherwise
+    they are read together with the issue's transitions in one request.
+    Returns (transition, available_transition_names, error_response, cache_key).
+    """
+    project = issue_key.split('-')[0]
+    state = _metadata_cache.get(("issue_state", issue_key))
+    if state is not None:
+        cache_key = ("transition", project) + tuple(state)
+        cached = _metadata_cache.get(cache_key)
+        if cached is not None:
+            return cached, None, None, cache_key
+    
+    issue_response = _jira_request("GET", f"{base_url}/issue/{issue_key}", headers=headers, params={"fields": "issuetype,status", "expand": "transitions"}, timeout=30)
+    if issue_response.status_code != 200:
+        return None, None, issue_response, None
+    
+    issue = issue_response.json()
+    fields = issue.get('fields', {})
+    _remember_issue_state(issue_key, fields)
+    created_type = _metadata_cache.get(("created_type", issue_key))
+    if created_type is not None and created_type == (fields.get('issuetype') or {}).get('name'):
+        _metadata_cache.set(("initial_status", project, created_type), (fields.get('status') or {}).get('name'))
+        _metadata_cache.discard(("created_type", issue_key))
+    cache_key = ("transition", project, (fields.get('issuetype') or {}).get('name'), (fields.get('status') or {}).get('name'))
+    transitions = issue.get('transitions', [])
+    
+    # Look for a "Done", "Resolved", or "Closed" transition
+    for transition in transitions:
+        transition_name = transition.get('name', '').lower()
+        if any(keyword in transition_name for keyword in ['done', 'resolved', 'closed', 'complete']):
+            close_transition = {
+                "id": transition.get('id'),
+                "name": transition.get('name'),
+                "to": (transition.get('to') or {}).get('name')
+            }
+            _metadata_cache.set(cache_key, close_transition)
+            return close_transition, None, None, cache_key
+    
+    return None, [t.get('name') for t in transitions], None, cache_key
+
+
+def _browse_url(base_url: str, issue_key: str) -> str:
+    """Browser link for an issue, derived from the REST base URL."""
+    return f"{base_url.split('/rest/')[0]}/browse/{issue_key}"
+
+
+def _build_issue_payload(severity_level: str, outage_type: str, affected_nodes: int, description: str, customer_impact: str, location: str, priority_mapping: dict, project_key: str, issue_type: str, account_id: str = None) -> tuple:
+    """Build the Jira issue payload for an outage. Returns (payload, summary, priority_name)."""
     
     # Build Jira issue payload
     priority_name = priority_mapping.get(severity_level.upper(), 'Medium')
@@ -190,18 +597,8 @@ def _create_jira_issue(base_url: str, headers: dict, severity_level: str, outage
         }
     }
     
-    # Only add assignee if we can resolve the account ID
-    try:
-        # Get user account ID from email
-        user_search_url = f"{os.getenv('JIRA_INSTANCE_URL')}/rest/api/3/user/search"
-        user_response = requests.get(user_search_url, headers=headers, params={"query": assignee}, timeout=30)
-        if user_response.status_code == 200:
-            users = user_response.json()
-            if users:
-                account_id = users[0].get('accountId')
-                payload["fields"]["assignee"] = {"accountId": account_id}
-    except Exception as e:
-        print(f"Warning: Could not set assignee: {e}")
+    if account_id:
+        payload["fields"]["assignee"] = {"accountId": account_id}
     
     # Add additional info in description since we can't use custom fields
     extended_description = f"""{description}
@@ -213,11 +610,29 @@ def _create_jira_issue(base_url: str, headers: dict, severity_level: str, outage
     
     payload["fields"]["description"]["content"][0]["content"][0]["text"] = extended_description
     
+    return payload, summary, priority_name
+
+
+def _create_jira_issue(base_url: str, headers: dict, severity_level: str, outage_type: str, affected_nodes: int, description: str, customer_impact: str, location: str, priority_mapping: dict, project_key: str, issue_type: str, assignee: str) -> dict:
+    """Create a new Jira issue via real Jira REST API."""
+    
+    # Only add assignee if we can resolve the account ID
+    account_id = None
+    try:
+        account_id = _resolve_account_id(base_url, headers, assignee)
+    except Exception as e:
+        log.warning("jira.assignee.unresolved", assignee=assignee, error=str(e))
+    
+    payload, summary, priority_name = _build_issue_payload(
+        severity_level, outage_type, affected_nodes, description, customer_impact, location,
+        priority_mapping, project_key, issue_type, account_id
+    )
+    
     try:
         # Call Jira REST API
-        print(f"🔧 Creating Jira issue with payload: {json.dumps(payload, indent=2)}")
-        response = requests.post(f"{base_url}/issue", json=payload, headers=headers, timeout=30)
-        print(f"📡 Jira Response: {response.status_code} - {response.text}")
+        log.debug("jira.issue.create.request", project=project_key, payload=lambda: payload)
+        response = _jira_request("POST", f"{base_url}/issue", json=payload, headers=headers, timeout=30)
+        log.debug("jira.issue.create.response", status=response.status_code, body=lambda: response.text)
         
         if response.status_code == 201:
             result = response.json()
@@ -233,19 +648,20 @@ def _create_jira_issue(base_url: str, headers: dict, severity_level: str, outage
                 "assignee": assignee,
                 "summary": summary,
                 "created": datetime.now().isoformat(),
-                "jira_url": f"{instance_url}/browse/{issue_key}",
+                "jira_url": _browse_url(base_url, issue_key),
                 "message": f"✅ Issue {issue_key} created successfully in Jira"
             }
-            print(f"✅ SUCCESS: {json.dumps(success_response, indent=2)}")
-            return json.dumps(success_response)
+            _remember_created_issue(project_key, issue_key, issue_type)
+            log.info("jira.issue.created", issue_key=issue_key, priority=priority_name, status=response.status_code)
+            return success_response
         else:
             error_response = {
                 "error": f"Failed to create issue: HTTP {response.status_code}",
                 "details": response.text,
                 "payload_sent": payload
             }
-            print(f"❌ ERROR: {json.dumps(error_response, indent=2)}")
-            return json.dumps(error_response)
+            log.warning("jira.issue.create.failed", project=project_key, status=response.status_code, details=lambda: response.text)
+            return error_response
             
     except requests.exceptions.RequestException as e:
         error_response = {
@@ -253,172 +669,316 @@ def _create_jira_issue(base_url: str, headers: dict, severity_level: str, outage
             "details": str(e),
             "suggestion": "Check JIRA_INSTANCE_URL and network connectivity"
         }
-        print(f"❌ CONNECTION ERROR: {json.dumps(error_response, indent=2)}")
-        return json.dumps(error_response)
+        log.error("jira.connection.failed", operation="POST /issue", error=str(e))
+        return error_response
+
 
+def _bulk_create_jira_issues(base_url: str, headers: dict, records: list, defaults: dict, priority_mapping: dict, project_key: str, issue_type: str, assignee: str) -> dict:
+    """
+    Create many Jira issues through the bulk endpoint (POST /issue/bulk).
 
-def _update_jira_issue(base_url: str, headers: dict, issue_key: str, comment: str) -> str:
-    """Update an existing Jira issue via REST API."""
+    Records are sent in chunks of JIRA_BULK_CHUNK_SIZE, up to JIRA_BULK_MAX_PARALLEL
+    chunks at a time. Each record may override severity_level, outage_type,
+    affected_nodes, description, customer_impact and location; missing values fall
+    back to the tool arguments.
+    """
+    
+    if not records:
+        return {"error": "records is required for bulk_create action"}
+    
+    account_id = None
+    try:
+        account_id = _resolve_account_id(base_url, headers, assignee)
+    except Exception as e:
+        log.warning("jira.assignee.unresolved", assignee=assignee, error=str(e))
+    
+    results = [None] * len(records)
+    payloads = []
+    for index, record in enumerate(records):
+        fields = dict(defaults)
+        fields.update({k: v for k, v in (record or {}).items() if k in defaults and v is not None})
+        try:
+            fields["affected_nodes"] = int(fields["affected_nodes"]) if fields["affected_nodes"] else 0
+        except (ValueError, TypeError):
+            fields["affected_nodes"] = 0
+        if not fields["severity_level"] or not fields["outage_type"]:
+            results[index] = {"index": index, "error": "severity_level and outage_type are required"}
+            continue
+        payload, summary, _ = _build_issue_payload(
+            fields["severity_level"], fields["outage_type"], fields["affected_nodes"], fields["description"],
+            fields["customer_impact"], fields["location"], priority_mapping, project_key, issue_type, account_id
+        )
+        payloads.append((index, summary, payload))
+    
+    chunks = [payloads[i:i + JIRA_BULK_CHUNK_SIZE] for i in range(0, len(payloads), JIRA_BULK_CHUNK_SIZE)]
+    
+    def send_chunk(chunk):
+        # Errors stay with this chunk's records so other chunks' created issues are still reported
+        try:
+            _send_chunk(chunk)
+        except Exception as e:
+            log.error("jira.bulk.chunk.failed", records=len(chunk), error=repr(e))
+            for index, _, _ in chunk:
+                if results[index] is None:
+                    results[index] = {"index": index, "error": f"Bulk request failed, issues may have been created: {e}"}
+    
+    def _send_chunk(chunk):
+        try:
+            response = _jira_request(
+                "POST",
+                f"{base_url}/issue/bulk",
+                json={"issueUpdates": [payload for _, _, payload in chunk]},
+                headers=headers,
+                timeout=60
+            )
+        except requests.exceptions.RequestException as e:
+            for index, _, _ in chunk:
+                results[index] = {"index": index, "error": f"Cannot connect to Jira instance: {e}"}
+            return
+        
+        try:
+            body = response.json() if response.text else {}
+        except ValueError:  # also requests' JSONDecodeError
+            body = None
+        failed = {}
+        for error in (body or {}).get('errors', []):
+            element_errors = error.get('elementErrors', {})
+            message = element_errors.get('errors') or element_errors.get('errorMessages') or f"HTTP {error.get('status')}"
+            failed[error.get('failedElementNumber')] = message
+        
+        if 400 <= response.status_code < 500:
+            # Jira rejected the whole request: nothing in this chunk was created
+            for position, (index, _, _) in enumerate(chunk):
+                reason = failed.get(position) or ("rejected with the rest of the request" if failed else response.text)
+                results[index] = {"index": index, "error": f"Not created (HTTP {response.status_code}): {reason}"}
+            return
+        if response.status_code not in (200, 201) or body is None:
+            for index, _, _ in chunk:
+                results[index] = {"index": index, "error": f"HTTP {response.status_code}, issues may have been created", "details": response.text}
+            return
+        
+        # Jira lists created issues in request order, skipping the failed elements
+        created = iter(body.get('issues', []))
+        for position, (index, summary, _) in enumerate(chunk):
+            if position in failed:
+                results[index] = {"index": index, "error": failed[position]}
+                continue
+            issue = next(created, None)
+            if issue is None:
+                results[index] = {"index": index, "error": "No issue returned for record"}
+                continue
+            _remember_created_issue(project_key, issue.get('key'), issue_type)
+            results[index] = {
+                "index": index,
+                "issue_key": issue.get('key'),
+                "issue_id": issue.get('id'),
+                "summary": summary,
+                "jira_url": _browse_url(base_url, issue.get('key'))
+            }
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(JIRA_BULK_MAX_PARALLEL, len(chunks)))) as pool:
+        list(pool.map(send_chunk, chunks))
+    
+    created_count = sum(1 for r in results if r and "issue_key" in r)
+    failed_count = len(results) - created_count
+    result = {
+        "status": "success" if failed_count == 0 else ("partial" if created_count else "failed"),
+        "action": "bulk_create",
+        "created": created_count,
+        "failed": failed_count,
+        "results": results
+    }
+    if created_count:
+        result["message"] = f"✅ Created {created_count} of {len(results)} issue(s) in Jira"
+    else:
+        result["error"] = f"No issues confirmed as created in Jira ({failed_count} record(s) failed)"
+    return result
+
+
+def _adf_text(text: str) -> dict:
+    """Wrap plain text in a single-paragraph Atlassian Document Format body."""
+    return {
+        "type": "doc",
+        "version": 1,
+        "content": [
+            {
+                "type": "paragraph",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": text
+                    }
+                ]
+            }
+        ]
+    }
+
+
+def _read_issue_summary(base_url: str, headers: dict, issue_key: str) -> dict:
+    """Fetch only summary and status of an issue; returns {} if the read fails."""
+    response = _jira_request("GET", f"{base_url}/issue/{issue_key}", headers=headers, params={"fields": "summary,status"}, timeout=30)
+    if response.status_code != 200:
+        return {}
+    fields = response.json().get('fields', {})
+    return {"summary": fields.get('summary'), "status": (fields.get('status') or {}).get('name')}
+
+
+def _update_jira_issue(base_url: str, headers: dict, issue_key: str, comment: str, confirm: bool = True) -> dict:
+    """
+    Update an existing Jira issue via REST API.
+
+    The comment POST and the summary/status read-back are independent, so they run
+    in parallel; with confirm=False the read-back is skipped entirely.
+    """
     
     if not issue_key:
-        return json.dumps({"error": "issue_key is required for update action"})
+        return {"error": "issue_key is required for update action"}
     
     # Add comment to the issue
     comment_payload = {
-        "body": {
-            "type": "doc",
-            "version": 1,
-            "content": [
-                {
-                    "type": "paragraph",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": comment or f"Issue updated by NOC automation at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                        }
-                    ]
-                }
-            ]
-        }
+        "body": _adf_text(comment or f"Issue updated by NOC automation at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     }
     
     try:
-        # Add comment to the issue
-        response = requests.post(f"{base_url}/issue/{issue_key}/comment", json=comment_payload, headers=headers, timeout=30)
+        if confirm:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                comment_future = pool.submit(_jira_request, "POST", f"{base_url}/issue/{issue_key}/comment", json=comment_payload, headers=headers, timeout=30)
+                issue_future = pool.submit(_read_issue_summary, base_url, headers, issue_key)
+                response = comment_future.result()
+                issue_data = issue_future.result()
+        else:
+            response = _jira_request("POST", f"{base_url}/issue/{issue_key}/comment", json=comment_payload, headers=headers, timeout=30)
+            issue_data = {}
         
         if response.status_code == 201:
-            # Get updated issue details
-            issue_response = requests.get(f"{base_url}/issue/{issue_key}", headers=headers, timeout=30)
-            if issue_response.status_code == 200:
-                issue_data = issue_response.json()
-                return json.dumps({
-                    "status": "success", 
-                    "action": "update",
-                    "issue_key": issue_key,
-                    "summary": issue_data.get('fields', {}).get('summary'),
-                    "status": issue_data.get('fields', {}).get('status', {}).get('name'),
-                    "comment_added": comment,
-                    "message": f"✅ Issue {issue_key} updated successfully",
-                    "updated_on": datetime.now().isoformat(),
-                    "jira_url": f"{os.getenv('JIRA_INSTANCE_URL')}/browse/{issue_key}"
-                })
+            result = {
+                "status": "success", 
+                "action": "update",
+                "issue_key": issue_key,
+                "comment_added": comment,
+                "message": f"✅ Issue {issue_key} updated successfully",
+                "updated_on": datetime.now().isoformat(),
+                "jira_url": _browse_url(base_url, issue_key)
+            }
+            # Like the full read-back, the Jira status replaces "success" when it is known
+            result.update({k: v for k, v in issue_data.items() if v})
+            return result
         
-        return json.dumps({
+        return {
             "error": f"Failed to update issue: HTTP {response.status_code}",
             "details": response.text
-        })
+        }
             
     except requests.exceptions.RequestException as e:
-        return json.dumps({
+        return {
             "error": "Cannot connect to Jira instance",
             "details": str(e)
-        })
+        }
+
 
+def _close_jira_issue(base_url: str, headers: dict, issue_key: str, resolution_comment: str, confirm: bool = True) -> dict:
+    """
+    Close a Jira issue via REST API.
 
-def _close_jira_issue(base_url: str, headers: dict, issue_key: str, resolution_comment: str) -> str:
-    """Close a Jira issue via REST API."""
+    The resolution comment rides along in the transition request itself, and the
+    transition ID comes from the metadata cache. A warm close, of an issue whose type
+    and status are known (queried before, or created here after an earlier close of
+    a new issue of its type), is one round-trip plus an optional summary/status
+    read-back (skipped with confirm=False); otherwise a GET of the issue's state and
+    transitions comes first.
+    """
     
     if not issue_key:
-        return json.dumps({"error": "issue_key is required for close action"})
+        return {"error": "issue_key is required for close action"}
     
     try:
-        # First, get available transitions for the issue
-        transitions_response = requests.get(f"{base_url}/issue/{issue_key}/transitions", headers=headers, timeout=30)
+        # First, find the close transition (cached per project, issue type and status)
+        close_transition, available_transitions, transitions_response, cache_key = _resolve_close_transition(base_url, headers, issue_key)
         
-        if transitions_response.status_code != 200:
-            return json.dumps({
+        if transitions_response is not None:
+            return {
                 "error": f"Failed to get transitions: HTTP {transitions_response.status_code}",
                 "details": transitions_response.text
-            })
-        
-        transitions = transitions_response.json().get('transitions', [])
-        
-        # Look for a "Done", "Resolved", or "Closed" transition
-        close_transition = None
-        for transition in transitions:
-            transition_name = transition.get('name', '').lower()
-            if any(keyword in transition_name for keyword in ['done', 'resolved', 'closed', 'complete']):
-                close_transition = transition
-                break
+            }
         
         if not close_transition:
-            return json.dumps({
+            return {
                 "error": "No suitable close transition found",
-                "available_transitions": [t.get('name') for t in transitions]
-            })
-        
-        # Add resolution comment if provided
-        if resolution_comment:
-            comment_payload = {
-                "body": {
-                    "type": "doc",
-                    "version": 1,
-                    "content": [
-                        {
-                            "type": "paragraph",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": f"Issue resolved by NOC team. Resolution: {resolution_comment}"
-                                }
-                            ]
-                        }
-                    ]
-                }
+                "available_transitions": available_transitions
             }
-            requests.post(f"{base_url}/issue/{issue_key}/comment", json=comment_payload, headers=headers, timeout=30)
         
-        # Transition the issue to closed state
+        # Transition the issue to closed state, adding the resolution comment in the same call
         transition_payload = {
             "transition": {
                 "id": close_transition.get('id')
             }
         }
+        if resolution_comment:
+            transition_payload["update"] = {
+                "comment": [
+                    {
+                        "add": {
+                            "body": _adf_text(f"Issue resolved by NOC team. Resolution: {resolution_comment}")
+                        }
+                    }
+                ]
+            }
+        
+        response = _jira_request("POST", f"{base_url}/issue/{issue_key}/transitions", json=transition_payload, headers=headers, timeout=30)
         
-        response = requests.post(f"{base_url}/issue/{issue_key}/transitions", json=transition_payload, headers=headers, timeout=30)
+        if response.status_code in (400, 404, 409):
+            # The cached transition or issue state may be stale (workflow or issue changed); re-read this issue once
+            _metadata_cache.discard(cache_key)
+            _metadata_cache.discard(("issue_state", issue_key))
+            close_transition, _, _, cache_key = _resolve_close_transition(base_url, headers, issue_key)
+            if close_transition:
+                transition_payload["transition"]["id"] = close_transition.get('id')
+                response = _jira_request("POST", f"{base_url}/issue/{issue_key}/transitions", json=transition_payload, headers=headers, timeout=30)
         
         if response.status_code == 204:
-            # Get updated issue details
-            issue_response = requests.get(f"{base_url}/issue/{issue_key}", headers=headers, timeout=30)
-            if issue_response.status_code == 200:
-                issue_data = issue_response.json()
-                return json.dumps({
-                    "status": "success",
-                    "action": "close", 
-                    "issue_key": issue_key,
-                    "summary": issue_data.get('fields', {}).get('summary'),
-                    "status": issue_data.get('fields', {}).get('status', {}).get('name'),
-                    "resolution_comment": resolution_comment,
-                    "message": f"✅ Issue {issue_key} closed successfully",
-                    "resolved_on": datetime.now().isoformat(),
-                    "jira_url": f"{os.getenv('JIRA_INSTANCE_URL')}/browse/{issue_key}"
-                })
+            _metadata_cache.discard(("issue_state", issue_key))
+            issue_data = _read_issue_summary(base_url, headers, issue_key) if confirm else {}
+            if not issue_data.get('status') and close_transition.get('to'):
+                issue_data['status'] = close_transition.get('to')
+            result = {
+                "status": "success",
+                "action": "close", 
+                "issue_key": issue_key,
+                "resolution_comment": resolution_comment,
+                "message": f"✅ Issue {issue_key} closed successfully",
+                "resolved_on": datetime.now().isoformat(),
+                "jira_url": _browse_url(base_url, issue_key)
+            }
+            # Like the full read-back, the Jira status replaces "success" when it is known
+            result.update({k: v for k, v in issue_data.items() if v})
+            return result
         
-        return json.dumps({
+        return {
             "error": f"Failed to close issue: HTTP {response.status_code}",
             "details": response.text
-        })
+        }
             
     except requests.exceptions.RequestException as e:
-        return json.dumps({
+        return {
             "error": "Cannot connect to Jira instance", 
             "details": str(e)
-        })
+        }
 
 
-def _query_jira_issue(base_url: str, headers: dict, issue_key: str = None, project_key: str = None) -> str:
+def _query_jira_issue(base_url: str, headers: dict, issue_key: str = None, project_key: str = None) -> dict:
     """Query Jira issues via REST API."""
     
     try:
         if issue_key:
             # Get specific issue
-            response = requests.get(f"{base_url}/issue/{issue_key}", headers=headers, timeout=30)
+            response = _jira_request("GET", f"{base_url}/issue/{issue_key}", headers=headers, timeout=30)
             
             if response.status_code == 200:
                 issue_data = response.json()
                 fields = issue_data.get('fields', {})
+                _remember_issue_state(issue_data.get('key'), fields)
                 
-                return json.dumps({
+                return {
                     "status": "success",
                     "action": "query",
                     "issue": {
@@ -431,20 +991,20 @@ def _query_jira_issue(base_url: str, headers: dict, issue_key: str = None, proje
                         "created": fields.get('created'),
                         "updated": fields.get('updated'),
                         "description": _extract_text_from_adf(fields.get('description', {})),
-                        "jira_url": f"{os.getenv('JIRA_INSTANCE_URL')}/browse/{issue_data.get('key')}"
+                        "jira_url": _browse_url(base_url, issue_data.get('key'))
                     },
                     "message": "✅ Issue data retrieved successfully"
-                })
+                }
         else:
             # Search for recent issues in the project
-            jql = f"project = {project_key} AND labels in (network-outage) ORDER BY created DESC"
+            jql = _default_jql(project_key)
             search_params = {
                 'jql': jql,
                 'maxResults': 10,
                 'fields': 'summary,status,priority,assignee,created,updated'
             }
             
-            response = requests.get(f"{base_url}/search", headers=headers, params=search_params, timeout=30)
+            response = _jira_request("GET", f"{base_url}/search", headers=headers, params=search_params, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -460,27 +1020,145 @@ def _query_jira_issue(base_url: str, headers: dict, issue_key: str = None, proje
                         "priority": fields.get('priority', {}).get('name'),
                         "assignee": fields.get('assignee', {}).get('displayName') if fields.get('assignee') else 'Unassigned',
                         "created": fields.get('created'),
-                        "jira_url": f"{os.getenv('JIRA_INSTANCE_URL')}/browse/{issue.get('key')}"
+                        "jira_url": _browse_url(base_url, issue.get('key'))
                     })
                 
-                return json.dumps({
+                return {
                     "status": "success",
                     "action": "query",
                     "issues": formatted_issues,
                     "count": len(formatted_issues),
                     "message": f"✅ Retrieved {len(formatted_issues)} issue(s) successfully"
-                })
+                }
         
-        return json.dumps({
+        return {
             "error": f"Failed to query issue: HTTP {response.status_code}",
             "details": response.text
-        })
+        }
             
     except requests.exceptions.RequestException as e:
-        return json.dumps({
+        return {
             "error": "Cannot connect to Jira instance",
             "details": str(e)
-        })
+        }
+
+def _default_jql(project_key: str) -> str:
+    return f"project = {project_key} AND labels in (network-outage) ORDER BY created DESC"
+
+
+def iter_jira_issues(base_url: str, headers: dict, jql: str, fields: list = None, page_size: int = JIRA_SEARCH_PAGE_SIZE, limit: int = None):
+    """
+    Yield raw issues matching a JQL query, following Jira's startAt pagination.
+
+    Jira may return fewer issues per page than maxResults asks for (it clamps the
+    page size), so offsets advance by the size of the first page actually returned,
+    and a later short page has its gap fetched before moving on. The first page
+    reports the total; later pages are then fetched up to JIRA_SEARCH_PARALLEL_PAGES
+    at a time and yielded in order, so at most that many pages are held in memory.
+    Iteration stops at the total, the limit or the first empty page.
+    Raises JiraAPIError if Jira rejects a page.
+    """
+    field_list = ','.join(fields or JIRA_SEARCH_DEFAULT_FIELDS)
+    if limit is not None:
+        page_size = max(1, min(page_size, limit))
+    
+    def fetch(start_at: int) -> dict:
+        params = {'jql': jql, 'startAt': start_at, 'maxResults': page_size, 'fields': field_list}
+        response = _jira_request("GET", f"{base_url}/search", headers=headers, params=params, timeout=30)
+        if response.status_code != 200:
+            raise JiraAPIError(response.status_code, response.text)
+        return response.json()
+    
+    first = fetch(0)
+    first_issues = first.get('issues', [])
+    total = first.get('total', 0)
+    if limit is not None:
+        total = min(total, limit)
+    stride = len(first_issues)
+    if not stride:
+        return
+    
+    yielded = 0
+    for issue in first_issues[:total]:
+        yield issue
+        yielded += 1
+    
+    offsets = iter(range(stride, total, stride))
+    with ThreadPoolExecutor(max_workers=JIRA_SEARCH_PARALLEL_PAGES) as pool:
+        window = [(start, pool.submit(fetch, start)) for start in itertools.islice(offsets, JIRA_SEARCH_PARALLEL_PAGES)]
+        try:
+            while window and yielded < total:
+                start, future = window.pop(0)
+                next_offset = next(offsets, None)
+                if next_offset is not None:
+                    window.append((next_offset, pool.submit(fetch, next_offset)))
+                issues = future.result().get('issues', [])
+                # Fill a short page up to the next prefetched offset
+                end = min(start + stride, total)
+                while issues and start + len(issues) < end:
+                    more = fetch(start + len(issues)).get('issues', [])
+                    if not more:
+                        break
+                    issues += more[:end - start - len(issues)]
+                if not issues:
+                    return
+                for issue in issues[:total - yielded]:
+                    yield issue
+                    yielded += 1
+        finally:
+            for _, future in window:
+                future.cancel()
+
+
+def _project_issue(issue: dict, fields: list, base_url: str) -> dict:
+    """Flatten the requested fields of a raw issue into a compact dict."""
+    raw_fields = issue.get('fields', {})
+    projected = {"key": issue.get('key')}
+    for name in fields:
+        value = raw_fields.get(name)
+        if isinstance(value, dict):
+            value = value.get('name') or value.get('displayName') or value.get('value') or _extract_text_from_adf(value)
+        elif name == 'assignee' and value is None:
+            value = 'Unassigned'
+        projected[name] = value
+    projected["jira_url"] = _browse_url(base_url, issue.get('key'))
+    return projected
+
+
+def _search_jira_issues(base_url: str, headers: dict, jql: str, fields: list, max_results: int) -> dict:
+    """Search Jira issues across pages, returning only the requested fields."""
+    
+    fields = [f.strip() for f in fields or JIRA_SEARCH_DEFAULT_FIELDS if f and f.strip()]
+    try:
+        limit = max(1, min(int(max_results or JIRA_SEARCH_MAX_RESULTS), JIRA_SEARCH_MAX_RESULTS))
+    except (ValueError, TypeError):
+        limit = JIRA_SEARCH_MAX_RESULTS
+    
+    issues = []
+    error = None
+    try:
+        for issue in iter_jira_issues(base_url, headers, jql, fields, limit=limit):
+            issues.append(_project_issue(issue, fields, base_url))
+    except JiraAPIError as e:
+        error = {"error": f"Failed to search issues: HTTP {e.status_code}", "details": e.details}
+    except requests.exceptions.RequestException as e:
+        error = {"error": "Cannot connect to Jira instance", "details": str(e)}
+    
+    if error and not issues:
+        return error
+    
+    result = {
+        "status": "partial" if error else "success",
+        "action": "search",
+        "jql": jql,
+        "issues": issues,
+        "count": len(issues),
+        "message": f"✅ Retrieved {len(issues)} issue(s) successfully"
+    }
+    if error:
+        result.update(error)
+    return result
+
 
 def _extract_text_from_adf(adf_content):
     """Extract plain text from Atlassian Document Format (ADF)."""
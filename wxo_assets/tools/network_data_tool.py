@@ -0,0 +1,301 @@
+"""
+Cached, indexed access to the network status dataset for watsonx Orchestrate.
+
+The /data endpoint behind get_data_tool (see get_data_openapi.json) returns the whole
+network dump. This module keeps one copy of it per process, revalidates it with
+ETag / Last-Modified after NETWORK_DATA_TTL seconds, and indexes the records by site,
+region, node type and state so a question such as "status of S002" is answered with
+just the matching records instead of the full dump.
+"""
+
+from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
+from requests.adapters import HTTPAdapter
+from datetime import datetime
+from typing import List
+import os
+import re
+import threading
+import time
+import requests
+
+from noc_logging import get_logger
+from noc_metrics import instrument_tool, observe_call
+from noc_response import format_response
+
+
+# Network data endpoint (server of get_data_openapi.json)
+NETWORK_DATA_URL = os.getenv(
+    "NOC_NETWORK_DATA_URL",
+    "https://bootcamp-bootcamp.apps.itz-xaao7x.infra01-lb.wdc07.techzone.ibm.com/data"
+)
+NETWORK_DATA_TIMEOUT = 10
+NETWORK_DATA_TTL = 30           # seconds a fetched dataset is used without revalidation
+NETWORK_DATA_MAX_STALE = 600    # seconds a dataset may still be served if the endpoint is down
+NETWORK_DATA_RETRY_AFTER = 15   # seconds after a failed fetch before the endpoint is tried again
+NETWORK_QUERY_MAX_RESULTS = 50  # default cap on records returned by one query
+NETWORK_TERSE_FIELDS = ("match_count", "summary.state", "summary.records", "records")  # kept by response_format="terse"
+
+# The dataset schema is not fixed, so each indexed field is looked up under the
+# first of these keys present in a record (or in a nested object of the record).
+INDEX_FIELDS = {
+    "site_id": ("site_id", "siteId", "site", "site_code", "siteCode"),
+    "region": ("region", "region_name", "regionName", "area", "market"),
+    "node_type": ("node_type", "nodeType", "type", "node_kind", "category"),
+    "state": ("status", "state", "incident_status", "incidentStatus", "health", "operational_status")
+}
+SITE_ID_PATTERN = re.compile(r"\bS\d+\b", re.IGNORECASE)
+
+log = get_logger("network_data")
+
+
+@instrument_tool
+@tool(
+    name="query_network_data",
+    description="Returns only the network status records (sites, nodes, incidents) matching a site ID, region, node type and/or state, from a locally cached and indexed copy of the network dataset.",
+    permission=ToolPermission.ADMIN
+)
+def query_network_data(site_id: str = None, region: str = None, node_type: str = None, state: str = None, limit: int = NETWORK_QUERY_MAX_RESULTS, response_format: str = None, response_fields: List[str] = None) -> str:
+    """
+    Filtered lookup in the network status dataset.
+
+    Args:
+        site_id: Site ID to match, e.g. S002
+        region: Region name to match
+        node_type: Node type to match, e.g. cell tower, router, backhaul
+        state: Status/state to match, e.g. down, degraded, active
+        limit: Maximum number of records to return
+        response_format: Response detail: "compact" (default; no whitespace), "terse" (match count, per-state counts and records only) or "full" (everything, indented)
+        response_fields: Dotted paths of the only fields to return, e.g. ["match_count", "records.status"]
+
+    Returns:
+        JSON string with the matching records, their count and a per-state summary; without filters only the dataset summary is returned
+    """
+    try:
+        dataset = get_network_dataset()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        result = {"error": f"Network data unavailable: {e}", "url": NETWORK_DATA_URL}
+        return format_response(result, response_format, response_fields, NETWORK_TERSE_FIELDS, "query_network_data")
+
+    filters = {"site_id": site_id, "region": region, "node_type": node_type, "state": state}
+    filters = {field: value for field, value in filters.items() if value}
+    result = {"filters": filters, "dataset": dataset.info()}
+    if not filters:
+        result["summary"] = dataset.summary()
+        return format_response(result, response_format, response_fields, NETWORK_TERSE_FIELDS, "query_network_data")
+
+    matches = dataset.query(**filters)
+    result.update({
+        "match_count": len(matches),
+        "summary": dataset.summary(matches),
+        "records": [dataset.records[i] for i in matches[:max(limit, 0)]]
+    })
+    return format_response(result, response_format, response_fields, NETWORK_TERSE_FIELDS, "query_network_data")
+
+
+class NetworkDataset:
+    """One snapshot of the network dataset with its field indexes."""
+
+    def __init__(self, payload, etag: str = None, last_modified: str = None):
+        self.records = _extract_records(payload)
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = datetime.now()
+        self.validated_at = time.monotonic()
+        self.cache_status = "refreshed"
+        self.indexes = {field: {} for field in INDEX_FIELDS}
+        for position, record in enumerate(self.records):
+            for field, aliases in INDEX_FIELDS.items():
+                value = _field_value(record, aliases)
+                if value is None and field == "site_id":
+                    value = _find_site_id(record)
+                if value is not None:
+                    self.indexes[field].setdefault(_normalize(value), []).append(position)
+
+    def query(self, **filters) -> list:
+        """Positions of the records matching every given field (case-insensitive), in dataset order."""
+        matched = None
+        for field, value in filters.items():
+            positions = set(self.indexes[field].get(_normalize(value), ()))
+            matched = positions if matched is None else matched & positions
+            if not matched:
+                return []
+        return sorted(matched) if matched is not None else list(range(len(self.records)))
+
+    def summary(self, positions: list = None) -> dict:
+        """Record counts per state, region and node type, for the given records or the whole dataset."""
+        selected = None if positions is None else set(positions)
+        summary = {}
+        for field in ("state", "region", "node_type"):
+            counts = {}
+            for value, members in self.indexes[field].items():
+                count = len(members) if selected is None else sum(1 for member in members if member in selected)
+                if count:
+                    counts[value] = count
+            summary[field] = counts
+        summary["records"] = len(self.records) if selected is None else len(selected)
+        return summary
+
+    def info(self) -> dict:
+        return {
+            "records": len(self.records),
+            "fetched_at": self.fetched_at.isoformat(),
+            "age_seconds": round(time.monotonic() - self.validated_at, 1),
+            "cache": self.cache_status
+        }
+
+
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+_dataset = None
+_dataset_lock = threading.Lock()   # held only to read or swap _dataset and _failure
+_refresh_lock = threading.Lock()   # held by the one caller fetching from the endpoint
+_failure = None   # (monotonic time, exception) of the last failed fetch, until one succeeds
+
+
+def get_network_dataset(max_age: float = NETWORK_DATA_TTL) -> NetworkDataset:
+    """
+    Return the cached dataset, revalidating it once it is older than max_age.
+
+    Revalidation sends If-None-Match / If-Modified-Since, so an unchanged dataset
+    costs a 304 with no body and no re-indexing. One caller refreshes at a time,
+    without holding the cache lock; meanwhile other callers get the current copy
+    (up to NETWORK_DATA_MAX_STALE seconds old) and only wait when there is none.
+    If the endpoint fails, a dataset up to NETWORK_DATA_MAX_STALE seconds old is
+    served instead of an error, and the endpoint is not tried again for
+    NETWORK_DATA_RETRY_AFTER seconds, so an outage does not cost every caller a
+    timeout.
+    """
+    dataset, current = _cached_dataset(max_age)
+    if dataset is not None:
+        return dataset
+    servable = current is not None and time.monotonic() - current.validated_at < NETWORK_DATA_MAX_STALE
+    if not _refresh_lock.acquire(blocking=not servable):
+        current.cache_status = "stale"   # another caller is refreshing it
+        return current
+    try:
+        # The dataset may have been refreshed, or the fetch failed, while this caller waited
+        dataset, current = _cached_dataset(max_age)
+        if dataset is not None:
+            return dataset
+        return _refresh_dataset(current)
+    finally:
+        _refresh_lock.release()
+
+
+def _cached_dataset(max_age: float):
+    """
+    (dataset to serve or None, current dataset). Serves the current dataset while it
+    is fresh, or while fetches are backed off and it is not too stale; raises the last
+    fetch error when backed off with nothing to serve.
+    """
+    with _dataset_lock:
+        current = _dataset
+        if current is not None and time.monotonic() - current.validated_at < max_age:
+            current.cache_status = "hit"
+            return current, current
+        if _failure is not None and time.monotonic() - _failure[0] < NETWORK_DATA_RETRY_AFTER:
+            if current is not None and time.monotonic() - current.validated_at < NETWORK_DATA_MAX_STALE:
+                current.cache_status = "stale"
+                return current, current
+            raise _failure[1]
+        return None, current
+
+
+def _refresh_dataset(current) -> NetworkDataset:
+    """Fetch or revalidate the dataset (caller holds _refresh_lock) and swap it in."""
+    global _dataset, _failure
+    headers = {"Accept": "application/json"}
+    if current is not None and current.etag:
+        headers["If-None-Match"] = current.etag
+    if current is not None and current.last_modified:
+        headers["If-Modified-Since"] = current.last_modified
+    try:
+        with observe_call("network_data", "GET /data") as call:
+            response = _session.get(NETWORK_DATA_URL, headers=headers, timeout=NETWORK_DATA_TIMEOUT)
+            call.received_bytes = len(response.content)
+            call.error = response.status_code >= 400
+        if response.status_code == 304 and current is not None:
+            with _dataset_lock:
+                current.validated_at = time.monotonic()
+                current.cache_status = "revalidated"
+                _failure = None
+            return current
+        response.raise_for_status()
+        dataset = NetworkDataset(
+            response.json(),
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified")
+        )
+        with _dataset_lock:
+            _dataset = dataset
+            _failure = None
+        return dataset
+    except (requests.exceptions.RequestException, ValueError) as e:
+        with _dataset_lock:
+            _failure = (time.monotonic(), e)
+        log.warning("network_data.fetch.failed", url=NETWORK_DATA_URL, error=str(e), retry_after=NETWORK_DATA_RETRY_AFTER)
+        if current is not None and time.monotonic() - current.validated_at < NETWORK_DATA_MAX_STALE:
+            current.cache_status = "stale"
+            return current
+        raise
+
+
+def get_network_records(**filters) -> list:
+    """Records matching the given site_id / region / node_type / state filters."""
+    dataset = get_network_dataset()
+    return [dataset.records[i] for i in dataset.query(**filters)]
+
+
+def _extract_records(payload) -> list:
+    """
+    Flatten the payload into a list of record dicts.
+
+    A top-level list is used as is; for an object, every list of objects becomes
+    records tagged with its collection name ("sites", "nodes", ...), and an object of
+    objects keyed by ID becomes records carrying that ID.
+    """
+    if isinstance(payload, list):
+        return [record for record in payload if isinstance(record, dict)]
+    if not isinstance(payload, dict):
+        raise ValueError("Network data is neither a JSON object nor a list")
+
+    records = []
+    for collection, value in payload.items():
+        if isinstance(value, list):
+            records.extend(dict(record, collection=collection) for record in value if isinstance(record, dict))
+        elif isinstance(value, dict) and value and all(isinstance(item, dict) for item in value.values()):
+            records.extend(dict(record, collection=collection, id=record.get("id", key)) for key, record in value.items())
+    return records or [payload]
+
+
+def _field_value(record: dict, aliases: tuple):
+    """First scalar found under one of the aliases, at the top level or one object deep."""
+    for alias in aliases:
+        value = record.get(alias)
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return value
+        if isinstance(value, dict):
+            nested = value.get("id") or value.get("name")
+            if isinstance(nested, (str, int)):
+                return nested
+    for value in record.values():
+        if isinstance(value, dict):
+            for alias in aliases:
+                nested = value.get(alias)
+                if isinstance(nested, (str, int, float)) and not isinstance(nested, bool):
+                    return nested
+    return None
+
+
+def _find_site_id(record: dict):
+    """Site ID from an "id"/"name" field that looks like one (S002), for site records."""
+    for key in ("id", "name", "site_name"):
+        value = record.get(key)
+        if isinstance(value, str) and SITE_ID_PATTERN.fullmatch(value.strip()):
+            return value
+    return None
+
+
+def _normalize(value) -> str:
+    return " ".join(str(value).lower().replace("_", " ").split())
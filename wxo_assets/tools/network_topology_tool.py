@@ -0,0 +1,394 @@
+"""
+Network topology and blast-radius engine for watsonx Orchestrate.
+
+Builds a graph of sites, routers and backhaul links from the network dataset (via
+network_data_tool, imported as a sibling module, so import the tools with the
+package root option: orchestrate tools import -k python -f network_topology_tool.py -p .)
+and answers "what is cut off if this link or node fails" in constant time, so
+affected_nodes for Jira tickets and outage emails is computed rather than guessed.
+
+The graph is stored as CSR adjacency arrays. One depth-first pass records, for every
+node, its Euler-tour interval [entry, exit) and its low-link value. A failed link is a
+bridge exactly when the child's low-link is past the parent's entry time, and then the
+cut-off nodes are the child's interval, whose size, node total and per-type counts
+come from prefix sums. A failed node cuts off each child interval whose low-link does
+not climb above it. Several simultaneous failures, or a link doubled by parallel
+links, fall back to a breadth-first search.
+"""
+
+from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
+from array import array
+from collections import deque
+from typing import List
+import os
+import re
+import threading
+import time
+
+from network_data_tool import INDEX_FIELDS, get_network_dataset
+from noc_metrics import instrument_tool
+from noc_response import format_response
+
+
+# Nodes with these types (or listed in NOC_TOPOLOGY_ROOTS) are where service comes
+# from; anything that loses its path to all of them is affected. A connected part of
+# the network with no such node is rooted at its highest-degree node (ties by node ID),
+# and a cut inside it is reported with both sides and flagged as ambiguous.
+TOPOLOGY_ROOTS = [root for root in os.getenv("NOC_TOPOLOGY_ROOTS", "").split(",") if root]
+ROOT_NODE_TYPES = ("core", "hub", "data center", "datacenter", "mtso", "pop", "gateway")
+TOPOLOGY_MAX_LISTED = 200   # affected node IDs listed in a response; counts are always exact
+BLAST_RADIUS_TERSE_FIELDS = ("failure", "affected_site_count", "affected_nodes", "by_node_type", "ambiguous", "other_side.affected_site_count", "other_side.affected_nodes")  # kept by response_format="terse"
+
+# Dataset fields describing links. Link records name both ends; node records may
+# name the node(s) they hang off.
+SITE_ID_FIELDS = ("site_id", "siteId", "site_code", "siteCode")
+NODE_ID_FIELDS = ("node_id", "nodeId") + SITE_ID_FIELDS + ("id", "name", "router_id", "hostname")
+LINK_END_FIELDS = (
+    ("source", "target"), ("from", "to"), ("a_end", "z_end"), ("node_a", "node_b"),
+    ("endpoint_a", "endpoint_b"), ("site_a", "site_b"), ("router_a", "router_b")
+)
+LINK_LIST_FIELDS = ("endpoints", "routers", "ends")
+UPSTREAM_FIELDS = ("parent", "parent_id", "upstream", "upstream_node", "uplink", "connected_to", "router", "backhaul_router", "hub")
+NODE_WEIGHT_FIELDS = ("node_count", "nodeCount", "nodes", "affected_nodes", "cell_count", "customers")
+
+NODE_NAME_PATTERN = re.compile(r"\b[SR]\d+\b")
+
+
+@instrument_tool
+@tool(
+    name="compute_blast_radius",
+    description="Computes which sites and how many network nodes are cut off by a failed link (e.g. fiber cut between R03 and R04) or a failed site/router, from the network topology. Use the result as affected_nodes for Jira tickets and outage emails.",
+    permission=ToolPermission.ADMIN
+)
+def compute_blast_radius(failed_link: str = None, failed_node: str = None, log_message: str = None, response_format: str = None, response_fields: List[str] = None) -> str:
+    """
+    Blast radius of a link or node failure.
+
+    Args:
+        failed_link: Link given by its two ends, e.g. "R03-R04"; several links may be separated by ";"
+        failed_node: Site or router that is down, e.g. "S005" or "R03"
+        log_message: Incident log to read the failure from when no link or node is given (two router names mean a link, one name a node)
+        response_format: Response detail: "compact" (default; no whitespace), "terse" (counts only, without the site list) or "full" (everything, indented)
+        response_fields: Dotted paths of the only fields to return, e.g. ["affected_nodes", "affected_site_count"]
+
+    Returns:
+        JSON string with the affected site IDs, affected site count, affected_nodes total and per node type counts
+    """
+    links = [NODE_NAME_PATTERN.findall(link.upper()) or re.split(r"[-,\s]+", link.strip()) for link in (failed_link or "").split(";") if link.strip()]
+    nodes = [failed_node.strip()] if failed_node else []
+    if not links and not nodes and log_message:
+        names = list(dict.fromkeys(NODE_NAME_PATTERN.findall(log_message)))
+        routers = [name for name in names if name.startswith("R")]
+        if len(routers) >= 2:
+            links = [routers[:2]]
+        elif names:
+            nodes = [names[0]]
+    if not links and not nodes:
+        result = {"error": "Give failed_link (e.g. R03-R04), failed_node (e.g. S005) or a log_message naming them"}
+        return format_response(result, response_format, response_fields, BLAST_RADIUS_TERSE_FIELDS, "compute_blast_radius")
+
+    try:
+        graph = get_topology()
+    except Exception as e:
+        return format_response({"error": f"Network topology unavailable: {e}"}, response_format, response_fields, BLAST_RADIUS_TERSE_FIELDS, "compute_blast_radius")
+
+    started = time.perf_counter()
+    try:
+        result = graph.blast_radius(links=links, nodes=nodes)
+    except KeyError as e:
+        result = {"error": f"Unknown node {e} in the network topology", "known_nodes": graph.node_count}
+        return format_response(result, response_format, response_fields, BLAST_RADIUS_TERSE_FIELDS, "compute_blast_radius")
+    result["lookup_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return format_response(result, response_format, response_fields, BLAST_RADIUS_TERSE_FIELDS, "compute_blast_radius")
+
+
+class TopologyGraph:
+    """
+    Undirected network graph in CSR form with precomputed DFS intervals and low-links.
+
+    Node 0 is a virtual root joined to every root node; each other connected part is
+    searched from its highest-degree node (ties broken by node ID), so the result does
+    not depend on record order. component[node] is that start node, or 0 for nodes
+    reached from the virtual root.
+    """
+
+    def __init__(self, node_ids: list, links: list, roots: list = (), weights: dict = None, node_types: dict = None, sites: set = None):
+        weights = weights or {}
+        node_types = node_types or {}
+        sites = sites or set()
+        self.node_ids = [None] + list(node_ids)
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids) if i}
+        count = len(self.node_ids)
+
+        edges = [(self.index[a], self.index[b]) for a, b in links if a != b]
+        edges += [(0, self.index[root]) for root in roots if root in self.index]
+        self._build_csr(count, edges)
+        self.node_count = count - 1
+        self.link_count = len(edges) - sum(1 for a, _ in edges if a == 0)
+        self._search(count)
+
+        # Prefix sums over DFS order: position k holds the totals of the first k nodes visited
+        self.types = sorted({node_types.get(node_id, "unknown") for node_id in self.node_ids[1:]})
+        self._weight_prefix = array("q", [0]) * (count + 1)
+        self._site_prefix = array("i", [0]) * (count + 1)
+        self._type_prefix = {node_type: array("i", [0]) * (count + 1) for node_type in self.types}
+        for position, node in enumerate(self.order):
+            node_id = self.node_ids[node]
+            self._weight_prefix[position + 1] = self._weight_prefix[position] + (weights.get(node_id, 1) if node else 0)
+            self._site_prefix[position + 1] = self._site_prefix[position] + (1 if node and node_id in sites else 0)
+            for node_type, prefix in self._type_prefix.items():
+                prefix[position + 1] = prefix[position] + (1 if node and node_types.get(node_id, "unknown") == node_type else 0)
+        self._sites = sites
+
+    def _build_csr(self, count: int, edges: list):
+        degree = [0] * (count + 1)
+        for a, b in edges:
+            degree[a + 1] += 1
+            degree[b + 1] += 1
+        for i in range(count):
+            degree[i + 1] += degree[i]
+        self.indptr = array("i", degree)
+        self.neighbors = array("i", [0]) * (2 * len(edges))
+        self.edge_of = array("i", [0]) * (2 * len(edges))  # edge number of each adjacency slot
+        cursor = list(degree[:count])
+        for edge, (a, b) in enumerate(edges):
+            for u, v in ((a, b), (b, a)):
+                self.neighbors[cursor[u]] = v
+                self.edge_of[cursor[u]] = edge
+                cursor[u] += 1
+
+    def _search(self, count: int):
+        """Iterative DFS from the virtual root, then from every node it did not reach."""
+        entry = array("i", [-1]) * count
+        low = array("i", [0]) * count
+        exit_ = array("i", [0]) * count
+        parent = array("i", [-1]) * count
+        parent_edge = array("i", [-1]) * count
+        component = array("i", [0]) * count
+        order = []
+        indptr, neighbors, edge_of = self.indptr, self.neighbors, self.edge_of
+        starts = sorted(range(1, count), key=lambda node: (indptr[node] - indptr[node + 1], str(self.node_ids[node])))
+        for start in [0] + starts:
+            if entry[start] != -1:
+                continue
+            parent[start] = 0 if start else -1
+            component[start] = start
+            entry[start] = low[start] = len(order)
+            order.append(start)
+            stack = [[start, indptr[start]]]
+            while stack:
+                frame = stack[-1]
+                node, slot = frame
+                if slot < indptr[node + 1]:
+                    frame[1] = slot + 1
+                    if edge_of[slot] == parent_edge[node]:
+                        continue
+                    neighbor = neighbors[slot]
+                    if entry[neighbor] == -1:
+                        parent[neighbor] = node
+                        parent_edge[neighbor] = edge_of[slot]
+                        component[neighbor] = start
+                        entry[neighbor] = low[neighbor] = len(order)
+                        order.append(neighbor)
+                        stack.append([neighbor, indptr[neighbor]])
+                    elif entry[neighbor] < low[node]:
+                        low[node] = entry[neighbor]
+                else:
+                    stack.pop()
+                    exit_[node] = len(order)
+                    if stack and low[node] < low[stack[-1][0]]:
+                        low[stack[-1][0]] = low[node]
+        self.entry, self.low, self.exit, self.parent, self.parent_edge = entry, low, exit_, parent, parent_edge
+        self.component = component
+        self.order = array("i", order)
+
+    def cut_by_link(self, a: str, b: str):
+        """
+        Euler intervals of the nodes disconnected when every link between a and b
+        fails, or None when a and b are joined by parallel links (use cut_by_search).
+        """
+        u, v = self.index[a], self.index[b]
+        parallel = sum(1 for slot in range(self.indptr[u], self.indptr[u + 1]) if self.neighbors[slot] == v)
+        if parallel > 1:
+            return None
+        if self.parent[v] != u:
+            u, v = v, u
+        if self.parent[v] != u or self.low[v] <= self.entry[u]:
+            return []  # not a tree link, or a redundant path around it survives
+        return [(self.entry[v], self.exit[v])]
+
+    def cut_by_node(self, name: str) -> list:
+        """Euler intervals of the failed node and of everything that only reaches the roots through it."""
+        node = self.index[name]
+        intervals = [(self.entry[node], self.entry[node] + 1)]
+        for slot in range(self.indptr[node], self.indptr[node + 1]):
+            child = self.neighbors[slot]
+            if self.parent[child] == node and self.parent_edge[child] == self.edge_of[slot] and self.low[child] >= self.entry[node]:
+                intervals.append((self.entry[child], self.exit[child]))
+        return intervals
+
+    def cut_by_search(self, links: list, nodes: list) -> list:
+        """Positions (in DFS order) of nodes unreachable once all the given links and nodes fail."""
+        failed_nodes = {self.index[name] for name in nodes}
+        failed_edges = set()
+        for a, b in links:
+            u, v = self.index[a], self.index[b]
+            for slot in range(self.indptr[u], self.indptr[u + 1]):
+                if self.neighbors[slot] == v:
+                    failed_edges.add(self.edge_of[slot])
+        starts = [node for node in range(len(self.node_ids)) if self.parent[node] <= 0 and node not in failed_nodes]
+        reached = bytearray(len(self.node_ids))
+        queue = deque(starts)
+        for node in starts:
+            reached[node] = 1
+        while queue:
+            node = queue.popleft()
+            for slot in range(self.indptr[node], self.indptr[node + 1]):
+                neighbor = self.neighbors[slot]
+                if not reached[neighbor] and neighbor not in failed_nodes and self.edge_of[slot] not in failed_edges:
+                    reached[neighbor] = 1
+                    queue.append(neighbor)
+        return [self.entry[node] for node in range(1, len(self.node_ids)) if not reached[node]]
+
+    def blast_radius(self, links: list = (), nodes: list = ()) -> dict:
+        """
+        Affected sites and node totals for the given failures.
+
+        A failure in a connected part with no configured or typed root has no known
+        service side: the side holding the assumed root is then returned as other_side
+        and the result is flagged ambiguous.
+        """
+        links = [tuple(link[:2]) for link in links if len(link) >= 2]
+        intervals = None
+        if len(links) + len(nodes) == 1:
+            intervals = self.cut_by_link(*links[0]) if links else self.cut_by_node(nodes[0])
+        if intervals is not None:
+            method = "euler_interval"
+        else:
+            method = "search"
+            intervals = [(position, position + 1) for position in sorted(self.cut_by_search(links, nodes))]
+
+        result = {"failure": {"links": ["-".join(link) for link in links], "nodes": list(nodes)}}
+        result.update(self._side(intervals))
+        unrooted = sorted({self.component[self.index[name]] for name in [link[0] for link in links] + list(nodes)} - {0})
+        if unrooted:
+            result["ambiguous"] = True
+            result["assumed_roots"] = [self.node_ids[start] for start in unrooted]
+            result["other_side"] = self._side(_subtract(
+                [(self.entry[start], self.exit[start]) for start in unrooted], intervals
+            ))
+        result["method"] = method
+        return result
+
+    def _side(self, intervals: list) -> dict:
+        """Sites and node totals of the nodes at the given DFS order positions."""
+        affected_sites = []
+        for position in (position for start, end in intervals for position in range(start, end)):
+            node_id = self.node_ids[self.order[position]]
+            if node_id in self._sites:
+                affected_sites.append(node_id)
+                if len(affected_sites) >= TOPOLOGY_MAX_LISTED:
+                    break
+        by_type = {
+            node_type: sum(prefix[end] - prefix[start] for start, end in intervals)
+            for node_type, prefix in self._type_prefix.items()
+        }
+        return {
+            "affected_sites": affected_sites,
+            "affected_site_count": sum(self._site_prefix[end] - self._site_prefix[start] for start, end in intervals),
+            "affected_nodes": sum(self._weight_prefix[end] - self._weight_prefix[start] for start, end in intervals),
+            "by_node_type": {node_type: count for node_type, count in by_type.items() if count}
+        }
+
+    @classmethod
+    def from_records(cls, records: list) -> "TopologyGraph":
+        """Build the graph from network dataset records (see network_data_tool)."""
+        node_ids, weights, node_types, sites, links, roots = {}, {}, {}, set(), [], list(TOPOLOGY_ROOTS)
+
+        def add_node(name, node_type=None):
+            name = str(name).strip()
+            node_ids.setdefault(name, None)
+            if node_type and name not in node_types:
+                node_types[name] = node_type
+            elif name not in node_types and NODE_NAME_PATTERN.fullmatch(name):
+                node_types[name] = "router" if name.startswith("R") else "site"
+            if name.startswith("S") and NODE_NAME_PATTERN.fullmatch(name):
+                sites.add(name)
+            return name
+
+        for record in records:
+            ends = _link_ends(record)
+            if ends:
+                links.append((add_node(ends[0]), add_node(ends[1])))
+                continue
+            name = _first_scalar(record, NODE_ID_FIELDS)
+            if name is None:
+                continue
+            node_type = _first_scalar(record, INDEX_FIELDS["node_type"])
+            node_type = " ".join(str(node_type).lower().replace("_", " ").split()) if node_type is not None else None
+            name = add_node(name, node_type)
+            if _first_scalar(record, SITE_ID_FIELDS) is not None or record.get("collection") == "sites":
+                sites.add(name)
+            weight = _first_scalar(record, NODE_WEIGHT_FIELDS)
+            if isinstance(weight, (int, float)) and weight >= 0:
+                weights[name] = int(weight)
+            if node_type in ROOT_NODE_TYPES:
+                roots.append(name)
+            for field in UPSTREAM_FIELDS:
+                upstream = record.get(field)
+                for target in upstream if isinstance(upstream, list) else [upstream]:
+                    if isinstance(target, (str, int)) and str(target).strip() and str(target).strip() != name:
+                        links.append((name, add_node(target)))
+        return cls(list(node_ids), links, roots, weights, node_types, sites)
+
+
+_topology = None
+_topology_source = None
+_topology_lock = threading.Lock()
+
+
+def get_topology() -> TopologyGraph:
+    """The topology of the current network dataset, rebuilt only when the dataset changes."""
+    global _topology, _topology_source
+    dataset = get_network_dataset()
+    with _topology_lock:
+        if _topology is None or _topology_source is not dataset:
+            _topology = TopologyGraph.from_records(dataset.records)
+            _topology_source = dataset
+        return _topology
+
+
+def _subtract(spans: list, holes: list) -> list:
+    """The parts of the disjoint [start, end) spans not covered by the disjoint holes."""
+    holes = sorted(holes)
+    parts = []
+    for start, end in sorted(spans):
+        for hole_start, hole_end in holes:
+            if hole_end <= start or hole_start >= end:
+                continue
+            if hole_start > start:
+                parts.append((start, hole_start))
+            start = max(start, hole_end)
+        if start < end:
+            parts.append((start, end))
+    return parts
+
+
+def _link_ends(record: dict):
+    for first, second in LINK_END_FIELDS:
+        a, b = record.get(first), record.get(second)
+        if isinstance(a, (str, int)) and isinstance(b, (str, int)):
+            return a, b
+    for field in LINK_LIST_FIELDS:
+        ends = record.get(field)
+        if isinstance(ends, list) and len(ends) == 2 and all(isinstance(end, (str, int)) for end in ends):
+            return ends[0], ends[1]
+    return None
+
+
+def _first_scalar(record: dict, fields: tuple):
+    for field in fields:
+        value = record.get(field)
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return value
+    return None
@@ -0,0 +1,162 @@
+"""
+Structured logging for the NOC tools.
+
+Every record is one JSON line with a timestamp, level, logger, event name and the
+event's fields. Records go through a QueueHandler, so a tool call only builds and
+enqueues a record; formatting and writing happen on a background QueueListener
+thread.
+
+Field values may be zero-argument callables, which are only called when the record
+is actually emitted: nothing is serialized for a disabled level or a sampled-out
+event. They run later on the listener thread, so they should only capture values
+that are not modified afterwards. Events can be sampled with NOC_LOG_SAMPLE
+("tool.call=0.1,jira.issue.create.request=0.01"); errors are always logged.
+
+The tool modules import this module as a sibling, so import them with the package
+root option: orchestrate tools import -k python -f <tool>.py -p .
+
+Usage:
+    log = get_logger("jira")
+    log.debug("jira.issue.payload", payload=lambda: payload)
+    log.info("jira.issue.created", issue_key=key, status=201)
+"""
+
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+
+
+LOG_LEVEL = os.getenv("NOC_LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.getenv("NOC_LOG_FILE")          # default: stderr
+LOG_QUEUE_SIZE = 10000                        # records beyond this are dropped instead of blocking the tool
+LOG_MAX_FIELD_CHARS = 2000                    # longer field values are truncated
+LOG_SAMPLE_RATES = {
+    event.strip(): float(rate)
+    for event, _, rate in (item.partition("=") for item in os.getenv("NOC_LOG_SAMPLE", "").split(","))
+    if event.strip() and rate
+}
+
+_ROOT = "noc"
+# Own level names: the ADK replaces the standard ones with ANSI-coloured labels
+_LEVEL_NAMES = {logging.DEBUG: "debug", logging.INFO: "info", logging.WARNING: "warning", logging.ERROR: "error", logging.CRITICAL: "critical"}
+
+
+class EventLogger:
+    """Logger taking an event name and keyword fields instead of a message string."""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def debug(self, event: str, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+    def log(self, level: int, event: str, exc_info: bool = False, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        rate = LOG_SAMPLE_RATES.get(event)
+        if rate is not None and level < logging.ERROR and random.random() >= rate:
+            return
+        if rate is not None and rate < 1:
+            fields["sample_rate"] = rate
+        self.logger.log(level, event, exc_info=exc_info, extra={"noc_fields": fields})
+
+    def enabled(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; callable field values are resolved here, on the listener thread."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": _LEVEL_NAMES.get(record.levelno, str(record.levelno)),
+            "logger": record.name,
+            "event": record.getMessage()
+        }
+        for key, value in getattr(record, "noc_fields", {}).items():
+            entry[key] = _field(value)
+        if record.exc_info:
+            entry["exception"] = _truncate(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """Enqueue the record as is; the formatter on the listener side does the work."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+_listener = None
+
+
+def get_logger(name: str) -> EventLogger:
+    """Event logger "noc.<name>", sharing the queue-backed JSON handler."""
+    _configure()
+    return EventLogger(logging.getLogger(f"{_ROOT}.{name}"))
+
+
+def set_level(level: str):
+    logging.getLogger(_ROOT).setLevel(level.upper())
+
+
+def _configure():
+    global _listener
+    if _listener is not None:
+        return
+    if LOG_FILE:
+        output = logging.FileHandler(LOG_FILE, encoding="utf-8")
+    else:
+        output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter())
+
+    records = queue.Queue(LOG_QUEUE_SIZE)
+    root = logging.getLogger(_ROOT)
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(_DroppingQueueHandler(records))
+    root.propagate = False
+    _listener = QueueListener(records, output)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def _field(value):
+    if callable(value):
+        try:
+            value = value()
+        except Exception as e:
+            return f"<unavailable: {e}>"
+    if isinstance(value, (dict, list, tuple)):
+        text = json.dumps(value, default=str)
+        return value if len(text) <= LOG_MAX_FIELD_CHARS else _truncate(text)
+    if isinstance(value, str):
+        return _truncate(value)
+    return value
+
+
+def _truncate(text: str) -> str:
+    if len(text) <= LOG_MAX_FIELD_CHARS:
+        return text
+    return f"{text[:LOG_MAX_FIELD_CHARS]}... [{len(text) - LOG_MAX_FIELD_CHARS} more chars]"
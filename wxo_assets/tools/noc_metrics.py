@@ -0,0 +1,363 @@
+"""
+Shared instrumentation for the NOC tools.
+
+Records latency histograms, error counts and payload sizes for every tool call and
+every outbound call (Jira, SMTP, the network data endpoint, server probes) and
+can export them in Prometheus text format: to the file named by NOC_METRICS_FILE,
+rewritten every METRICS_EXPORT_INTERVAL seconds, and, if NOC_METRICS_PORT is set, on
+http://<NOC_METRICS_HOST>:<port>/metrics (host 127.0.0.1 unless set). Both exporters
+are off by default, so importing a tool module starts no threads or listeners. A
+stack-sampling profiler can be switched on per tool.
+
+The tool modules import this module as a sibling, so import them with the package
+root option: orchestrate tools import -k python -f <tool>.py -p .
+
+Usage:
+    @instrument_tool
+    @tool(name="my_tool", ...)
+    def my_tool(...): ...
+
+    with observe_call("jira", "POST /issue") as call:
+        response = session.post(...)
+        call.received_bytes = len(response.content)
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from noc_logging import get_logger
+
+
+METRICS_EXPORT_PATH = os.getenv("NOC_METRICS_FILE")            # unset disables the metrics file
+METRICS_EXPORT_INTERVAL = 15        # seconds between rewrites of the metrics file
+METRICS_HTTP_HOST = os.getenv("NOC_METRICS_HOST", "127.0.0.1")  # set to 0.0.0.0 to expose /metrics beyond this host
+METRICS_HTTP_PORT = int(os.getenv("NOC_METRICS_PORT", "0"))  # 0 disables the /metrics endpoint
+
+# A tool result counts as an error when its JSON object has a non-empty "error" field
+# or one of these status fields set to an error value
+TOOL_ERROR_STATUS_FIELDS = ("notification_status", "status")
+TOOL_ERROR_STATUSES = ("error", "failed")
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # seconds
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576)                   # bytes
+
+# Sampling profiler: tools listed in NOC_PROFILE_TOOLS ("*" for all) have the stacks of
+# a PROFILE_SAMPLE_RATE fraction of their calls sampled every PROFILE_INTERVAL seconds.
+# Stacks are written in collapsed (flame graph) format to PROFILE_DIRECTORY/<tool>.folded.
+PROFILE_TOOLS = {name for name in os.getenv("NOC_PROFILE_TOOLS", "").split(",") if name}
+PROFILE_SAMPLE_RATE = float(os.getenv("NOC_PROFILE_SAMPLE_RATE", "1.0"))
+PROFILE_INTERVAL = 0.005
+PROFILE_MAX_DEPTH = 64
+PROFILE_DIRECTORY = os.getenv("NOC_PROFILE_DIRECTORY", tempfile.gettempdir())
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Process-wide histograms and counters keyed by metric name and label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}   # (name, labels) -> _Histogram
+        self._counters = {}     # (name, labels) -> int
+        self._help = {}
+
+    def observe(self, name: str, labels: tuple, value: float, buckets: tuple, help_text: str):
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = _Histogram(buckets)
+                self._help.setdefault(name, help_text)
+            histogram.observe(value)
+
+    def increment(self, name: str, labels: tuple, help_text: str, amount: int = 1):
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + amount
+            self._help.setdefault(name, help_text)
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format."""
+        with self._lock:
+            histograms = sorted((key, (h.buckets, list(h.counts), h.sum, h.count)) for key, h in self._histograms.items())
+            counters = sorted(self._counters.items())
+            help_texts = dict(self._help)
+
+        lines, described = [], set()
+        for (name, labels), value in counters:
+            if name not in described:
+                described.add(name)
+                lines += [f"# HELP {name} {help_texts[name]}", f"# TYPE {name} counter"]
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), (buckets, counts, total, count) in histograms:
+            if name not in described:
+                described.add(name)
+                lines += [f"# HELP {name} {help_texts[name]}", f"# TYPE {name} histogram"]
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for key, value in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+registry = MetricsRegistry()
+log = get_logger("metrics")
+
+
+def instrument_tool(python_tool=None, name: str = None):
+    """
+    Time every call of a tool, count its errors and measure its response size.
+
+    Apply above @tool. The tool spec is resolved from the undecorated function first,
+    so the schema and the module:function binding the ADK derives from it are
+    unchanged. A call counts as an error when it raises or returns a JSON object with
+    a non-empty top-level "error", or with a "notification_status" or "status" of
+    "error" or "failed" (TOOL_ERROR_STATUS_FIELDS). Also works on plain functions.
+    """
+    if python_tool is None:
+        return lambda target: instrument_tool(target, name)
+
+    fn = getattr(python_tool, "fn", python_tool)
+    tool_name = name or getattr(python_tool, "name", None) or fn.__name__
+
+    @wraps(fn)
+    def instrumented(*args, **kwargs):
+        _ensure_exporters()
+        sampled = (tool_name in PROFILE_TOOLS or "*" in PROFILE_TOOLS) and random.random() < PROFILE_SAMPLE_RATE
+        if sampled:
+            _sampler.attach(tool_name)
+        labels = (("tool", tool_name),)
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            registry.increment("noc_tool_errors_total", labels, "Tool calls that raised or returned an error")
+            log.error("tool.failed", tool=tool_name, error=repr(e))
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.observe("noc_tool_duration_seconds", labels, elapsed, LATENCY_BUCKETS, "Tool call latency")
+            if sampled:
+                _sampler.detach()
+        size = len(result) if isinstance(result, str) else None
+        if size is not None:
+            registry.observe("noc_tool_response_bytes", labels, size, SIZE_BUCKETS, "Size of tool responses returned to the agent")
+            if _is_error_result(result):
+                registry.increment("noc_tool_errors_total", labels, "Tool calls that raised or returned an error")
+        log.debug("tool.call", tool=tool_name, ms=round(elapsed * 1000, 1), response_bytes=size)
+        return result
+
+    if fn is python_tool:
+        return instrumented
+    python_tool._spec = python_tool.__tool_spec__
+    python_tool.fn = instrumented
+    return python_tool
+
+
+class _Call:
+    """Mutable record of one outbound call; set the byte counts or error inside the block."""
+
+    __slots__ = ("sent_bytes", "received_bytes", "error")
+
+    def __init__(self):
+        self.sent_bytes = None
+        self.received_bytes = None
+        self.error = False
+
+
+@contextmanager
+def observe_call(system: str, operation: str):
+    """Record latency, errors and payload sizes of one outbound call to system."""
+    _ensure_exporters()
+    call = _Call()
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call.error = True
+        raise
+    finally:
+        record_call(system, operation, time.perf_counter() - started, call.error, call.sent_bytes, call.received_bytes)
+
+
+def record_call(system: str, operation: str, seconds: float, error: bool = False, sent_bytes: int = None, received_bytes: int = None):
+    """Record an outbound call timed by the caller."""
+    labels = (("system", system), ("operation", operation))
+    registry.observe("noc_outbound_duration_seconds", labels, seconds, LATENCY_BUCKETS, "Outbound call latency")
+    if error:
+        registry.increment("noc_outbound_errors_total", labels, "Outbound calls that failed")
+    if sent_bytes is not None:
+        registry.observe("noc_outbound_sent_bytes", labels, sent_bytes, SIZE_BUCKETS, "Outbound request payload size")
+    if received_bytes is not None:
+        registry.observe("noc_outbound_received_bytes", labels, received_bytes, SIZE_BUCKETS, "Outbound response payload size")
+
+
+def export_metrics(path: str = None) -> str:
+    """Write the current metrics (and profiler stacks) atomically and return the path."""
+    path = path or METRICS_EXPORT_PATH or os.path.join(tempfile.gettempdir(), "dish_noc_metrics.prom")
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as metrics_file:
+        metrics_file.write(registry.render())
+    os.replace(temporary_path, path)
+    _sampler.write(PROFILE_DIRECTORY)
+    return path
+
+
+def enable_profiling(tool_name: str, sample_rate: float = None):
+    """Start sampling the stacks of tool_name ("*" for every tool)."""
+    global PROFILE_SAMPLE_RATE
+    PROFILE_TOOLS.add(tool_name)
+    if sample_rate is not None:
+        PROFILE_SAMPLE_RATE = sample_rate
+
+
+def disable_profiling(tool_name: str = None):
+    """Stop sampling tool_name, or every tool."""
+    if tool_name is None:
+        PROFILE_TOOLS.clear()
+    else:
+        PROFILE_TOOLS.discard(tool_name)
+
+
+class _StackSampler:
+    """
+    Samples the stacks of threads running profiled tool calls from one background
+    thread, so a profiled call pays only for attach/detach, not for tracing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}    # thread id -> tool name
+        self._stacks = {}    # tool name -> {collapsed stack: samples}
+        self._thread = None
+
+    def attach(self, tool_name: str):
+        with self._lock:
+            self._active[threading.get_ident()] = tool_name
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="noc-stack-sampler", daemon=True)
+                self._thread.start()
+
+    def detach(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            time.sleep(PROFILE_INTERVAL)
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, tool_name in active.items():
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                if stack:
+                    collapsed = ";".join(reversed(stack))
+                    with self._lock:
+                        counts = self._stacks.setdefault(tool_name, {})
+                        counts[collapsed] = counts.get(collapsed, 0) + 1
+
+    def write(self, directory: str):
+        with self._lock:
+            stacks = {tool_name: dict(counts) for tool_name, counts in self._stacks.items()}
+        for tool_name, counts in stacks.items():
+            with open(os.path.join(directory, f"{tool_name}.folded"), "w", encoding="utf-8") as folded:
+                folded.writelines(f"{stack} {count}\n" for stack, count in counts.items())
+
+
+_sampler = _StackSampler()
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def _ensure_exporters():
+    global _exporters_started
+    if _exporters_started:
+        return
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if METRICS_EXPORT_PATH:
+            threading.Thread(target=_export_loop, name="noc-metrics-export", daemon=True).start()
+        if METRICS_HTTP_PORT:
+            try:
+                server = ThreadingHTTPServer((METRICS_HTTP_HOST, METRICS_HTTP_PORT), _MetricsHandler)
+            except OSError as e:
+                log.warning("metrics.http.unavailable", host=METRICS_HTTP_HOST, port=METRICS_HTTP_PORT, error=str(e))
+                return
+            threading.Thread(target=server.serve_forever, name="noc-metrics-http", daemon=True).start()
+
+
+def _is_error_result(result: str) -> bool:
+    """Whether a tool's JSON result reports an error, in any response format."""
+    if '"error"' not in result and '"failed"' not in result:
+        return False
+    try:
+        value = json.loads(result)
+    except ValueError:
+        return False
+    if not isinstance(value, dict):
+        return False
+    return bool(value.get("error")) or any(value.get(field) in TOOL_ERROR_STATUSES for field in TOOL_ERROR_STATUS_FIELDS)
+
+
+def _export_loop():
+    while True:
+        time.sleep(METRICS_EXPORT_INTERVAL)
+        try:
+            export_metrics()
+        except OSError as e:
+            log.warning("metrics.export.failed", path=METRICS_EXPORT_PATH, error=str(e))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
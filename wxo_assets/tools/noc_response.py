@@ -0,0 +1,160 @@
+"""
+Response shaping for the NOC tools.
+
+Every tool result ends up in the agent's prompt, so its size is paid for in tokens
+and latency on the next turn. format_response renders a tool result in one of three
+formats:
+
+    full     all fields, indented (the original output)
+    compact  all fields except debugging detail (tracebacks, sent payloads), no whitespace
+    terse    only the fields agents act on, listed per tool
+
+and can project it onto a list of dotted field paths instead ("records.site_id"; a
+"*" segment matches every key of an object, "sites.*.state").
+Sizes (UTF-8 bytes and estimated tokens) are tallied per tool and format for
+get_response_size_report and exported as metrics. Measuring what the full format
+would have taken means serializing the result a second time, so it is only done
+when NOC_RESPONSE_MEASURE_FULL is set.
+
+The tool modules import this module as a sibling, so import them with the package
+root option: orchestrate tools import -k python -f <tool>.py -p .
+"""
+
+import json
+import os
+import threading
+
+from noc_metrics import registry
+
+
+RESPONSE_FORMATS = ("full", "compact", "terse")
+DEFAULT_RESPONSE_FORMAT = os.getenv("NOC_RESPONSE_FORMAT", "compact")
+RESPONSE_CHARS_PER_TOKEN = 4            # rough estimate for JSON text
+DEBUG_FIELDS = ("traceback", "payload_sent", "debug_info")  # dropped from compact and terse responses
+ALWAYS_KEPT_FIELDS = ("error",)          # kept by terse and projected responses
+MEASURE_FULL_SIZE = os.getenv("NOC_RESPONSE_MEASURE_FULL", "").lower() in ("1", "true", "yes")  # report the saving against the full format
+
+_report_lock = threading.Lock()
+_report = {}   # (tool, format) -> [responses, bytes, tokens, full bytes]
+
+
+def format_response(result, response_format: str = None, response_fields: list = None, terse_fields: tuple = (), tool: str = None) -> str:
+    """
+    Serialize a tool result in the requested format.
+
+    Args:
+        result: Result object, or a JSON string of it
+        response_format: full, compact or terse (defaults to NOC_RESPONSE_FORMAT, "compact")
+        response_fields: Dotted field paths to keep; overrides the terse field list
+        terse_fields: Field paths kept by the terse format
+        tool: Tool name the size is reported under
+
+    Returns:
+        JSON string
+    """
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return result
+    response_format = (response_format or DEFAULT_RESPONSE_FORMAT).lower()
+    if response_format not in RESPONSE_FORMATS:
+        response_format = "compact"
+
+    full_size = None
+    if response_format == "full" and not response_fields:
+        text = json.dumps(result, indent=2, ensure_ascii=False)
+        if tool and MEASURE_FULL_SIZE:
+            full_size = len(text.encode("utf-8"))
+    else:
+        if tool and MEASURE_FULL_SIZE:
+            full_size = len(json.dumps(result, indent=2, ensure_ascii=False).encode("utf-8"))
+        shaped = _drop_debug_fields(result)
+        if response_fields:
+            shaped = _project(shaped, _field_tree(list(response_fields) + list(ALWAYS_KEPT_FIELDS)))
+        elif response_format == "terse" and terse_fields:
+            shaped = _drop_empty(_project(shaped, _field_tree(list(terse_fields) + list(ALWAYS_KEPT_FIELDS))))
+        text = json.dumps(shaped, separators=(",", ":"), ensure_ascii=False)
+
+    if tool:
+        _record_size(tool, response_format, text, full_size)
+    return text
+
+
+def get_response_size_report() -> dict:
+    """Responses, average bytes and tokens, and saving against the full format (None unless measured), per tool and format."""
+    with _report_lock:
+        tallies = {key: list(value) for key, value in _report.items()}
+    report = {}
+    for (tool, response_format), (responses, size, tokens, full_size) in sorted(tallies.items()):
+        report.setdefault(tool, {})[response_format] = {
+            "responses": responses,
+            "avg_bytes": round(size / responses),
+            "avg_tokens": round(tokens / responses),
+            "saved_pct": round(100 * (1 - size / full_size), 1) if full_size else None
+        }
+    return report
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // RESPONSE_CHARS_PER_TOKEN)
+
+
+def _record_size(tool: str, response_format: str, text: str, full_size: int = None):
+    size = len(text.encode("utf-8"))
+    tokens = estimate_tokens(text)
+    with _report_lock:
+        tally = _report.setdefault((tool, response_format), [0, 0, 0, 0])
+        tally[0] += 1
+        tally[1] += size
+        tally[2] += tokens
+        tally[3] += full_size or 0
+    labels = (("tool", tool), ("format", response_format))
+    registry.increment("noc_tool_response_tokens_total", labels, "Estimated tokens of tool responses", tokens)
+    if full_size is not None:
+        registry.increment("noc_tool_response_full_bytes_total", labels, "Bytes the same responses take in the full format", full_size)
+
+
+def _field_tree(paths: list) -> dict:
+    """["a.b", "a.c", "d"] -> {"a": {"b": {}, "c": {}}, "d": {}}; an empty dict keeps the whole value."""
+    tree = {}
+    for path in paths:
+        parts = [part for part in str(path).split(".") if part]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and not node[part]:
+                break   # the whole value is already kept
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = {}
+    return tree
+
+
+def _project(value, tree: dict):
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if isinstance(value, dict):
+        if "*" in tree:
+            return {key: _project(item, tree.get(key, tree["*"])) for key, item in value.items()}
+        return {key: _project(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+def _drop_debug_fields(value):
+    if isinstance(value, dict):
+        return {key: _drop_debug_fields(item) for key, item in value.items() if key not in DEBUG_FIELDS}
+    if isinstance(value, list):
+        return [_drop_debug_fields(item) for item in value]
+    return value
+
+
+def _drop_empty(value):
+    if isinstance(value, dict):
+        return {key: _drop_empty(item) for key, item in value.items() if item is not None and item != {} and item != []}
+    if isinstance(value, list):
+        return [_drop_empty(item) for item in value]
+    return value
@@ -0,0 +1,346 @@
+"""
+Local resolution-guide retrieval for watsonx Orchestrate.
+
+Extracts the incident resolution guide PDFs once, builds a BM25 inverted index in a
+single memory-mapped file and answers "how do I fix <root cause>" lookups locally,
+without a round-trip to the remote knowledge base. The root cause tag returned by
+diagnose_incident_log can be passed straight to get_resolution_steps.
+
+Build the index ahead of time with:  python resolution_guide_tool.py build
+"""
+
+from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
+from collections import Counter
+from typing import List
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+
+from noc_logging import get_logger
+from noc_metrics import instrument_tool
+from noc_response import format_response
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDF guides are skipped without pypdf; .txt/.md guides still index
+    PdfReader = None
+
+
+# Guide documents, shipped in resolution_guides/ next to this file so they are packaged with "-p ."
+# (NOC_GUIDE_DIRECTORY can point at the knowledge base PDFs instead; reading PDFs needs pypdf)
+GUIDE_DIRECTORY = os.getenv(
+    "NOC_GUIDE_DIRECTORY",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "resolution_guides")
+)
+GUIDE_FILES = {
+    "Backhaul Failure": "backhaul_failure_guide.pdf",
+    "Power Outage": "power_outage_guide.pdf",
+    "Configuration Error": "config_error_guide.pdf"
+}
+GUIDE_INDEX_PATH = os.getenv(         # private to this deployment (NOC_DEPLOYMENT) and OS user
+    "NOC_GUIDE_INDEX",
+    os.path.join(os.path.expanduser("~"), ".dish_noc", os.getenv("NOC_DEPLOYMENT", "default"), "resolution_guides.idx")
+)
+
+# Query terms used for each root cause tag, on top of any log text supplied
+CAUSE_QUERIES = {
+    "Backhaul Failure": "backhaul link failure fiber cut carrier loss transport circuit troubleshooting restore",
+    "Power Outage": "power outage ups battery generator rectifier electricity restore troubleshooting",
+    "Configuration Error": "configuration error misconfiguration bgp acl routing policy neighbor troubleshooting verify",
+    "Unknown": "confirm scope record alarm time affected sites neighbouring"  # no guide: searched across all guides
+}
+
+# Passage splitting and BM25 scoring
+PASSAGE_WORDS = 120                  # words per passage
+PASSAGE_STRIDE = 90                  # words between passage starts (overlap keeps steps together)
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_TOP_K = 3
+GUIDE_TERSE_FIELDS = ("root_cause", "fallback", "passages.guide", "passages.page", "passages.text")  # kept by response_format="terse"
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "you your can not but if then than into which when what how all any each".split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+log = get_logger("resolution_guides")
+
+# Index file layout: header | postings (doc, tf) pairs | doc table | passage text | JSON metadata
+_MAGIC = b"NOCBM25\x01"
+_HEADER = struct.Struct("<8sQQQQQ")   # magic, postings, docs, text, meta offsets, meta length
+_POSTING = struct.Struct("<II")        # passage id, term frequency
+_DOC = struct.Struct("<IIIQI")         # token count, guide id, page, text offset, text length
+
+
+@instrument_tool
+@tool(
+    name="get_resolution_steps",
+    description="Returns the most relevant resolution passages from the local incident resolution guides for a root cause tag such as the one returned by diagnose_incident_log.",
+    permission=ToolPermission.ADMIN
+)
+def get_resolution_steps(root_cause: str, log_message: str = None, top_k: int = DEFAULT_TOP_K, response_format: str = None, response_fields: List[str] = None) -> str:
+    """
+    Looks up resolution steps for a diagnosed root cause in the local guide index.
+
+    Args:
+        root_cause: Root cause tag (Backhaul Failure, Power Outage, Configuration Error), or the JSON returned by diagnose_incident_log with include_scores
+        log_message: Optional incident log text to sharpen the search
+        top_k: Number of passages to return
+        response_format: Response detail: "compact" (default; no whitespace), "terse" (passage text and its guide and page only) or "full" (everything, indented)
+        response_fields: Dotted paths of the only fields to return, e.g. ["passages.text"]
+
+    Returns:
+        JSON string with the matching passages (guide, page, score, text) and the lookup time;
+        fallback is true when the passages come from all guides because the root cause has none of its own
+    """
+    if root_cause.lstrip().startswith("{"):
+        try:
+            root_cause = json.loads(root_cause).get("root_cause", root_cause)
+        except ValueError:
+            pass
+
+    try:
+        index = get_guide_index()
+    except OSError as e:
+        result = {"error": f"Cannot build or open resolution guide index: {e}", "root_cause": root_cause}
+        return format_response(result, response_format, response_fields, GUIDE_TERSE_FIELDS, "get_resolution_steps")
+    if index.document_count == 0:
+        result = {
+            "error": "No resolution guides could be indexed" + ("" if PdfReader else " (install pypdf to read PDF guides)"),
+            "root_cause": root_cause,
+            "guide_directory": GUIDE_DIRECTORY
+        }
+        return format_response(result, response_format, response_fields, GUIDE_TERSE_FIELDS, "get_resolution_steps")
+
+    # A known cause whose guide is missing must not be answered from another cause's guide
+    has_guide = index.has_guide(root_cause)
+    if root_cause in GUIDE_FILES and not has_guide:
+        result = {
+            "error": f"No resolution guide for {root_cause} ({GUIDE_FILES[root_cause]} is not in {GUIDE_DIRECTORY})",
+            "root_cause": root_cause,
+            "available_guides": sorted({guide["cause"] for guide in index.guides})
+        }
+        return format_response(result, response_format, response_fields, GUIDE_TERSE_FIELDS, "get_resolution_steps")
+
+    started = time.perf_counter()
+    passages = index.search(f"{CAUSE_QUERIES.get(root_cause, root_cause)} {log_message or ''}", root_cause, top_k)
+    return format_response({
+        "root_cause": root_cause,
+        "passages": passages,
+        "fallback": not has_guide,
+        "source": "local_index",
+        "lookup_ms": round((time.perf_counter() - started) * 1000, 3)
+    }, response_format, response_fields, GUIDE_TERSE_FIELDS, "get_resolution_steps")
+
+
+class GuideIndex:
+    """
+    Read-only BM25 index over guide passages, backed by a memory-mapped file.
+
+    Only the term dictionary and the per-passage token counts are held in memory;
+    postings and passage text are read from the mapping on demand.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as index_file:
+            self._mm = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._postings, self._docs, self._text, meta_offset, meta_length = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise OSError(f"{path} is not a resolution guide index")
+        meta = json.loads(self._mm[meta_offset:meta_offset + meta_length])
+        self.guides = meta["guides"]
+        self.sources = meta["sources"]
+        self.document_count = meta["documents"]
+        self._average_length = meta["average_length"] or 1.0
+        self._terms = meta["terms"]
+        lengths = [_DOC.unpack_from(self._mm, self._docs + i * _DOC.size) for i in range(self.document_count)]
+        self._lengths = [entry[0] for entry in lengths]
+        self._guide_ids = [entry[1] for entry in lengths]
+
+    def has_guide(self, root_cause: str) -> bool:
+        return any(guide["cause"] == root_cause for guide in self.guides)
+
+    def search(self, query: str, root_cause: str = None, top_k: int = DEFAULT_TOP_K) -> list:
+        """
+        Top passages for the query by BM25. When root_cause has its own guide in the
+        index only that guide is searched, otherwise all guides are.
+        """
+        allowed = {i for i, guide in enumerate(self.guides) if guide["cause"] == root_cause} or None
+        scores = {}
+        for term in set(_tokenize(query)):
+            entry = self._terms.get(term)
+            if entry is None:
+                continue
+            start, frequency = entry
+            idf = math.log(1 + (self.document_count - frequency + 0.5) / (frequency + 0.5))
+            offset = self._postings + start * _POSTING.size
+            for doc, tf in _POSTING.iter_unpack(self._mm[offset:offset + frequency * _POSTING.size]):
+                if allowed is not None and self._guide_ids[doc] not in allowed:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc] / self._average_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        passages = []
+        for doc, score in heapq.nlargest(top_k, scores.items(), key=lambda item: item[1]):
+            _, guide_id, page, text_offset, text_length = _DOC.unpack_from(self._mm, self._docs + doc * _DOC.size)
+            passages.append({
+                "guide": self.guides[guide_id]["name"],
+                "page": page,
+                "score": round(score, 3),
+                "text": self._mm[self._text + text_offset:self._text + text_offset + text_length].decode("utf-8")
+            })
+        return passages
+
+    def close(self):
+        self._mm.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_guide_index() -> GuideIndex:
+    """Open the index, (re)building it first if it is missing or a guide file changed."""
+    global _index
+    with _index_lock:
+        sources = _guide_sources()
+        if _index is not None and _index.sources == sources:
+            return _index
+        if _index is not None:
+            _index.close()
+            _index = None
+        if os.path.exists(GUIDE_INDEX_PATH):
+            index = GuideIndex(GUIDE_INDEX_PATH)
+            if index.sources == sources:
+                _index = index
+                return _index
+            index.close()
+        build_guide_index(GUIDE_INDEX_PATH)
+        _index = GuideIndex(GUIDE_INDEX_PATH)
+        return _index
+
+
+def build_guide_index(index_path: str = GUIDE_INDEX_PATH) -> dict:
+    """Extract every guide, split it into passages and write the BM25 index file atomically."""
+    guides, passages = [], []
+    for cause, path in _guide_paths():
+        pages = _extract_pages(path)
+        if pages is None:
+            continue
+        guide_id = len(guides)
+        guides.append({"name": os.path.basename(path), "cause": cause})
+        for page_number, page_text in pages:
+            for text in _split_passages(page_text):
+                passages.append((guide_id, page_number, text))
+
+    postings = {}
+    lengths = []
+    for doc, (_, _, text) in enumerate(passages):
+        tokens = _tokenize(text)
+        lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            postings.setdefault(term, []).append((doc, tf))
+
+    postings_blob, terms, start = bytearray(), {}, 0
+    for term in sorted(postings):
+        entries = postings[term]
+        terms[term] = [start, len(entries)]
+        for doc, tf in entries:
+            postings_blob += _POSTING.pack(doc, tf)
+        start += len(entries)
+
+    docs_blob, text_blob = bytearray(), bytearray()
+    for (guide_id, page_number, text), length in zip(passages, lengths):
+        encoded = text.encode("utf-8")
+        docs_blob += _DOC.pack(length, guide_id, page_number, len(text_blob), len(encoded))
+        text_blob += encoded
+
+    meta = json.dumps({
+        "documents": len(passages),
+        "average_length": sum(lengths) / len(lengths) if lengths else 0.0,
+        "guides": guides,
+        "sources": _guide_sources(),
+        "terms": terms
+    }).encode("utf-8")
+
+    postings_offset = _HEADER.size
+    docs_offset = postings_offset + len(postings_blob)
+    text_offset = docs_offset + len(docs_blob)
+    meta_offset = text_offset + len(text_blob)
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), mode=0o700, exist_ok=True)
+    temporary_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as index_file:
+        index_file.write(_HEADER.pack(_MAGIC, postings_offset, docs_offset, text_offset, meta_offset, len(meta)))
+        for blob in (postings_blob, docs_blob, text_blob, meta):
+            index_file.write(blob)
+    os.replace(temporary_path, index_path)
+    return {"index_path": index_path, "guides": [guide["name"] for guide in guides], "passages": len(passages), "terms": len(terms)}
+
+
+def _guide_paths() -> list:
+    """(cause, path) of every configured guide that exists, including .txt/.md variants."""
+    paths = []
+    for cause, file_name in GUIDE_FILES.items():
+        stem = os.path.splitext(file_name)[0]
+        for candidate in (file_name, f"{stem}.txt", f"{stem}.md"):
+            path = os.path.join(GUIDE_DIRECTORY, candidate)
+            if os.path.exists(path):
+                paths.append((cause, path))
+    return paths
+
+
+def _guide_sources() -> dict:
+    """File name -> [size, mtime] of the guides, used to detect a stale index."""
+    sources = {}
+    for _, path in _guide_paths():
+        stat = os.stat(path)
+        sources[os.path.basename(path)] = [stat.st_size, int(stat.st_mtime)]
+    return sources
+
+
+def _extract_pages(path: str):
+    """List of (page number, text) for a guide, or None if it cannot be read."""
+    if not path.lower().endswith(".pdf"):
+        with open(path, encoding="utf-8", errors="replace") as guide:
+            return [(1, guide.read())]
+    if PdfReader is None:
+        return None
+    try:
+        reader = PdfReader(path)
+        return [(number, page.extract_text() or "") for number, page in enumerate(reader.pages, start=1)]
+    except Exception as e:
+        log.warning("guides.extract.failed", path=path, error=str(e))
+        return None
+
+
+def _split_passages(text: str) -> list:
+    """Overlapping word windows of a page, with end-of-line hyphenation undone."""
+    words = re.sub(r"-\s*\n\s*", "", text).split()
+    if not words:
+        return []
+    last_start = max(len(words) - PASSAGE_WORDS, 0)
+    starts = list(range(0, last_start + 1, PASSAGE_STRIDE))
+    if starts[-1] != last_start:
+        starts.append(last_start)
+    return [" ".join(words[start:start + PASSAGE_WORDS]) for start in starts]
+
+
+def _tokenize(text: str) -> list:
+    return [token for token in _TOKEN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+# Offline index build: python resolution_guide_tool.py build
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        print(json.dumps(build_guide_index(sys.argv[2] if len(sys.argv) > 2 else GUIDE_INDEX_PATH), indent=2))
+    else:
+        print("Usage: python resolution_guide_tool.py build [index path]")